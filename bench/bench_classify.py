@@ -0,0 +1,70 @@
+# Per block type timing of block_to_block_type, against the previous
+# implementation (one all(map(lambda ...)) pass per type, uncompiled
+# patterns) kept here for reference.
+#
+#   python3 bench/bench_classify.py
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from helpers import block_to_block_type
+
+def legacy_block_to_block_type(block):
+    lines = block.split('\n')
+    if len(lines) == 1 and re.match(r'#{1,6} ', lines[0]):
+        return 'heading'
+    if (all(map(lambda L: L.startswith('- '), lines)) or
+        all(map(lambda L: L.startswith('* '), lines))):
+        return 'unordered_list'
+    if all(map(lambda L: L.startswith('>'), lines)):
+        return 'quote'
+    if len(lines) >= 2 and (lines[0].startswith('```') and
+                            lines[-1] == '```'):
+        return 'code'
+    numbers = list(map(lambda L: re.match(r'(\d+)\.', L), lines))
+    if all(numbers):
+        orders = list(map(lambda m: int(m.groups()[0]), numbers))
+        if orders == list(range(1, int(orders[-1])+1)):
+            return 'ordered_list'
+    return 'paragraph'
+
+def blocks(lines):
+    return {
+        'heading': '## A heading line',
+        'paragraph': '\n'.join(f'Some paragraph text, line {i}.' for i in range(lines)),
+        'unordered_list': '\n'.join(f'* item {i}' for i in range(lines)),
+        'ordered_list': '\n'.join(f'{i}. item' for i in range(1, lines + 1)),
+        'quote': '\n'.join(f'> quoted line {i}' for i in range(lines)),
+        'code': '```\n' + '\n'.join(f'code line {i}' for i in range(lines)) + '\n```',
+    }
+
+def best_of(classify, block, number, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            classify(block)
+        best = min(best, time.perf_counter() - start)
+    return best / number * 1e6
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lines', type=int, default=10)
+    parser.add_argument('--number', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f'{"block type":<16} {"legacy us":>10} {"current us":>11} {"speedup":>8}')
+    for expect, block in blocks(args.lines).items():
+        assert block_to_block_type(block) == expect
+        assert legacy_block_to_block_type(block) == expect
+        legacy = best_of(legacy_block_to_block_type, block, args.number, args.repeat)
+        current = best_of(block_to_block_type, block, args.number, args.repeat)
+        print(f'{expect:<16} {legacy:>10.2f} {current:>11.2f} {legacy / current:>7.2f}x')
+
+if __name__ == '__main__':
+    main()
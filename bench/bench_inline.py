@@ -0,0 +1,41 @@
+# Throughput of the inline tokenizers on inline-heavy paragraphs.
+#
+#   python3 bench/bench_inline.py --paragraphs 2000
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from corpus import paragraph
+from transformers import INLINE_TOKENIZERS
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--paragraphs', type=int, default=2000)
+    parser.add_argument('--words', type=int, default=80)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = [paragraph(rng, args.words) for _ in range(args.paragraphs)]
+    size = sum(len(text.encode()) for text in texts)
+
+    expect = None
+    for name, tokenize in sorted(INLINE_TOKENIZERS.items(), reverse=True):
+        nodes = [tokenize(text) for text in texts]
+        expect = expect or nodes
+        assert nodes == expect, f'{name} output differs'
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for text in texts:
+                tokenize(text)
+            best = min(best, time.perf_counter() - start)
+        print(f'{name:<6} {size / best / 1e6:>7.2f} MB/s '
+              f'({size / 1e6:.2f} MB in {best:.3f}s)')
+
+if __name__ == '__main__':
+    main()
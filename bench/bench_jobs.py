@@ -0,0 +1,46 @@
+# Measures how page generation scales with the number of worker processes.
+#
+#   python3 bench/bench_jobs.py --pages 2000 --max-jobs 8
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from corpus import generate_site
+from main import collect_pages, generate_pages
+
+def run(root, jobs):
+    dst = os.path.join(root, 'public')
+    shutil.rmtree(dst, ignore_errors=True)
+    pages = collect_pages(os.path.join(root, 'content'), dst)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_pages(os.path.join(root, 'template.html'), pages, jobs)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=1000)
+    parser.add_argument('--max-jobs', type=int, default=os.cpu_count())
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        generate_site(root, args.pages)
+        baseline = None
+        print(f'{"jobs":>4} {"seconds":>8} {"pages/s":>8} {"speedup":>8}')
+        jobs = 1
+        while jobs <= args.max_jobs:
+            best = min(run(root, jobs) for _ in range(args.repeat))
+            baseline = baseline or best
+            print(f'{jobs:>4} {best:>8.3f} {args.pages / best:>8.0f} {baseline / best:>7.2f}x')
+            jobs *= 2
+
+if __name__ == '__main__':
+    main()
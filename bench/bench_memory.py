@@ -0,0 +1,79 @@
+# Reports the memory used by the node model: bytes per TextNode/LeafNode/
+# ParentNode and the peak traced memory while parsing a synthetic corpus.
+#
+#   python3 bench/bench_memory.py --pages 500
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from corpus import page
+from leafnode import LeafNode
+from parentnode import ParentNode
+from textnode import TextNode, TextType
+from transformers import markdown_to_htmlnode, text_to_textnodes
+
+def bytes_per_instance(factory, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # the list holding them costs one pointer per node
+    return (after - before) / count - 8, nodes
+
+def count_nodes(node):
+    total = 0
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        total += 1
+        if item.children:
+            stack.extend(item.children)
+    return total
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=500)
+    parser.add_argument('--count', type=int, default=200000)
+    args = parser.parse_args()
+
+    # text and child lists are shared, so only the instances are measured
+    text = 'shared text'
+    children = [LeafNode(None, text)]
+    factories = [
+        ('TextNode', lambda i: TextNode(text, TextType.BOLD)),
+        ('LeafNode', lambda i: LeafNode('b', text)),
+        ('ParentNode', lambda i: ParentNode('p', children)),
+    ]
+    for name, factory in factories:
+        size, _ = bytes_per_instance(factory, args.count)
+        print(f'{name:<12} {size:>6.1f} bytes/node')
+
+    rng = random.Random(0)
+    corpus = [page(rng, f'Page {i}') for i in range(args.pages)]
+    size = sum(len(markdown) for markdown in corpus)
+
+    tracemalloc.start()
+    trees = [markdown_to_htmlnode(markdown) for markdown in corpus]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    nodes = sum(count_nodes(tree) for tree in trees)
+    print(f'HTML trees   {nodes} nodes from {size / 1e6:.1f} MB markdown, '
+          f'{current / 1e6:.1f} MB retained, {peak / 1e6:.1f} MB peak, '
+          f'{current / nodes:.0f} bytes/node incl. strings')
+
+    tracemalloc.start()
+    textnodes = [text_to_textnodes(line) for markdown in corpus
+                 for line in markdown.split('\n') if line]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = sum(map(len, textnodes))
+    print(f'TextNodes    {count} nodes, {current / 1e6:.1f} MB retained, '
+          f'{peak / 1e6:.1f} MB peak, {current / count:.0f} bytes/node incl. strings')
+
+if __name__ == '__main__':
+    main()
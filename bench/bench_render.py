@@ -0,0 +1,74 @@
+# Compares the recursive ParentNode.to_html with the explicit-stack
+# renderer in src/render.py on wide and on deep trees.
+#
+#   python3 bench/bench_render.py
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from leafnode import LeafNode
+from parentnode import ParentNode
+from render import render_html
+
+def wide_tree(paragraphs, leaves):
+    return ParentNode('div', [
+        ParentNode('p', [LeafNode('b' if i % 2 else None, f'text {i}')
+                         for i in range(leaves)])
+        for _ in range(paragraphs)
+    ])
+
+def deep_tree(depth):
+    node = LeafNode(None, 'deep')
+    for _ in range(depth):
+        node = ParentNode('div', [node])
+    return node
+
+def measure(render, node, repeat):
+    profile = cProfile.Profile()
+    profile.runcall(render, node)
+    calls = pstats.Stats(profile).total_calls
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render(node)
+        best = min(best, time.perf_counter() - start)
+    return calls, best
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--depth', type=int, default=800,
+                        help='deep tree depth, must stay below the '
+                             'recursion limit for to_html')
+    args = parser.parse_args()
+
+    trees = [
+        ('wide 2000x50', wide_tree(2000, 50)),
+        ('deep %d' % args.depth, deep_tree(args.depth)),
+    ]
+    renderers = [
+        ('to_html', lambda node: node.to_html()),
+        ('render_html', render_html),
+    ]
+    print(f'{"tree":<14} {"renderer":<12} {"calls":>10} {"seconds":>9}')
+    for tree_name, node in trees:
+        expect = None
+        for name, render in renderers:
+            html = render(node)
+            expect = expect or html
+            assert html == expect, f'{name} output differs'
+            calls, seconds = measure(render, node, args.repeat)
+            print(f'{tree_name:<14} {name:<12} {calls:>10} {seconds:>9.4f}')
+
+    # beyond the recursion limit only the explicit stack works
+    node = deep_tree(sys.getrecursionlimit() * 100)
+    calls, seconds = measure(render_html, node, 1)
+    print(f'{"deep %d" % (sys.getrecursionlimit() * 100):<14} {"render_html":<12} {calls:>10} {seconds:>9.4f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# Measures save-to-rebuild latency of watch mode: the time from writing a
+# page until its output is regenerated, with inotify and with polling.
+#
+#   python3 bench/bench_watch.py --pages 10000 --depth 3
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from corpus import generate_site, page_dir
+from main import build, rebuild_changes
+from watch import Watcher
+
+def measure(root, pages, depth, saves, use_inotify, interval):
+    template = os.path.join(root, 'template.html')
+    static = os.path.join(root, 'static')
+    content = os.path.join(root, 'content')
+    dst = os.path.join(root, 'public')
+    watcher = Watcher([template, static, content], interval, use_inotify)
+    latencies = []
+    try:
+        for i in range(saves):
+            n = 1 + (i * 7919) % (pages - 1)
+            path = os.path.join(content, page_dir(n, depth), f'page{n}.md')
+            start = time.perf_counter()
+            with open(path, 'a') as f:
+                f.write(f'\nEdit {i}.\n')
+            changed, removed = watcher.wait(5)
+            with contextlib.redirect_stdout(io.StringIO()):
+                rebuild_changes(template, static, content, dst, changed, removed)
+            latencies.append(time.perf_counter() - start)
+            if changed != [path]:
+                raise Exception(f'expected {path} to change, got {changed}')
+    finally:
+        watcher.close()
+    return watcher.method, latencies
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=10000)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--saves', type=int, default=20)
+    parser.add_argument('--interval', type=float, default=0.1,
+                        help='polling interval in seconds')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        generate_site(root, args.pages, depth=args.depth)
+        with contextlib.redirect_stdout(io.StringIO()):
+            build(os.path.join(root, 'template.html'), os.path.join(root, 'static'),
+                  os.path.join(root, 'content'), os.path.join(root, 'public'))
+        print(f'{"method":<8} {"median ms":>10} {"max ms":>8}')
+        for use_inotify in (True, False):
+            method, latencies = measure(root, args.pages, args.depth, args.saves,
+                                        use_inotify, args.interval)
+            print(f'{method:<8} {statistics.median(latencies) * 1000:>10.1f} '
+                  f'{max(latencies) * 1000:>8.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# Synthetic sites for the benchmarks, laid out like the repository:
+# content/, static/ and template.html under one root.
+#
+#   python3 bench/corpus.py /tmp/site --pages 5000 --depth 3
+import argparse
+import os
+import random
+
+WORDS = ('elf', 'ring', 'shire', 'hobbit', 'wizard', 'mountain', 'river',
+         'forest', 'sword', 'king', 'road', 'fellowship', 'tower', 'eagle')
+
+# chance of each kind of block following a paragraph
+DEFAULT_MIX = {'list': 0.33, 'code': 0.25, 'quote': 0.1}
+
+def paragraph(rng, words=60, inline=0.15):
+    # inline is the share of words wrapped in inline markup
+    text = []
+    for i in range(words):
+        word = rng.choice(WORDS)
+        if rng.random() < inline:
+            markup = rng.choice(('**', '*', '`', 'link'))
+            if markup == 'link':
+                word = f'[{word}](/{word})'
+            else:
+                word = f'{markup}{word}{markup}'
+        text.append(word)
+    return ' '.join(text)
+
+def page(rng, title, paragraphs=8, words=60, inline=0.15, mix=None):
+    mix = DEFAULT_MIX if mix is None else mix
+    blocks = [f'# {title}']
+    for i in range(paragraphs):
+        blocks.append(paragraph(rng, words, inline))
+        if rng.random() < mix.get('list', 0):
+            if rng.random() < 0.5:
+                blocks.append('\n'.join(f'* {rng.choice(WORDS)}' for _ in range(5)))
+            else:
+                blocks.append('\n'.join(f'{n}. {rng.choice(WORDS)}' for n in range(1, 6)))
+        if rng.random() < mix.get('code', 0):
+            blocks.append('```\n' + '\n'.join(rng.choice(WORDS) for _ in range(6)) + '\n```')
+        if rng.random() < mix.get('quote', 0):
+            blocks.append('\n'.join(f'> {paragraph(rng, 12, inline)}' for _ in range(2)))
+    return '\n\n'.join(blocks) + '\n'
+
+def page_dir(i, depth, fanout=10):
+    # spreads pages over a tree of section directories depth levels deep
+    parts = []
+    for level in range(depth):
+        parts.append(f'section{i % fanout}')
+        i //= fanout
+    return os.path.join(*parts) if parts else ''
+
+def generate_site(root, pages=100, seed=0, paragraphs=8, words=60,
+                  inline=0.15, mix=None, depth=1, assets=4, asset_size=64 * 1024):
+    rng = random.Random(seed)
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    os.makedirs(os.path.join(root, 'static', 'images'), exist_ok=True)
+    with open(os.path.join(repo, 'template.html')) as f:
+        template = f.read()
+    with open(os.path.join(root, 'template.html'), 'w') as f:
+        f.write(template)
+    with open(os.path.join(root, 'static', 'index.css'), 'w') as f:
+        f.write('body { margin: 0 auto; max-width: 50em; }\n')
+    for i in range(assets):
+        with open(os.path.join(root, 'static', 'images', f'image{i}.png'), 'wb') as f:
+            f.write(rng.randbytes(asset_size))
+    for i in range(pages):
+        directory = os.path.join(root, 'content', page_dir(i, depth))
+        os.makedirs(directory, exist_ok=True)
+        name = 'index.md' if i == 0 else f'page{i}.md'
+        with open(os.path.join(directory, name), 'w') as f:
+            f.write(page(rng, f'Page {i}', paragraphs, words, inline, mix))
+
+def add_arguments(parser):
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--paragraphs', type=int, default=8,
+                        help='paragraphs per page')
+    parser.add_argument('--words', type=int, default=60,
+                        help='words per paragraph')
+    parser.add_argument('--inline', type=float, default=0.15,
+                        help='share of words with inline markup')
+    parser.add_argument('--lists', type=float, default=DEFAULT_MIX['list'],
+                        help='chance of a list after each paragraph')
+    parser.add_argument('--code', type=float, default=DEFAULT_MIX['code'],
+                        help='chance of a code block after each paragraph')
+    parser.add_argument('--quotes', type=float, default=DEFAULT_MIX['quote'],
+                        help='chance of a quote after each paragraph')
+    parser.add_argument('--depth', type=int, default=1,
+                        help='depth of the content directory tree')
+    parser.add_argument('--assets', type=int, default=4,
+                        help='number of static images')
+    parser.add_argument('--asset-size', type=int, default=64 * 1024)
+    parser.add_argument('--seed', type=int, default=0)
+
+def site_options(args):
+    return {
+        'pages': args.pages,
+        'seed': args.seed,
+        'paragraphs': args.paragraphs,
+        'words': args.words,
+        'inline': args.inline,
+        'mix': {'list': args.lists, 'code': args.code, 'quote': args.quotes},
+        'depth': args.depth,
+        'assets': args.assets,
+        'asset_size': args.asset_size
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic site.')
+    parser.add_argument('root')
+    add_arguments(parser)
+    args = parser.parse_args()
+    generate_site(args.root, **site_options(args))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+# Times every stage of the generator on a synthetic site and compares runs.
+#
+#   python3 bench/suite.py run --pages 2000 -o bench/results.json
+#   python3 bench/suite.py compare bench/baseline.json bench/results.json
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import corpus
+import main as ssg
+import transformers
+from helpers import block_to_block_type
+from transformers import markdown_to_blocks, markdown_to_htmlnode, text_to_textnodes
+
+def timed(func, repeat):
+    runs = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            runs.append(time.perf_counter() - start)
+    return runs
+
+def stages(root):
+    # yields (stage, items, func); items is what the throughput counts
+    content = os.path.join(root, 'content')
+    static = os.path.join(root, 'static')
+    template = os.path.join(root, 'template.html')
+    scratch = os.path.join(root, 'scratch')
+    sources = [src for src, _ in ssg.collect_pages(content, scratch)]
+    documents = []
+    for src in sources:
+        with open(src) as f:
+            documents.append(f.read())
+    blocks = [block for markdown in documents for block in markdown_to_blocks(markdown)]
+    inline = [block for block in blocks if block_to_block_type(block) == 'paragraph']
+    trees = [markdown_to_htmlnode(markdown) for markdown in documents]
+
+    yield 'markdown_to_blocks', len(documents), lambda: [
+        markdown_to_blocks(markdown) for markdown in documents]
+    yield 'block_to_block_type', len(blocks), lambda: [
+        block_to_block_type(block) for block in blocks]
+    yield 'text_to_textnodes', len(inline), lambda: [
+        text_to_textnodes(block) for block in inline]
+    yield 'to_html', len(trees), lambda: [tree.to_html() for tree in trees]
+
+    pages = ssg.collect_pages(content, scratch)
+    def generate_pages():
+        # a fresh memo every run, a warm one would skip the inline parsing
+        transformers.set_inline_memo_size(0)
+        ssg.generate_pages(template, pages)
+    yield 'generate_page', len(pages), generate_pages
+
+    static_files = len(ssg.list_files(static))
+    def copy_files():
+        shutil.rmtree(scratch, ignore_errors=True)
+        os.mkdir(scratch)
+        ssg.copy_files(static, scratch)
+    yield 'copy_files', static_files, copy_files
+
+    def build():
+        cwd = os.getcwd()
+        os.chdir(root)
+        try:
+            # without the document cache every run parses every page,
+            # the best of the runs would otherwise be all cache hits
+            ssg.main(['--clean', '--no-cache'])
+        finally:
+            os.chdir(cwd)
+    yield 'main', len(pages), build
+
+def run(args):
+    transformers.set_inline_tokenizer(args.tokenizer)
+    options = corpus.site_options(args)
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'corpus': options,
+            'tokenizer': args.tokenizer,
+            'repeat': args.repeat
+        },
+        'stages': {}
+    }
+    with tempfile.TemporaryDirectory() as root:
+        corpus.generate_site(root, **options)
+        for stage, items, func in stages(root):
+            if args.stage and stage not in args.stage:
+                continue
+            runs = timed(func, args.repeat)
+            best = min(runs)
+            results['stages'][stage] = {'seconds': best, 'items': items, 'runs': runs}
+            print(f'{stage:<20} {best:>9.4f}s {items / best:>12.0f} items/s')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)['stages']
+    with open(args.current) as f:
+        current = json.load(f)['stages']
+
+    regressions = []
+    print(f'{"stage":<20} {"baseline":>10} {"current":>10} {"change":>8}')
+    for stage in baseline:
+        if stage not in current:
+            continue
+        # compare per-item time in case the corpora differ in size
+        before = baseline[stage]['seconds'] / baseline[stage]['items']
+        after = current[stage]['seconds'] / current[stage]['items']
+        change = after / before - 1
+        flag = ''
+        if change > args.threshold:
+            flag = '  REGRESSION'
+            regressions.append(stage)
+        print(f'{stage:<20} {baseline[stage]["seconds"]:>9.4f}s '
+              f'{current[stage]["seconds"]:>9.4f}s {change:>+7.1%}{flag}')
+    if regressions:
+        print(f'{len(regressions)} stage(s) slower than the baseline by more '
+              f'than {args.threshold:.0%}: {", ".join(regressions)}')
+        return 1
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the generator stages.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='time every stage')
+    corpus.add_arguments(run_parser)
+    run_parser.add_argument('--tokenizer', choices=sorted(transformers.INLINE_TOKENIZERS),
+                            default=transformers.inline_tokenizer,
+                            help='inline tokenizer to benchmark')
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--stage', action='append',
+                            help='only run this stage (repeatable)')
+    run_parser.add_argument('-o', '--output', help='write the results as JSON')
+
+    compare_parser = commands.add_parser('compare',
+                                         help='flag regressions against a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='allowed slowdown per stage (default: 10%%)')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+if __name__ == '__main__':
+    main()
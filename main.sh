@@ -1,4 +1,4 @@
 #! /bin/sh
 
 python3 src/main.py
-python3 -m http.server -d public 8888
+python3 src/serve.py -d public -p 8888
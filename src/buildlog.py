@@ -0,0 +1,109 @@
+import json
+import sys
+import time
+
+# What a build reports. Every event is counted, whatever the level, so the
+# summary is right even when nothing else is shown. Lines are buffered and
+# written BUFFER_LINES at a time.
+QUIET = 0
+SUMMARY = 1
+VERBOSE = 2
+LEVELS = {'quiet': QUIET, 'summary': SUMMARY, 'verbose': VERBOSE, 'json': VERBOSE}
+
+BUFFER_LINES = 512
+
+def format_bytes(n):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if n < 1024 or unit == 'GiB':
+            return f'{n:.0f} {unit}' if unit == 'B' else f'{n:.1f} {unit}'
+        n /= 1024
+
+class BuildLog:
+    def __init__(self, mode='summary', out=None):
+        if mode not in LEVELS:
+            raise ValueError(f'invalid log mode {mode}')
+        self.mode = mode
+        self.level = LEVELS[mode]
+        # None writes to whatever sys.stdout is when the buffer is flushed
+        self.out = out
+        self.lines = []
+        self.counts = {}
+        self.bytes = 0
+        self.start = time.perf_counter()
+        # set in worker processes, events are sent back to the parent
+        # instead of written
+        self.collected = None
+
+    def event(self, kind, message, level=VERBOSE, **fields):
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        self.bytes += fields.get('bytes', 0)
+        if self.collected is not None:
+            self.collected.append((kind, message, level, fields))
+            return
+        if level > self.level:
+            return
+        if self.mode == 'json':
+            self.lines.append(json.dumps(dict(event=kind, message=message, **fields)))
+        else:
+            self.lines.append(message)
+        if len(self.lines) >= BUFFER_LINES:
+            self.flush()
+
+    def flush(self):
+        if not self.lines:
+            return
+        out = self.out or sys.stdout
+        out.write('\n'.join(self.lines) + '\n')
+        out.flush()
+        self.lines = []
+
+    def summary(self):
+        seconds = time.perf_counter() - self.start
+        pages = self.counts.get('page', 0)
+        assets = self.counts.get('copy', 0) + self.counts.get('sync', 0)
+        if self.mode == 'json':
+            message = json.dumps({'event': 'summary', 'pages': pages,
+                                  'assets': assets, 'bytes': self.bytes,
+                                  'seconds': round(seconds, 3)})
+        else:
+            message = (f'Built {pages} page(s) and {assets} asset(s), '
+                       f'{format_bytes(self.bytes)} in {seconds:.2f}s')
+        if self.level >= SUMMARY:
+            self.lines.append(message)
+        self.flush()
+
+    def __repr__(self):
+        return f'BuildLog({self.mode}, counts={self.counts}, bytes={self.bytes})'
+
+log = BuildLog()
+
+def configure(mode='summary', out=None):
+    global log
+    log = BuildLog(mode, out)
+
+def event(kind, message, level=VERBOSE, **fields):
+    log.event(kind, message, level, **fields)
+
+def info(message, **fields):
+    # things worth seeing in a normal build
+    log.event('info', message, SUMMARY, **fields)
+
+def flush():
+    log.flush()
+
+def summary():
+    log.summary()
+
+def collect():
+    log.collected = []
+
+def drain():
+    if log.collected is None:
+        return []
+    events, log.collected = log.collected, []
+    return events
+
+def record(events):
+    # replays events collected in another process
+    for kind, message, level, fields in events:
+        log.event(kind, message, level, **fields)
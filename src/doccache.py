@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+
+# Bump whenever a change to the parser or the renderer changes the HTML
+# produced for the same markdown, so old entries stop matching.
+PARSER_VERSION = 4
+
+CACHE_DIR = '.ssg/cache'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+class DocumentCache:
+    # Rendered page bodies and titles, one JSON file per document under
+    # directory, named after the hash of the markdown and PARSER_VERSION.
+    # Hits refresh the file's mtime, which prune() uses as the LRU order.
+    # Entries remember which entries of the asset tables (URL rewrites,
+    # image sizes) the body was rendered with and only match while those
+    # still hold. The words of the page for the search index are kept when
+    # they were collected.
+    def __init__(self, directory=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, markdown):
+        digest = hashlib.sha256(f'{PARSER_VERSION}\0'.encode())
+        digest.update(markdown.encode())
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def get(self, key, tables=None, words=False):
+        # tables are the current asset tables, {'urls': {...}, ...}. With
+        # words, returns (title, body, words) and entries without words
+        # are misses.
+        path = self.path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            title, body = entry['title'], entry['body']
+            used = entry.get('assets', {})
+            if (not isinstance(title, str) or not isinstance(body, str) or
+                not isinstance(used, dict)):
+                raise ValueError(f'invalid cache entry {path}')
+            page_words = entry.get('words')
+            if page_words is not None and not isinstance(page_words, list):
+                raise ValueError(f'invalid cache entry {path}')
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            # a corrupt entry is just a miss, it is rewritten after parsing
+            self._remove(path)
+            self.misses += 1
+            return None
+        tables = tables or {}
+        for name, values in used.items():
+            table = tables.get(name, {})
+            if any(table.get(k) != value for k, value in values.items()):
+                self.misses += 1
+                return None
+        if words and page_words is None:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        if words:
+            return title, body, page_words
+        return title, body
+
+    def put(self, key, title, body, assets=None, words=None):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write and rename, concurrent builds never see half an entry
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            entry = {'title': title, 'body': body, 'assets': assets or {}}
+            if words is not None:
+                entry['words'] = words
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    def prune(self):
+        # Removes the least recently used entries until the cache fits in
+        # max_bytes. Returns the number of removed entries.
+        entries = []
+        total = 0
+        if not os.path.isdir(self.directory):
+            return 0
+        with os.scandir(self.directory) as shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as files:
+                    for entry in files:
+                        st = entry.stat()
+                        entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                        total += st.st_size
+        removed = 0
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                self._remove(path)
+                removed += 1
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        return removed
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def __repr__(self):
+        return (f'DocumentCache({self.directory}, max_bytes={self.max_bytes}, '
+                f'hits={self.hits}, misses={self.misses})')
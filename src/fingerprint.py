@@ -0,0 +1,100 @@
+import contextlib
+import os
+import re
+
+from manifest import file_record
+from state import load_state, save_state
+
+ASSETS_PATH = '.ssg/assets.json'
+ASSETS_VERSION = 1
+HASH_LENGTH = 10
+
+# requested by name by browsers and crawlers, never renamed
+FIXED_NAMES = {'favicon.ico', 'robots.txt', 'humans.txt', 'apple-touch-icon.png'}
+
+FINGERPRINT_REGEX = re.compile(r'\.[0-9a-f]{%d}\.[^./]+$' % HASH_LENGTH)
+
+# URL of every static file -> URL of its fingerprinted copy, e.g.
+# '/index.css' -> '/index.0123456789.css'. Updated in place so modules that
+# imported it always see the current table.
+asset_urls = {}
+# URL of every static image -> [width, height]
+asset_sizes = {}
+
+# while recording, the entries of both tables that were looked up, None
+# for URLs that were not in them
+_used = None
+
+def set_asset_urls(urls):
+    asset_urls.clear()
+    asset_urls.update(urls)
+
+def set_asset_sizes(sizes):
+    asset_sizes.clear()
+    asset_sizes.update(sizes)
+
+def asset_tables():
+    return {'urls': asset_urls, 'sizes': asset_sizes}
+
+def asset_url(url):
+    new = asset_urls.get(url)
+    if _used is not None:
+        _used['urls'][url] = new
+    return url if new is None else new
+
+def asset_size(url):
+    size = asset_sizes.get(url)
+    if _used is not None:
+        _used['sizes'][url] = size
+    return size
+
+@contextlib.contextmanager
+def record_assets():
+    # Collects what a rendering depended on, so a cached copy can tell
+    # whether it is still current
+    global _used
+    previous, _used = _used, {'urls': {}, 'sizes': {}}
+    try:
+        yield _used
+    finally:
+        _used = previous
+
+def fingerprinted_name(rel, digest):
+    head, name = os.path.split(rel)
+    base, ext = os.path.splitext(name)
+    return os.path.join(head, f'{base}.{digest[:HASH_LENGTH]}{ext}')
+
+def url_for(rel):
+    return '/' + rel.replace(os.sep, '/')
+
+class Fingerprinter:
+    # The rename hook of sync_tree: every static file is written as
+    # name.<hash>.ext. Hashes are kept in the asset manifest with the stat
+    # they were computed for, so unchanged files are not hashed again.
+    def __init__(self, path=ASSETS_PATH):
+        self.path = path
+        self.old = self.load(path)
+        self.assets = {}
+
+    @staticmethod
+    def load(path):
+        data = load_state(path, ASSETS_VERSION)
+        return (data and data.get('assets')) or {}
+
+    def __call__(self, rel, src):
+        if os.path.basename(rel) in FIXED_NAMES:
+            return rel
+        record, _ = file_record(src, self.old.get(rel))
+        record = dict(record, output=fingerprinted_name(rel, record['hash']))
+        self.assets[rel] = record
+        return record['output']
+
+    def urls(self):
+        return {url_for(rel): url_for(record['output'])
+                for rel, record in self.assets.items()}
+
+    def save(self):
+        save_state(self.path, ASSETS_VERSION, {'assets': self.assets})
+
+    def __repr__(self):
+        return f'Fingerprinter({self.path}, assets={len(self.assets)})'
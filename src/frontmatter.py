@@ -0,0 +1,148 @@
+import datetime
+import io
+import os
+
+from helpers import extract_title_from_lines
+from state import load_state, save_state
+from walk import walk
+
+# An optional block of 'field: value' lines between two '---' lines at the
+# very top of a content file:
+#
+#   ---
+#   title: The Shire
+#   date: 2024-05-01
+#   tags: [places, hobbits]
+#   draft: true
+#   ---
+FENCE = '---'
+METADATA_PATH = '.ssg/metadata.json'
+METADATA_VERSION = 1
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+        return value[1:-1]
+    return value
+
+def parse_field(key, value, where):
+    value = value.strip()
+    if key == 'title':
+        return _unquote(value)
+    if key == 'date':
+        value = _unquote(value)
+        try:
+            if len(value) == 10:
+                datetime.date.fromisoformat(value)
+            else:
+                datetime.datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f'{where}: invalid date {value}')
+        return value
+    if key == 'tags':
+        if value.startswith('[') and value.endswith(']'):
+            value = value[1:-1]
+        return [_unquote(tag.strip()) for tag in value.split(',') if tag.strip()]
+    if key == 'draft':
+        if value.lower() in ('true', 'yes'):
+            return True
+        if value.lower() in ('false', 'no'):
+            return False
+        raise ValueError(f'{where}: invalid draft {value}, use true or false')
+    # a misspelled field would be silently ignored otherwise, e.g. a draft
+    # getting published
+    raise ValueError(f'{where}: unknown front matter field {key}')
+
+def read_front_matter(f, where='<markdown>'):
+    # Reads the front matter at the current position of f (anything with
+    # readline, tell and seek) and leaves f at the first line of the body.
+    # Without front matter, f is left where it was and {} is returned.
+    start = f.tell()
+    if f.readline().strip() != FENCE:
+        f.seek(start)
+        return {}
+    meta = {}
+    for number, line in enumerate(iter(f.readline, ''), 2):
+        line = line.strip()
+        if line == FENCE:
+            return meta
+        if not line:
+            continue
+        key, sep, value = line.partition(':')
+        if not sep:
+            raise ValueError(f'{where}:{number}: invalid front matter line {line}')
+        meta[key.strip()] = parse_field(key.strip(), value, f'{where}:{number}')
+    raise ValueError(f'{where}: front matter is not closed with {FENCE}')
+
+def split_front_matter(markdown, where='<markdown>'):
+    # Returns (meta, body)
+    f = io.StringIO(markdown)
+    meta = read_front_matter(f, where)
+    return meta, markdown[f.tell():]
+
+def read_header(path):
+    # The front matter of a file with its title, from the front matter or
+    # else the first heading. Reading stops there, the rest of the body is
+    # never read.
+    with open(path) as f:
+        meta = read_front_matter(f, path)
+        if 'title' not in meta:
+            try:
+                meta['title'] = extract_title_from_lines(f)
+            except Exception:
+                meta['title'] = None
+    return meta
+
+class Metadata:
+    # The headers of every content file. Each record keeps the stat it was
+    # read for, so an unchanged file costs a stat and a changed one a read
+    # of its header.
+    def __init__(self, path=METADATA_PATH):
+        self.path = path
+        self.old = self.load(path) if path else {}
+        self.pages = {}
+        self.reads = 0
+
+    @staticmethod
+    def load(path):
+        data = load_state(path, METADATA_VERSION)
+        return (data and data.get('pages')) or {}
+
+    def read(self, content_dir, rel):
+        path = os.path.join(content_dir, rel)
+        st = os.stat(path)
+        old = self.pages.get(rel) or self.old.get(rel)
+        if old and old['mtime'] == st.st_mtime_ns and old['size'] == st.st_size:
+            record = old
+        else:
+            record = {'mtime': st.st_mtime_ns, 'size': st.st_size,
+                      'meta': read_header(path)}
+            self.reads += 1
+        self.pages[rel] = record
+        return record['meta']
+
+    def scan(self, content_dir):
+        # Returns {relpath: meta} for every file under content_dir
+        for rel in walk(content_dir).files:
+            self.read(content_dir, rel)
+        return {rel: record['meta'] for rel, record in self.pages.items()}
+
+    def drafts(self):
+        return {rel for rel, record in self.pages.items()
+                if record['meta'].get('draft')}
+
+    def listing(self, drafts=False, tag=None):
+        # [(relpath, meta)], newest first, pages without a date last
+        pages = [(rel, record['meta']) for rel, record in self.pages.items()
+                 if (drafts or not record['meta'].get('draft')) and
+                    (tag is None or tag in record['meta'].get('tags', ()))]
+        pages.sort(key=lambda page: (page[1].get('title') or '', page[0]))
+        pages.sort(key=lambda page: page[1].get('date') or '', reverse=True)
+        return pages
+
+    def save(self):
+        if not self.path:
+            return
+        save_state(self.path, METADATA_VERSION, {'pages': self.pages})
+
+    def __repr__(self):
+        return f'Metadata({self.path}, pages={len(self.pages)}, reads={self.reads})'
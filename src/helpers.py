@@ -3,10 +3,16 @@ import re
 from leafnode import LeafNode
 from textnode import TextNode, TextType
 
+LINK_REGEX = re.compile(r'(?<!!)\[([^]]*?)\]\(([^)]*?)\)')
+IMAGE_REGEX = re.compile(r'!\[([^]]*?)\]\(([^)]*?)\)')
+HEADING_REGEX = re.compile(r'#{1,6} ')
+ORDERED_ITEM_REGEX = re.compile(r'(\d+)\.')
+TITLE_REGEX = re.compile(r'# ')
+
 def split_nodes_delimiter(nodes, delimiter, text_type):
     splitted = []
     for node in nodes:
-        if node.text_type != 'normal':
+        if node.text_type is not TextType.NORMAL:
             splitted.append(node)
             continue
         text = node.text
@@ -34,19 +40,17 @@ def split_nodes_delimiter(nodes, delimiter, text_type):
     return splitted
 
 def extract_markdown_links(text):
-    regex = r'(?<!!)\[([^]]*?)\]\(([^)]*?)\)'
-    links = re.findall(regex, text)
+    links = LINK_REGEX.findall(text)
     return links
 
 def extract_markdown_images(text):
-    regex = r'!\[([^]]*?)\]\(([^)]*?)\)'
-    images = re.findall(regex, text)
+    images = IMAGE_REGEX.findall(text)
     return images
 
 def split_nodes_image(nodes):
     splitted = []
     for node in nodes:
-        if node.text_type != 'normal':
+        if node.text_type is not TextType.NORMAL:
             splitted.append(node)
             continue
         regex = r'!\[[^]]*?\]\([^)]*?\)'
@@ -62,7 +66,7 @@ def split_nodes_image(nodes):
 def split_nodes_link(nodes):
     splitted = []
     for node in nodes:
-        if node.text_type != 'normal':
+        if node.text_type is not TextType.NORMAL:
             splitted.append(node)
             continue
         regex = r'(?<!!)\[[^]]*?\]\([^)]*?\)'
@@ -76,27 +80,38 @@ def split_nodes_link(nodes):
     return splitted
 
 def block_to_block_type(block):
+    # The first line already rules out all but one type: the list, quote
+    # and ordered list markers cannot start the same line. The rest of
+    # the lines are then scanned once, for that type only.
     lines = block.split('\n')
-    if len(lines) == 1 and re.match(r'#{1,6} ', lines[0]):
+    first = lines[0]
+    if len(lines) == 1 and HEADING_REGEX.match(first):
         return 'heading'
-    if (all(map(lambda L: L.startswith('- '), lines)) or
-        all(map(lambda L: L.startswith('* '), lines))):
+    if first.startswith('- ') or first.startswith('* '):
+        marker = first[:2]
+        for line in lines:
+            if not line.startswith(marker):
+                return 'paragraph'
         return 'unordered_list'
-    if all(map(lambda L: L.startswith('>'), lines)):
+    if first.startswith('>'):
+        for line in lines:
+            if not line.startswith('>'):
+                return 'paragraph'
         return 'quote'
-    if len(lines) >= 2 and (lines[0].startswith('```') and
-                            lines[-1] == '```'):
+    if len(lines) >= 2 and first.startswith('```') and lines[-1] == '```':
         return 'code'
-    numbers = list(map(lambda L: re.match(r'(\d+)\.', L), lines))
-    if all(numbers):
-        orders = list(map(lambda m: int(m.groups()[0]), numbers))
-        if orders == list(range(1, int(orders[-1])+1)):
-            return 'ordered_list'
-    return 'paragraph'
+    for number, line in enumerate(lines, 1):
+        match = ORDERED_ITEM_REGEX.match(line)
+        if match is None or int(match.group(1)) != number:
+            return 'paragraph'
+    return 'ordered_list'
 
 def extract_title(markdown):
-    lines = markdown.split('\n')
+    return extract_title_from_lines(markdown.split('\n'))
+
+def extract_title_from_lines(lines):
+    # lines may come straight from a file, stops at the first title
     for line in lines:
-        if re.match(r'#{1} ', line):
-            return line.lstrip('# ')
+        if TITLE_REGEX.match(line):
+            return line.rstrip('\n').lstrip('# ')
     raise Exception('No title found')
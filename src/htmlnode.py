@@ -1,4 +1,6 @@
 class HTMLNode:
+    __slots__ = ('tag', 'value', 'children', 'props')
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -6,8 +8,18 @@ class HTMLNode:
         self.props = props
 
     def to_html(self):
+        return ''.join(self.iter_html())
+
+    def iter_html(self):
         raise NotImplementedError
 
+    def write_html(self, out):
+        # out is anything with a write() method (a file, io.StringIO) or a
+        # list that collects the chunks
+        write = out.append if isinstance(out, list) else out.write
+        for chunk in self.iter_html():
+            write(chunk)
+
     def props_to_html(self):
         if self.props:
             return ' '.join(
@@ -0,0 +1,131 @@
+import os
+import struct
+
+from fingerprint import url_for
+from manifest import file_record
+from state import load_state, save_state
+
+IMAGES_PATH = '.ssg/images.json'
+IMAGES_VERSION = 1
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
+
+# JPEG start-of-frame markers, the ones that carry the image size
+SOF_MARKERS = {0xc0, 0xc1, 0xc2, 0xc3, 0xc5, 0xc6, 0xc7,
+               0xc9, 0xca, 0xcb, 0xcd, 0xce, 0xcf}
+
+def _png_size(head):
+    if head[12:16] != b'IHDR':
+        return None
+    return struct.unpack('>II', head[16:24])
+
+def _gif_size(head):
+    return struct.unpack('<HH', head[6:10])
+
+def _webp_size(head):
+    chunk = head[12:16]
+    if chunk == b'VP8 ' and head[23:26] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', head[26:30])
+        return width & 0x3fff, height & 0x3fff
+    if chunk == b'VP8L' and head[20] == 0x2f:
+        bits = int.from_bytes(head[21:25], 'little')
+        return (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1
+    if chunk == b'VP8X':
+        width = int.from_bytes(head[24:27], 'little') + 1
+        height = int.from_bytes(head[27:30], 'little') + 1
+        return width, height
+    return None
+
+def _jpeg_size(f):
+    # walks the segments after SOI until a start-of-frame
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b'\xff':
+            byte = f.read(1)
+        while byte == b'\xff':
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker == 0x01 or 0xd0 <= marker <= 0xd8:
+            continue
+        if marker == 0xd9 or marker == 0xda:
+            return None
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        length = struct.unpack('>H', length)[0]
+        if marker in SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack('>HH', frame[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+def read_image_size(path):
+    # Returns (width, height) from the header of a PNG, GIF, WebP or JPEG
+    # file, or None for anything else
+    with open(path, 'rb') as f:
+        head = f.read(32)
+        if len(head) < 30:
+            size = None
+        elif head[:8] == b'\x89PNG\r\n\x1a\n':
+            size = _png_size(head)
+        elif head[:6] in (b'GIF87a', b'GIF89a'):
+            size = _gif_size(head)
+        elif head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            size = _webp_size(head)
+        elif head[:2] == b'\xff\xd8':
+            size = _jpeg_size(f)
+        else:
+            size = None
+    if size is None or not size[0] or not size[1]:
+        return None
+    return size
+
+class ImageSizes:
+    # Sizes of the images under a static directory. Every image's record
+    # keeps the stat and hash it was read for: unchanged files are not
+    # opened again, and a file whose content matches a known hash reuses
+    # that size.
+    def __init__(self, path=IMAGES_PATH):
+        self.path = path
+        self.old = self.load(path) if path else {}
+        self.images = {}
+        self.reads = 0
+
+    @staticmethod
+    def load(path):
+        data = load_state(path, IMAGES_VERSION)
+        return (data and data.get('images')) or {}
+
+    def scan(self, static_dir):
+        # Returns {url: [width, height]} for every readable image
+        by_hash = {record['hash']: record['dimensions']
+                   for record in self.old.values()}
+        for root, dirs, names in os.walk(static_dir):
+            for name in names:
+                if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+                    continue
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, static_dir)
+                record, _ = file_record(path, self.old.get(rel))
+                if 'dimensions' not in record:
+                    dimensions = by_hash.get(record['hash'])
+                    if dimensions is None:
+                        size = read_image_size(path)
+                        self.reads += 1
+                        dimensions = list(size) if size else None
+                    record = dict(record, dimensions=dimensions)
+                self.images[rel] = record
+        return {url_for(rel): record['dimensions']
+                for rel, record in self.images.items() if record['dimensions']}
+
+    def save(self):
+        if not self.path:
+            return
+        save_state(self.path, IMAGES_VERSION, {'images': self.images})
+
+    def __repr__(self):
+        return f'ImageSizes({self.path}, images={len(self.images)}, reads={self.reads})'
@@ -0,0 +1,78 @@
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+# what an entry costs besides its text and HTML: the key, the tuple and
+# the OrderedDict node
+ENTRY_OVERHEAD = 200
+
+class InlineMemo:
+    # Inline text -> rendered HTML (and its words for the search index,
+    # when they were collected), shared by every page of a build. The
+    # least recently used entries are evicted above max_bytes (0 keeps
+    # nothing). Entries remember the link URLs they were rendered with and
+    # their rewrites, and only match while those still hold; looking them
+    # up again also records them for the document cache.
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, text, asset_url):
+        entry = self.entries.get(text)
+        if entry is None:
+            self.misses += 1
+            return None
+        html, urls, words, _ = entry
+        for url, new in urls:
+            if asset_url(url) != new:
+                self.misses += 1
+                return None
+        self.entries.move_to_end(text)
+        self.hits += 1
+        return html, words
+
+    def put(self, text, html, urls=(), words=None):
+        cost = len(text) + len(html) + ENTRY_OVERHEAD
+        if words is not None:
+            # the words are slices of the text
+            words = tuple(words)
+            cost += len(text)
+        if cost > self.max_bytes:
+            return
+        old = self.entries.pop(text, None)
+        if old is not None:
+            self.size -= old[3]
+        self.entries[text] = (html, tuple(urls), words, cost)
+        self.size += cost
+        while self.size > self.max_bytes:
+            _, (_, _, _, evicted) = self.entries.popitem(last=False)
+            self.size -= evicted
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def drain(self):
+        # counters since the last drain, worker processes send them to the
+        # parent with their results
+        counts = (self.hits, self.misses, self.evictions)
+        self.hits = self.misses = self.evictions = 0
+        return counts
+
+    def add(self, counts):
+        hits, misses, evictions = counts
+        self.hits += hits
+        self.misses += misses
+        self.evictions += evictions
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __repr__(self):
+        return (f'InlineMemo({len(self.entries)} entries, {self.size} bytes, '
+                f'hits={self.hits}, misses={self.misses})')
@@ -1,6 +1,8 @@
 from htmlnode import HTMLNode
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     # Source: https://developer.mozilla.org/en-US/docs/Glossary/Void_element
     void_elements = ('br', 'hr', 'img')
 
@@ -21,3 +23,6 @@ class LeafNode(HTMLNode):
         if not self.props:
             return f'<{self.tag}>{self.value}</{self.tag}>'
         return f'<{self.tag} {self.props_to_html()}>{self.value}</{self.tag}>'
+
+    def iter_html(self):
+        return (self.to_html(),)
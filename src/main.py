@@ -1,93 +1,841 @@
+import argparse
+import contextlib
+import cProfile
 import os
-import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
-from transformers import markdown_to_htmlnode
-from helpers import extract_title
+import buildlog
+import tracing
+import transformers
+from transformers import markdown_to_htmlnode, iter_markdown_html
+from helpers import extract_title, extract_title_from_lines
+from doccache import DocumentCache, CACHE_DIR
+from frontmatter import (METADATA_PATH, Metadata, read_front_matter,
+                         split_front_matter)
+from fingerprint import (ASSETS_PATH, Fingerprinter, asset_sizes, asset_tables,
+                         asset_urls, record_assets, set_asset_sizes,
+                         set_asset_urls)
+from imagesize import IMAGE_EXTENSIONS, IMAGES_PATH, ImageSizes
+from manifest import Manifest, file_record, hash_file
+from precompress import SUFFIXES, precompress_files, precompress_tree
+from render import render_html
+from pageindex import PAGES_PATH, PageIndex
+from search import SEARCH_DIR, STATE_PATH as SEARCH_PATH, SearchIndex
+from sitemap import (FEED_NAME, OUTPUT_REGEX, SITEMAP_NAME, write_feed,
+                     write_sitemap)
+from sync import copy_file, sync_file, sync_tree
+from template import load_template
+from tracing import span
+from walk import walk
+from watch import Watcher
+
+MANIFEST_PATH = '.ssg/manifest.json'
 
 def copy_files(src, dst):
-    print(f'Copying files from {src} to {dst}...')
-
-    for file in os.listdir(src):
-        entry = os.path.join(src, file)
-        print(f'<> Processing {entry}...')
-        if os.path.isdir(entry):
-            print(f'--> is a directory')
-
-            new_dst = os.path.join(dst, file)
-            print(f'--> creating {new_dst}...')
-            os.mkdir(new_dst)
-
-            new_src = os.path.join(src, file)
-            copy_files(new_src, new_dst)
-        if os.path.isfile(entry):
-            print(f'--> is a file')
-            print(f'--> copying {entry} to {dst}...')
-            shutil.copy(entry, dst)
-
-def generate_page(template_path, src, dst):
-    print(f'Generating page from {src} to {dst} using {template_path}...')
-
-    with open(src) as f:
-        markdown = f.read()
-
-    with open(template_path) as f:
-        template = f.read()
-
-    html = markdown_to_htmlnode(markdown).to_html()
-    title = extract_title(markdown)
-    page = template.replace('{{ Title }}', title).replace('{{ Content }}', html)
-
-    with open(dst, 'w') as f:
-        if page[-1] != '\n':
-            page += '\n'
-        f.write(page)
-
-    print('Done.')
-
-def generate_pages_recursive(template_path, content_dir, dst_dir):
-    for file in os.listdir(content_dir):
-        entry = os.path.join(content_dir, file)
-        if os.path.isdir(entry):
-            new_dst = os.path.join(dst_dir, file)
-            print(f'--> creating {new_dst}...')
-            os.mkdir(new_dst)
-
-            from_dir = os.path.join(content_dir, file)
-            generate_pages_recursive(template_path, from_dir, new_dst)
-        if os.path.isfile(entry):
-            new_html_name = file.replace('.md', '.html')
-            generate_page(template_path, entry, os.path.join(dst_dir, new_html_name))
+    buildlog.event('phase', f'Copying files from {src} to {dst}...')
+
+    tree = walk(src)
+    tree.make_dirs(dst)
+    for rel in tree.files:
+        entry = os.path.join(src, rel)
+        st = os.stat(entry)
+        copy_file(entry, os.path.join(dst, rel), st.st_size)
+        os.chmod(os.path.join(dst, rel), st.st_mode & 0o7777)
+        # the sync takes a copy with the source's mtime as current
+        os.utime(os.path.join(dst, rel), ns=(st.st_atime_ns, st.st_mtime_ns))
+        buildlog.event('copy', f'--> copied {entry} to {dst}', bytes=st.st_size)
+
+def generate_page(template_path, src, dst, stream_above=None, cache=None,
+                  words=False):
+    # Returns what the build learned about the page: {'title', 'mtime'}
+    # (of the source), 'date' from the front matter (or None), and with
+    # words its sorted words for the search index under 'words'
+    if stream_above is not None and os.path.getsize(src) > stream_above:
+        return generate_page_streaming(template_path, src, dst, words)
+
+    with span('page', src=src):
+        with span('read'):
+            with open(src) as f:
+                markdown = f.read()
+                mtime = os.fstat(f.fileno()).st_mtime_ns
+        with span('template'):
+            template = load_template(template_path)
+        if cache is None:
+            with _collect_words(words) as page_words, span('parse'):
+                meta, markdown = split_front_matter(markdown, src)
+                node = markdown_to_htmlnode(markdown)
+                title = meta.get('title') or extract_title(markdown)
+            size = write_page(template, dst, title=title, content=node)
+        else:
+            meta, title, html, page_words = parse_cached(cache, markdown,
+                                                         words, src)
+            size = write_page(template, dst, title=title, content=html)
+
+    buildlog.event('page', f'Generated {dst} from {src} using {template_path}',
+                   bytes=size)
+    return _page_info(title, mtime, meta, page_words)
+
+def _collect_words(enabled):
+    return transformers.collect_words() if enabled else contextlib.nullcontext()
+
+def _page_info(title, mtime, meta, words):
+    info = {'title': title, 'mtime': mtime, 'date': meta.get('date')}
+    if words is not None:
+        info['words'] = sorted(words)
+    return info
+
+def parse_cached(cache, markdown, words=False, where='<markdown>'):
+    # Returns (meta, title, html, words), words is None unless collected.
+    # The front matter is short, it is parsed again instead of cached.
+    meta, body = split_front_matter(markdown, where)
+    with span('cache'):
+        key = cache.key(markdown)
+        entry = cache.get(key, asset_tables(), words)
+    if entry is not None:
+        return (meta,) + (entry if words else entry + (None,))
+    with record_assets() as assets, _collect_words(words) as page_words:
+        with span('parse'):
+            node = markdown_to_htmlnode(body)
+            title = meta.get('title') or extract_title(body)
+        with span('render'):
+            html = render_html(node)
+    if page_words is not None:
+        page_words = sorted(page_words)
+    with span('cache'):
+        cache.put(key, title, html, assets, page_words)
+    return meta, title, html, page_words
+
+def generate_page_streaming(template_path, src, dst, words=False):
+    # Only one block of the markdown is in memory at a time: the title is
+    # looked up first, then every block is read, rendered and written
+    # before the next one is read
+    with span('page', src=src, streaming=True):
+        with span('template'):
+            template = load_template(template_path)
+        with open(src) as f:
+            with span('read'):
+                meta = read_front_matter(f, src)
+                body = f.tell()
+                title = meta.get('title') or extract_title_from_lines(f)
+                f.seek(body)
+                mtime = os.fstat(f.fileno()).st_mtime_ns
+            # reading and parsing happen block by block inside render
+            with _collect_words(words) as page_words:
+                size = write_page(template, dst, title=title,
+                                  content=iter_markdown_html(f))
+
+    buildlog.event('page', f'Streamed {dst} from {src} using {template_path}',
+                   bytes=size)
+    return _page_info(title, mtime, meta, page_words)
+
+def write_page(template, dst, **values):
+    # Returns the size of the page. The body is rendered while it is
+    # written, don't leave half a page behind if rendering fails.
+    try:
+        with open(dst, 'w') as f:
+            with span('render'):
+                template.write(f, **values)
+            with span('write'):
+                f.flush()
+            return f.buffer.tell()
+    except Exception:
+        os.remove(dst)
+        raise
+
+def generate_pages_recursive(template_path, content_dir, dst_dir, skip=(),
+                             **page_options):
+    # Returns {src: page info}, the relpaths in skip are not generated
+    tree = walk(content_dir)
+    tree.make_dirs(dst_dir)
+    infos = {}
+    for rel in tree.files:
+        if rel in skip:
+            continue
+        src = os.path.join(content_dir, rel)
+        infos[src] = generate_page(template_path, src,
+                                   os.path.join(dst_dir, page_output(rel)),
+                                   **page_options)
+    return infos
+
+def collect_pages(content_dir, dst_dir):
+    pages = []
+    for rel in walk(content_dir).files:
+        src = os.path.join(content_dir, rel)
+        pages.append((src, os.path.join(dst_dir, page_output(rel))))
+    return pages
+
+def split_drafts(pages, content_dir, content_options=None, partial=False):
+    # Returns (pages, drafts). Drafts are left out of the build unless
+    # content_options ({'drafts', 'metadata'}) asks for them. Only the
+    # headers are read, through the metadata cache at 'metadata', which
+    # is saved unless pages is part of the content.
+    options = content_options or {}
+    if options.get('drafts'):
+        return pages, []
+    metadata = Metadata(options.get('metadata'))
+    kept = []
+    drafts = []
+    with span('drafts'):
+        for src, dst in pages:
+            meta = metadata.read(content_dir, os.path.relpath(src, content_dir))
+            (drafts if meta.get('draft') else kept).append((src, dst))
+        if not partial:
+            metadata.save()
+    if drafts:
+        buildlog.event('drafts', f'Skipping {len(drafts)} draft page(s)',
+                       count=len(drafts))
+    return kept, drafts
+
+def _init_worker(inline_tokenizer, memo_size, trace, urls, sizes, log_mode):
+    # workers get the settings of the parent, whatever the start method of
+    # the pool
+    transformers.set_inline_tokenizer(inline_tokenizer)
+    transformers.set_inline_memo_size(memo_size)
+    set_asset_urls(urls)
+    set_asset_sizes(sizes)
+    buildlog.configure(log_mode)
+    buildlog.collect()
+    # a forked worker starts with a copy of the parent's spans
+    tracing.disable()
+    if trace:
+        tracing.enable()
+
+def _generate_batch(template_path, batch, page_options):
+    # Runs in a worker process. The log events of every page are collected
+    # so the parent can replay them in submission order, spans are sent
+    # back with the results.
+    results = []
+    for src, dst in batch:
+        info = error = None
+        try:
+            info = generate_page(template_path, src, dst, **page_options)
+        except Exception as e:
+            error = f'{src}: {e}'
+        results.append((src, info, buildlog.drain(), error))
+    return results, tracing.drain(), transformers.inline_memo.drain()
+
+def generate_pages(template_path, pages, jobs=1, batch_size=None,
+                   **page_options):
+    # Returns {src: page info}
+    for dst_dir in sorted({os.path.dirname(dst) for _, dst in pages}):
+        os.makedirs(dst_dir, exist_ok=True)
+
+    memo = transformers.inline_memo
+    memo.drain()
+    infos = {}
+    if jobs <= 1 or len(pages) <= 1:
+        for src, dst in pages:
+            infos[src] = generate_page(template_path, src, dst, **page_options)
+        _log_inline_memo(memo)
+        return infos
+
+    if batch_size is None:
+        # a few batches per worker keeps the pool balanced without paying
+        # a pickle round trip for every page
+        batch_size = max(1, min(64, len(pages) // (jobs * 4)))
+    batches = [pages[i:i+batch_size] for i in range(0, len(pages), batch_size)]
+
+    errors = []
+    initargs = (transformers.inline_tokenizer, memo.max_bytes,
+                tracing.is_enabled(), dict(asset_urls), dict(asset_sizes),
+                buildlog.log.mode)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=initargs) as pool:
+        for results, events, memo_counts in pool.map(
+                _generate_batch, repeat(template_path), batches,
+                repeat(page_options)):
+            tracing.record(events)
+            memo.add(memo_counts)
+            for src, info, log, error in results:
+                buildlog.record(log)
+                if error:
+                    errors.append(error)
+                else:
+                    infos[src] = info
+    _log_inline_memo(memo)
+    if errors:
+        raise Exception(f'{len(errors)} page(s) failed:\n' + '\n'.join(errors))
+    return infos
+
+def _log_inline_memo(memo):
+    # hits and misses of this call, worker processes included
+    if memo.hits or memo.misses:
+        buildlog.event('inline-memo',
+                       f'Inline memo: {memo.hits} hit(s), {memo.misses} '
+                       f'miss(es), {memo.hit_rate():.0%} hit rate, '
+                       f'{memo.evictions} evicted',
+                       hits=memo.hits, misses=memo.misses,
+                       evictions=memo.evictions)
 
 def delete_files_recursive(directory):
-    print(f'Deleting files in {directory}...')
-    for file in os.listdir(directory):
-        entry = os.path.join(directory, file)
-        print(f'Processing {entry}...')
-        if os.path.isdir(entry):
-            delete_files_recursive(entry)
-            print(f'Deleting {entry}...')
-            os.rmdir(entry)
+    buildlog.event('phase', f'Deleting files in {directory}...')
+    # links are removed, never followed
+    tree = walk(directory, follow_symlinks=False)
+    for rel in tree.files:
+        entry = os.path.join(directory, rel)
+        buildlog.event('delete', f'Deleting {entry}...')
+        os.remove(entry)
+    # deepest first, every directory is empty by the time it is removed
+    for rel in reversed(tree.dirs):
+        entry = os.path.join(directory, rel)
+        buildlog.event('delete', f'Deleting {entry}...')
+        os.rmdir(entry)
+
+def list_files(directory):
+    return walk(directory).files
+
+def page_output(rel):
+    head, file = os.path.split(rel)
+    return os.path.join(head, file.replace('.md', '.html'))
+
+def page_url(output):
+    # where a page is served, a directory index by its directory
+    url = '/' + output.replace(os.sep, '/')
+    if url.endswith('/index.html'):
+        url = url[:-len('index.html')]
+    return url
+
+def generated_outputs(dst_dir, search=None, site_options=None):
+    # The search index, sitemap and feed files already in dst_dir. They
+    # are written after the pages, the static sync must keep them.
+    outputs = set()
+    directory = os.path.join(dst_dir, SEARCH_DIR)
+    if search and os.path.isdir(directory):
+        outputs.update(os.path.join(SEARCH_DIR, rel)
+                       for rel in walk(directory).files)
+    if site_options and os.path.isdir(dst_dir):
+        outputs.update(name for name in os.listdir(dst_dir)
+                       if OUTPUT_REGEX.match(name))
+    return outputs
+
+def _page_index(site_options):
+    if not site_options:
+        return None
+    return PageIndex(site_options.get('pages_path', PAGES_PATH))
+
+def update_search(index, content_dir, dst_dir, infos, hashes=None):
+    # Adds the words of the generated pages to the index and writes the
+    # shards that changed. Returns the written paths.
+    for src, info in infos.items():
+        rel = os.path.relpath(src, content_dir)
+        index.update(rel, page_url(page_output(rel)), info['title'],
+                     info['words'], hashes and hashes.get(rel))
+    with span('search'):
+        written = index.write(dst_dir)
+    buildlog.event('search', f'Wrote {len(written)} search index file(s) '
+                   f'for {len(index.pages)} page(s)',
+                   bytes=sum(os.path.getsize(path) for path in written))
+    return written
+
+def update_site_files(index, site_options, content_dir, dst_dir, infos):
+    # Adds the generated pages to the page index, then writes the sitemap
+    # and the feed from it when anything changed. Returns the written
+    # paths.
+    for src, info in infos.items():
+        rel = os.path.relpath(src, content_dir)
+        index.update(rel, page_url(page_output(rel)), info['title'],
+                     info['mtime'], info.get('date'))
+    site_url = site_options['url']
+    site = [site_url, site_options.get('title')]
+    if (not index.changed and index.site == site and
+        all(os.path.isfile(os.path.join(dst_dir, name))
+            for name in (SITEMAP_NAME, FEED_NAME))):
+        return []
+    with span('sitemap'):
+        pages = index.by_url()
+        written = write_sitemap(dst_dir, site_url, pages)
+        home = next((page for page in pages if page['url'] == '/'), None)
+        title = site[1] or (home and home['title']) or site_url
+        written.append(write_feed(os.path.join(dst_dir, FEED_NAME), site_url,
+                                  title, pages))
+        index.site = site
+        index.save()
+    buildlog.event('sitemap', f'Wrote the sitemap and the feed for '
+                   f'{len(pages)} page(s)',
+                   bytes=sum(os.path.getsize(path) for path in written))
+    return written
+
+def precompress(dst_dir, paths=None, **options):
+    with span('precompress'):
+        if paths is None:
+            stats = precompress_tree(dst_dir, **options)
         else:
-            print(f'Deleting {entry}...')
-            os.remove(entry)
-    print('Done.')
+            stats = precompress_files(paths, **options)
+    buildlog.event('precompress',
+                   f'Precompressed {stats["written"]} file(s), '
+                   f'{stats["unchanged"]} unchanged, {stats["removed"]} removed',
+                   written=stats['written'])
+
+def _sibling_suffixes(precompress_options):
+    # the sync must not delete the compressed copies of kept outputs
+    return SUFFIXES if precompress_options is not None else ()
+
+def update_image_sizes(static_dir, image_cache=None):
+    # image_cache is where sizes are kept between builds, without one every
+    # image header is read again
+    with span('images'):
+        sizes = ImageSizes(image_cache)
+        set_asset_sizes(sizes.scan(static_dir))
+        sizes.save()
+
+def sync_static(static_dir, dst_dir, keep=(), sync_options=None,
+                precompress_options=None, fingerprint=None, image_cache=None):
+    # fingerprint is the path of the asset manifest, or None to keep the
+    # names of static files. Sets the asset tables pages are rendered with.
+    fingerprinter = Fingerprinter(fingerprint) if fingerprint else None
+    records, _ = sync_tree(static_dir, dst_dir, keep=keep,
+                           sibling_suffixes=_sibling_suffixes(precompress_options),
+                           rename=fingerprinter, **(sync_options or {}))
+    if fingerprinter:
+        fingerprinter.save()
+        set_asset_urls(fingerprinter.urls())
+    else:
+        set_asset_urls({})
+    update_image_sizes(static_dir, image_cache)
+    return records
 
-def main():
+def build(template_path, static_dir, content_dir, dst_dir, jobs=1,
+          sync_options=None, page_options=None, precompress_options=None,
+          fingerprint=None, image_cache=None, search=None,
+          site_options=None, content_options=None):
+    # search is where the state of the search index is kept, None builds
+    # no index. site_options ({'url', 'title', 'pages_path'}) turn on the
+    # sitemap and the feed. The outputs of drafts are not kept, so the
+    # sync deletes them.
+    search_index = SearchIndex(search) if search else None
+    page_index = _page_index(site_options)
+    with span('walk'):
+        pages = collect_pages(content_dir, dst_dir)
+    pages, _ = split_drafts(pages, content_dir, content_options)
+    outputs = {os.path.relpath(dst, dst_dir) for _, dst in pages}
+    outputs |= generated_outputs(dst_dir, search, site_options)
+    with span('static'):
+        sync_static(static_dir, dst_dir, outputs, sync_options,
+                    precompress_options, fingerprint, image_cache)
+    with span('pages', count=len(pages)):
+        infos = generate_pages(template_path, pages, jobs,
+                               words=bool(search_index), **(page_options or {}))
+    sources = {os.path.relpath(src, content_dir) for src, _ in pages}
+    if search_index:
+        search_index.keep_only(sources)
+        update_search(search_index, content_dir, dst_dir, infos)
+    if page_index:
+        page_index.keep_only(sources)
+        update_site_files(page_index, site_options, content_dir, dst_dir, infos)
+    if precompress_options is not None:
+        precompress(dst_dir, **precompress_options)
+    buildlog.flush()
+
+def build_incremental(template_path, static_dir, content_dir, dst_dir,
+                      manifest_path=MANIFEST_PATH, jobs=1,
+                      sync_options=None, page_options=None,
+                      precompress_options=None, fingerprint=None,
+                      image_cache=None, search=None, site_options=None,
+                      content_options=None):
+    search_index = SearchIndex(search) if search else None
+    page_index = _page_index(site_options)
+    with span('manifest'):
+        old = Manifest.load(manifest_path)
+        new = Manifest(hash_file(template_path))
+
+    with span('walk'):
+        pages = collect_pages(content_dir, dst_dir)
+    # drafts get no record, they are removed like deleted pages
+    pages, _ = split_drafts(pages, content_dir, content_options)
+    changed_pages = []
+    with span('walk'):
+        for src, dst in pages:
+            rel = os.path.relpath(src, content_dir)
+            record, changed = file_record(src, old.pages.get(rel))
+            record['output'] = page_output(rel)
+            new.pages[rel] = record
+            # changed while the indexes were not kept
+            if search_index and search_index.hash(rel) != record['hash']:
+                changed = True
+            if page_index and rel not in page_index.pages:
+                changed = True
+            changed_pages.append((src, dst, changed))
+
+    # outputs of removed pages are not kept, so the sync deletes them
+    outputs = {record['output'] for record in new.pages.values()}
+    outputs |= generated_outputs(dst_dir, search, site_options)
+    with span('static'):
+        sync_static(static_dir, dst_dir, outputs, sync_options,
+                    precompress_options, fingerprint, image_cache)
+    new.assets = {name: dict(table) for name, table in asset_tables().items()}
+
+    rebuild_all = old.template != new.template
+    if rebuild_all:
+        buildlog.info(f'{template_path} changed, regenerating every page...')
+    elif old.assets != new.assets:
+        rebuild_all = True
+        buildlog.info('asset URLs or image sizes changed, regenerating every page...')
+    stale = [(src, dst) for src, dst, changed in changed_pages
+             if rebuild_all or changed or not os.path.isfile(dst)]
+
+    with span('pages', count=len(stale)):
+        infos = generate_pages(template_path, stale, jobs,
+                               words=bool(search_index), **(page_options or {}))
+    if search_index:
+        search_index.keep_only(new.pages)
+        update_search(search_index, content_dir, dst_dir, infos,
+                      {rel: record['hash'] for rel, record in new.pages.items()})
+    if page_index:
+        page_index.keep_only(new.pages)
+        update_site_files(page_index, site_options, content_dir, dst_dir, infos)
+    if precompress_options is not None:
+        # unchanged outputs keep the mtime of their siblings, so checking
+        # the whole tree costs a stat per file
+        precompress(dst_dir, **precompress_options)
+
+    with span('manifest'):
+        new.save(manifest_path)
+    buildlog.flush()
+
+def clean_build(template_path, static_dir, content_dir, dst, jobs=1,
+                page_options=None, precompress_options=None, fingerprint=None,
+                image_cache=None, search=None, site_options=None,
+                content_options=None):
+    if os.path.isdir(dst):
+        buildlog.event('phase', f'{dst} exist, deleting...')
+        with span('delete'):
+            delete_files_recursive(dst)
+    if not os.path.isdir(dst):
+        buildlog.event('phase', f'{dst} not exist, creating...')
+        os.mkdir(dst)
+
+    with span('static'):
+        if fingerprint:
+            sync_static(static_dir, dst, fingerprint=fingerprint,
+                        image_cache=image_cache)
+        else:
+            copy_files(static_dir, dst)
+            set_asset_urls({})
+            update_image_sizes(static_dir, image_cache)
+    page_options = dict(page_options or {}, words=bool(search))
+    with span('walk'):
+        pages = collect_pages(content_dir, dst)
+    pages, drafts = split_drafts(pages, content_dir, content_options)
+    with span('pages'):
+        if jobs > 1:
+            infos = generate_pages(template_path, pages, jobs, **page_options)
+        else:
+            skip = {os.path.relpath(src, content_dir) for src, _ in drafts}
+            infos = generate_pages_recursive(template_path, content_dir, dst,
+                                             skip, **page_options)
+    sources = {os.path.relpath(src, content_dir) for src in infos}
+    if search:
+        # the index files went with the output, they are all written again
+        search_index = SearchIndex(search)
+        search_index.keep_only(sources)
+        update_search(search_index, content_dir, dst, infos)
+    if site_options:
+        page_index = _page_index(site_options)
+        page_index.keep_only(sources)
+        update_site_files(page_index, site_options, content_dir, dst, infos)
+    if precompress_options is not None:
+        precompress(dst, **precompress_options)
+    buildlog.flush()
+
+def _is_under(path, directory):
+    return os.path.commonpath([path, directory]) == os.path.normpath(directory)
+
+def _is_image(path):
+    return os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+
+def _remove_output(path, dst_dir):
+    if not os.path.lexists(path):
+        return
+    buildlog.event('delete', f'Deleting {path}...')
+    os.remove(path)
+    for suffix in SUFFIXES:
+        if os.path.lexists(path + suffix):
+            os.remove(path + suffix)
+    directory = os.path.dirname(path)
+    while directory != os.path.normpath(dst_dir) and not os.listdir(directory):
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
+
+def rebuild_changes(template_path, static_dir, content_dir, dst_dir, changed,
+                    removed, jobs=1, sync_options=None, page_options=None,
+                    precompress_options=None, fingerprint=None,
+                    image_cache=None, search=None, site_options=None,
+                    content_options=None):
+    # Brings dst_dir up to date after the given source files changed or
+    # were removed. Returns the number of outputs that were touched.
+    if any(_is_under(path, static_dir) and (fingerprint or _is_image(path))
+           for path in changed + removed):
+        # a changed asset gets a new name or size, which may appear in
+        # every page
+        buildlog.info('static files changed, rebuilding with new asset tables...')
+        build(template_path, static_dir, content_dir, dst_dir, jobs,
+              sync_options, page_options, precompress_options, fingerprint,
+              image_cache, search, site_options, content_options)
+        return len(changed) + len(removed)
+    if template_path in changed:
+        buildlog.info(f'{template_path} changed, regenerating every page...')
+        pages = collect_pages(content_dir, dst_dir)
+    else:
+        pages = []
+        for path in changed:
+            if _is_under(path, content_dir):
+                rel = os.path.relpath(path, content_dir)
+                pages.append((path, os.path.join(dst_dir, page_output(rel))))
+    # a page that became a draft goes like a removed one
+    pages, drafts = split_drafts(pages, content_dir, content_options,
+                                 partial=True)
+    removed = removed + [src for src, _ in drafts]
+
+    outputs = [dst for _, dst in pages]
+    for path in changed:
+        if _is_under(path, static_dir):
+            dst = os.path.join(dst_dir, os.path.relpath(path, static_dir))
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            sync_file(path, dst, **(sync_options or {}))
+            outputs.append(dst)
+    count = len(outputs)
+    search_index = SearchIndex(search) if search else None
+    page_index = _page_index(site_options)
+    for path in removed:
+        if _is_under(path, content_dir):
+            source = os.path.relpath(path, content_dir)
+            if search_index:
+                search_index.remove(source)
+            if page_index:
+                page_index.remove(source)
+            rel = page_output(source)
+        elif _is_under(path, static_dir):
+            rel = os.path.relpath(path, static_dir)
+        else:
+            continue
+        _remove_output(os.path.join(dst_dir, rel), dst_dir)
+        count += 1
+
+    infos = generate_pages(template_path, pages, jobs,
+                           words=bool(search_index), **(page_options or {}))
+    if search_index:
+        outputs.extend(update_search(search_index, content_dir, dst_dir, infos))
+    if page_index:
+        outputs.extend(update_site_files(page_index, site_options, content_dir,
+                                         dst_dir, infos))
+    if precompress_options is not None:
+        precompress(dst_dir, outputs, **precompress_options)
+    buildlog.flush()
+    return count
+
+def watch(template_path, static_dir, content_dir, dst_dir, interval=0.1,
+          jobs=1, sync_options=None, page_options=None,
+          precompress_options=None, fingerprint=None, image_cache=None,
+          search=None, site_options=None, content_options=None):
+    watcher = Watcher([template_path, static_dir, content_dir], interval)
+    buildlog.info(f'Watching {content_dir}, {static_dir} and {template_path} '
+                  f'({watcher.method}), press Ctrl-C to stop...')
+    buildlog.flush()
+    try:
+        while True:
+            changed, removed = watcher.wait()
+            start = time.perf_counter()
+            try:
+                count = rebuild_changes(template_path, static_dir, content_dir,
+                                        dst_dir, changed, removed, jobs,
+                                        sync_options, page_options,
+                                        precompress_options, fingerprint,
+                                        image_cache, search, site_options,
+                                        content_options)
+            except Exception as e:
+                # keep watching, the next save may fix it
+                buildlog.info(f'Rebuild failed: {e}')
+                buildlog.flush()
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            buildlog.info(f'Rebuilt {count} file(s) in {elapsed:.1f} ms',
+                          files=count, ms=round(elapsed, 1))
+            buildlog.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Build the static site.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only rebuild what changed since the last '
+                             'incremental build')
+    parser.add_argument('--clean', action='store_true',
+                        help='delete the output directory and copy every '
+                             'static file again')
+    parser.add_argument('--link-static', action='store_true',
+                        help='hardlink static files into the output '
+                             'directory instead of copying them')
+    parser.add_argument('--hash-static', action='store_true',
+                        help='compare static files by content when their '
+                             'mtime differs')
+    parser.add_argument('--inline', choices=sorted(transformers.INLINE_TOKENIZERS),
+                        default=transformers.inline_tokenizer,
+                        help='inline tokenizer: the staged splitters or the '
+                             'single-pass scanner (default: %(default)s)')
+    parser.add_argument('--stream-above', type=int, metavar='BYTES',
+                        help='render markdown files larger than BYTES one '
+                             'block at a time (0 streams every page)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'do not keep rendered page bodies in {CACHE_DIR}')
+    parser.add_argument('--cache-size', type=int, default=256, metavar='MB',
+                        help='evict the least recently used cache entries '
+                             'above this size (default: %(default)s)')
+    parser.add_argument('--inline-memo-size', type=int, default=16,
+                        metavar='MB',
+                        help='keep rendered inline text shared by pages up '
+                             'to this size (0 turns it off, default: '
+                             '%(default)s)')
+    parser.add_argument('--fingerprint', action='store_true',
+                        help='write static files as name.<hash>.ext and '
+                             'rewrite their URLs in pages')
+    parser.add_argument('--search', action='store_true',
+                        help=f'write a client-side search index to '
+                             f'{SEARCH_DIR}/ in the output directory')
+    parser.add_argument('--site-url', metavar='URL',
+                        help=f'where the site is published, e.g. '
+                             f'https://example.com; writes sitemap.xml and '
+                             f'an Atom feed ({FEED_NAME}) with absolute URLs')
+    parser.add_argument('--site-title', metavar='TITLE',
+                        help='title of the feed (default: the title of the '
+                             'home page)')
+    parser.add_argument('--drafts', action='store_true',
+                        help='also build pages marked draft: true in their '
+                             'front matter')
+    parser.add_argument('--list-pages', action='store_true',
+                        help='list the date, title, URL and tags of every '
+                             'page, newest first, without building')
+    parser.add_argument('--precompress', action='store_true',
+                        help='write .gz (and .zst where available) copies '
+                             'of text outputs next to them')
+    parser.add_argument('--precompress-min-size', type=int, default=1024,
+                        metavar='BYTES',
+                        help='do not precompress outputs smaller than BYTES '
+                             '(default: %(default)s)')
+    parser.add_argument('--watch', action='store_true',
+                        help='after building, rebuild what changes in '
+                             'content, static and the template until '
+                             'interrupted')
+    parser.add_argument('--poll-interval', type=float, default=0.1,
+                        metavar='SECONDS',
+                        help='how often to check for changes where inotify '
+                             'is not available (default: %(default)s)')
+    parser.add_argument('--log', choices=list(buildlog.LEVELS),
+                        default='summary',
+                        help='quiet, one summary line, every event, or '
+                             'every event as JSON lines (default: '
+                             '%(default)s)')
+    parser.add_argument('-j', '--jobs', type=int, default=1, metavar='N',
+                        help='generate pages with N worker processes')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='record build phases and write them to FILE in '
+                             'Chrome trace-event format')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='run the build under cProfile and write the '
+                             'pstats to FILE')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    buildlog.configure(args.log)
+    if args.trace:
+        tracing.enable()
+    try:
+        if args.profile:
+            profiler = cProfile.Profile()
+            profiler.runcall(run, args)
+            profiler.dump_stats(args.profile)
+        else:
+            run(args)
+    finally:
+        buildlog.flush()
+        if args.trace:
+            tracing.export(args.trace)
+            tracing.disable()
+
+def run(args):
+    with span('build'):
+        _run(args)
+
+def list_pages(content_dir, drafts=False, metadata=METADATA_PATH):
+    # Reads the headers only, through the metadata cache
+    index = Metadata(metadata)
+    index.scan(content_dir)
+    index.save()
+    for rel, meta in index.listing(drafts):
+        line = [meta.get('date') or '-', meta.get('title') or '(untitled)',
+                page_url(page_output(rel))]
+        if meta.get('tags'):
+            line.append('[' + ', '.join(meta['tags']) + ']')
+        if meta.get('draft'):
+            line.append('(draft)')
+        print('  '.join(line))
+
+def _run(args):
+    if args.list_pages:
+        list_pages('content', args.drafts)
+        return
+    transformers.set_inline_tokenizer(args.inline)
+    transformers.set_inline_memo_size(args.inline_memo_size * 1024 * 1024)
     src = 'static'
     dst = 'public'
 
     if not os.path.isdir(src):
         raise Exception(f'{src} does not exist in the current directory')
 
-    if os.path.isdir(dst):
-        print(f'{dst} exist, deleting...')
-        delete_files_recursive(dst)
-    if not os.path.isdir(dst):
-        print(f'{dst} not exist, creating...')
-        os.mkdir(dst)
+    sync_options = {'link': args.link_static, 'use_hash': args.hash_static}
+    page_options = {'stream_above': args.stream_above}
+    cache = None
+    if not args.no_cache:
+        cache = DocumentCache(CACHE_DIR, args.cache_size * 1024 * 1024)
+        page_options['cache'] = cache
+    fingerprint = ASSETS_PATH if args.fingerprint else None
+    search = SEARCH_PATH if args.search else None
+    site_options = None
+    if args.site_url:
+        site_options = {'url': args.site_url, 'title': args.site_title}
+    content_options = {'drafts': args.drafts, 'metadata': METADATA_PATH}
+    precompress_options = None
+    if args.precompress:
+        precompress_options = {'jobs': args.jobs,
+                               'min_size': args.precompress_min_size}
+
+    if args.incremental:
+        build_incremental('template.html', src, 'content', dst, jobs=args.jobs,
+                          sync_options=sync_options, page_options=page_options,
+                          precompress_options=precompress_options,
+                          fingerprint=fingerprint, image_cache=IMAGES_PATH,
+                          search=search, site_options=site_options,
+                          content_options=content_options)
+    elif not args.clean:
+        build('template.html', src, 'content', dst, jobs=args.jobs,
+              sync_options=sync_options, page_options=page_options,
+              precompress_options=precompress_options, fingerprint=fingerprint,
+              image_cache=IMAGES_PATH, search=search,
+              site_options=site_options, content_options=content_options)
+    else:
+        clean_build('template.html', src, 'content', dst, jobs=args.jobs,
+                    page_options=page_options,
+                    precompress_options=precompress_options,
+                    fingerprint=fingerprint, image_cache=IMAGES_PATH,
+                    search=search, site_options=site_options,
+                    content_options=content_options)
+
+    if cache is not None:
+        with span('cache'):
+            cache.prune()
+    buildlog.summary()
 
-    copy_files(src, dst)
-    generate_pages_recursive('template.html', 'content', 'public')
+    if args.watch:
+        watch('template.html', src, 'content', dst, args.poll_interval,
+              jobs=args.jobs, sync_options=sync_options,
+              page_options=page_options,
+              precompress_options=precompress_options, fingerprint=fingerprint,
+              image_cache=IMAGES_PATH, search=search,
+              site_options=site_options, content_options=content_options)
 
 if __name__ == '__main__':
     main()
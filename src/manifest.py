@@ -0,0 +1,56 @@
+import hashlib
+import os
+
+from state import load_state, save_state
+
+MANIFEST_VERSION = 2
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def file_record(path, old=None):
+    # Returns (record, changed). The file is only hashed when its stat
+    # differs from the old record, so an untouched tree costs one stat
+    # per file.
+    st = os.stat(path)
+    if old and old['mtime'] == st.st_mtime_ns and old['size'] == st.st_size:
+        return old, False
+    record = {
+        'mtime': st.st_mtime_ns,
+        'size': st.st_size,
+        'hash': hash_file(path)
+    }
+    changed = old is None or old['hash'] != record['hash']
+    return record, changed
+
+class Manifest:
+    # Static files are not recorded, the sync compares them with their
+    # copies in the output directory
+    def __init__(self, template=None, pages=None, assets=None):
+        self.template = template
+        self.pages = pages if pages is not None else {}
+        # the asset tables (URL rewrites, image sizes) the pages were
+        # rendered with
+        self.assets = assets if assets is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        # A missing or unreadable manifest just means a full rebuild
+        data = load_state(path, MANIFEST_VERSION)
+        if data is None:
+            return cls()
+        return cls(data.get('template'), data.get('pages'), data.get('assets'))
+
+    def save(self, path):
+        save_state(path, MANIFEST_VERSION, {
+            'template': self.template,
+            'pages': self.pages,
+            'assets': self.assets
+        })
+
+    def __repr__(self):
+        return f'Manifest(template={self.template}, pages={len(self.pages)})'
@@ -0,0 +1,49 @@
+from state import load_state, save_state
+
+PAGES_PATH = '.ssg/pages.json'
+PAGES_VERSION = 1
+
+class PageIndex:
+    # What the build knows about every page, collected while the pages are
+    # generated and kept between builds, so the sitemap and the feed are
+    # written without reading the outputs again:
+    # {source relpath: {'url', 'title', 'mtime', 'date'}}, mtime in
+    # nanoseconds, date from the front matter or None.
+    # site is what the files were last written for, e.g. the site URL.
+    def __init__(self, path=PAGES_PATH):
+        self.path = path
+        self.pages = {}
+        self.site = None
+        self.load()
+        self.changed = False
+
+    def load(self):
+        data = load_state(self.path, PAGES_VERSION)
+        if data:
+            self.pages = data.get('pages', {})
+            self.site = data.get('site')
+
+    def save(self):
+        save_state(self.path, PAGES_VERSION, {'site': self.site,
+                                              'pages': self.pages})
+        self.changed = False
+
+    def update(self, rel, url, title, mtime, date=None):
+        page = {'url': url, 'title': title, 'mtime': mtime, 'date': date}
+        if self.pages.get(rel) != page:
+            self.pages[rel] = page
+            self.changed = True
+
+    def remove(self, rel):
+        if self.pages.pop(rel, None) is not None:
+            self.changed = True
+
+    def keep_only(self, rels):
+        for rel in [rel for rel in self.pages if rel not in rels]:
+            self.remove(rel)
+
+    def by_url(self):
+        return sorted(self.pages.values(), key=lambda page: page['url'])
+
+    def __repr__(self):
+        return f'PageIndex({self.path}, pages={len(self.pages)})'
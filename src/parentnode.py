@@ -1,15 +1,20 @@
 from htmlnode import HTMLNode
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag=tag, children=children, props=props)
 
-    def to_html(self):
+    def iter_html(self):
         if not self.tag:
             raise ValueError('ParentNode must have a tag')
         if not self.children:
             raise ValueError('ParentNode must have children')
-        html = ''
+        return self._iter_html()
+
+    def _iter_html(self):
+        yield f'<{self.tag}>'
         for child in self.children:
-            html += child.to_html()
-        return f'<{self.tag}>{html}</{self.tag}>'
+            yield from child.iter_html()
+        yield f'</{self.tag}>'
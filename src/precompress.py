@@ -0,0 +1,123 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+# outputs worth compressing, images and fonts already are
+COMPRESSIBLE = {'.html', '.css', '.js', '.mjs', '.json', '.svg', '.xml',
+                '.txt', '.map'}
+
+# below this the container overhead eats most of the gain
+MIN_SIZE = 1024
+# a sibling is only kept when it saves at least this share of the bytes
+MIN_SAVING = 0.1
+
+def _gzip(data):
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+ENCODINGS = {'.gz': (_gzip, gzip.decompress)}
+if zstd is not None:
+    ENCODINGS['.zst'] = (lambda data: zstd.compress(data, level=19),
+                         zstd.decompress)
+
+# every suffix a sibling may have, including encodings this Python lacks
+SUFFIXES = ('.gz', '.zst')
+
+def is_compressible(path):
+    return os.path.splitext(path)[1] in COMPRESSIBLE
+
+def _same_content(sibling, decompress, data):
+    try:
+        with open(sibling, 'rb') as f:
+            return decompress(f.read()) == data
+    except Exception:
+        return False
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+def precompress_file(path, min_size=MIN_SIZE):
+    # Brings the compressed siblings of path up to date. Every sibling is
+    # stamped with path's mtime, so it is current when the mtimes are equal
+    # or when it still decompresses to the same bytes. A newer sibling
+    # proves nothing, path may have been replaced by an older file. path is
+    # only read when a sibling is missing or has another mtime.
+    stats = {'written': 0, 'unchanged': 0, 'removed': 0}
+    st = os.stat(path)
+    data = None
+    for suffix, (compress, decompress) in ENCODINGS.items():
+        sibling = path + suffix
+        try:
+            sibling_mtime = os.stat(sibling).st_mtime_ns
+        except FileNotFoundError:
+            sibling_mtime = None
+        if st.st_size < min_size:
+            if _remove(sibling):
+                stats['removed'] += 1
+            continue
+        if sibling_mtime == st.st_mtime_ns:
+            stats['unchanged'] += 1
+            continue
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        if sibling_mtime is not None and _same_content(sibling, decompress, data):
+            os.utime(sibling, ns=(st.st_atime_ns, st.st_mtime_ns))
+            stats['unchanged'] += 1
+            continue
+        compressed = compress(data)
+        if len(compressed) > len(data) * (1 - MIN_SAVING):
+            if _remove(sibling):
+                stats['removed'] += 1
+            continue
+        tmp = f'{sibling}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(compressed)
+        os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp, sibling)
+        stats['written'] += 1
+    return stats
+
+def precompress_files(paths, jobs=1, min_size=MIN_SIZE):
+    # zlib and zstd release the GIL while they work, so threads are enough
+    # to compress on every core
+    paths = [path for path in paths if is_compressible(path)]
+    totals = {'written': 0, 'unchanged': 0, 'removed': 0}
+    if jobs > 1 and len(paths) > 1:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(precompress_file, paths,
+                                    [min_size] * len(paths)))
+    else:
+        results = [precompress_file(path, min_size) for path in paths]
+    for stats in results:
+        for key, value in stats.items():
+            totals[key] += value
+    return totals
+
+def precompress_tree(directory, jobs=1, min_size=MIN_SIZE):
+    # Precompresses every output under directory and removes siblings
+    # whose output is gone
+    paths = []
+    orphans = 0
+    for root, dirs, names in os.walk(directory):
+        dirs.sort()
+        present = set(names)
+        for name in sorted(names):
+            base, suffix = os.path.splitext(name)
+            if suffix in SUFFIXES and is_compressible(base):
+                if base not in present and _remove(os.path.join(root, name)):
+                    orphans += 1
+            elif is_compressible(name):
+                paths.append(os.path.join(root, name))
+    stats = precompress_files(paths, jobs, min_size)
+    stats['removed'] += orphans
+    return stats
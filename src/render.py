@@ -0,0 +1,37 @@
+from leafnode import LeafNode
+from parentnode import ParentNode
+
+def iter_html(node):
+    # Same chunks as node.iter_html(), but the tree is walked with an
+    # explicit stack, so the depth of the document costs neither Python
+    # frames nor the recursion limit. Close tags are pushed as strings
+    # below the children they close.
+    stack = [node]
+    pop = stack.pop
+    push = stack.append
+    extend = stack.extend
+    while stack:
+        item = pop()
+        cls = type(item)
+        if cls is str:
+            yield item
+        elif cls is LeafNode:
+            yield item.to_html()
+        elif isinstance(item, ParentNode):
+            if not item.tag:
+                raise ValueError('ParentNode must have a tag')
+            if not item.children:
+                raise ValueError('ParentNode must have children')
+            yield f'<{item.tag}>'
+            push(f'</{item.tag}>')
+            extend(reversed(item.children))
+        else:
+            yield from item.iter_html()
+
+def write_html(node, out):
+    write = out.append if isinstance(out, list) else out.write
+    for chunk in iter_html(node):
+        write(chunk)
+
+def render_html(node):
+    return ''.join(iter_html(node))
@@ -0,0 +1,183 @@
+import heapq
+import itertools
+import os
+import re
+
+import state
+
+# The client-side search index. Every page's words go into an inverted
+# index split into one small JSON file per word prefix, so a browser only
+# downloads the shard of the query's prefix:
+#
+#   search/index.json      {"prefix": 2, "pages": [[url, title], ...]}
+#   search/<prefix>.json   {word: [page id, delta, delta, ...]}
+#
+# A page's id is its position in "pages" (null entries are free ids).
+# Postings are sorted page ids, each stored as the difference to the one
+# before it. The words of every page are kept in STATE_PATH, so a build
+# only rewrites the shards whose postings changed.
+SEARCH_DIR = 'search'
+STATE_PATH = '.ssg/search.json'
+STATE_VERSION = 1
+PREFIX_LENGTH = 2
+WORD_REGEX = re.compile(r'\w{2,}')
+
+def text_words(text):
+    return WORD_REGEX.findall(text.lower())
+
+def shard_of(word):
+    return word[:PREFIX_LENGTH]
+
+def encode_postings(ids):
+    previous = 0
+    deltas = []
+    for i in ids:
+        deltas.append(i - previous)
+        previous = i
+    return deltas
+
+def decode_postings(deltas):
+    return list(itertools.accumulate(deltas))
+
+class SearchIndex:
+    def __init__(self, path=STATE_PATH):
+        self.path = path
+        # {source relpath: {'id', 'url', 'title', 'hash', 'words'}}
+        self.pages = {}
+        # the state has to match what is in the output directory, both
+        # carry a generation that is bumped on every write
+        self.generation = 0
+        self.load()
+        self.ids = {page['id'] for page in self.pages.values()}
+        # ids below next_id that are free, as a heap, lowest first
+        self.next_id = max(self.ids) + 1 if self.ids else 0
+        self.free = sorted(set(range(self.next_id)) - self.ids)
+        # {shard: [(word, id, added), ...]} since the last write
+        self.changes = {}
+        self.pages_changed = False
+
+    def load(self):
+        data = state.load_state(self.path, STATE_VERSION) if self.path else None
+        if data is None:
+            return
+        self.pages = data.get('pages', {})
+        self.generation = data.get('generation', 0)
+
+    def save(self):
+        state.save_state(self.path, STATE_VERSION,
+                         {'generation': self.generation, 'pages': self.pages})
+
+    def _new_id(self):
+        # the lowest free id, removed pages leave holes in the table
+        if self.free:
+            i = heapq.heappop(self.free)
+        else:
+            i = self.next_id
+            self.next_id += 1
+        self.ids.add(i)
+        return i
+
+    def _change(self, words, i, added):
+        for word in words:
+            self.changes.setdefault(shard_of(word), []).append((word, i, added))
+
+    def hash(self, rel):
+        page = self.pages.get(rel)
+        return page and page['hash']
+
+    def update(self, rel, url, title, words, hash=None):
+        words = sorted(set(words))
+        old = self.pages.get(rel)
+        if old is None:
+            i = self._new_id()
+            old_words = set()
+            self.pages_changed = True
+        else:
+            i = old['id']
+            old_words = set(old['words'])
+            if old['url'] != url or old['title'] != title:
+                self.pages_changed = True
+        self._change(old_words.difference(words), i, False)
+        self._change([word for word in words if word not in old_words], i, True)
+        self.pages[rel] = {'id': i, 'url': url, 'title': title, 'hash': hash,
+                           'words': words}
+
+    def remove(self, rel):
+        page = self.pages.pop(rel, None)
+        if page is None:
+            return
+        self._change(page['words'], page['id'], False)
+        self.ids.discard(page['id'])
+        heapq.heappush(self.free, page['id'])
+        self.pages_changed = True
+
+    def keep_only(self, rels):
+        for rel in [rel for rel in self.pages if rel not in rels]:
+            self.remove(rel)
+
+    def table(self):
+        pages = [None] * (max(self.ids) + 1 if self.ids else 0)
+        for page in self.pages.values():
+            pages[page['id']] = [page['url'], page['title']]
+        return pages
+
+    def write(self, dst_dir):
+        # Returns the paths that were written. Only the shards with changed
+        # postings are read, updated and written again, unless the output
+        # doesn't match the state, then every shard is.
+        directory = os.path.join(dst_dir, SEARCH_DIR)
+        os.makedirs(directory, exist_ok=True)
+        index_path = os.path.join(directory, 'index.json')
+        current = state.read_json(index_path)
+        full = (not isinstance(current, dict) or
+                current.get('generation') != self.generation or
+                current.get('prefix') != PREFIX_LENGTH)
+        if not full and not self.changes and not self.pages_changed:
+            return []
+
+        written = []
+        if full:
+            shards = {}
+            for page in self.pages.values():
+                for word in page['words']:
+                    postings = shards.setdefault(shard_of(word), {})
+                    postings.setdefault(word, []).append(page['id'])
+            for name in os.listdir(directory):
+                if name != 'index.json' and name[:-5] not in shards:
+                    os.remove(os.path.join(directory, name))
+        else:
+            shards = {}
+            for shard, changes in self.changes.items():
+                data = state.read_json(os.path.join(directory, shard + '.json')) or {}
+                postings = {word: set(decode_postings(deltas))
+                            for word, deltas in data.items()}
+                for word, i, added in changes:
+                    if added:
+                        postings.setdefault(word, set()).add(i)
+                    else:
+                        postings.get(word, set()).discard(i)
+                shards[shard] = postings
+
+        for shard, postings in sorted(shards.items()):
+            path = os.path.join(directory, shard + '.json')
+            data = {word: encode_postings(sorted(ids))
+                    for word, ids in postings.items() if ids}
+            if data:
+                state.write_json(path, data)
+                written.append(path)
+            elif os.path.exists(path):
+                os.remove(path)
+
+        self.generation += 1
+        state.write_json(index_path, {'generation': self.generation,
+                                 'prefix': PREFIX_LENGTH,
+                                 'pages': self.table()})
+        written.append(index_path)
+        self.changes = {}
+        self.pages_changed = False
+        if self.path:
+            self.save()
+        return written
+
+    def __repr__(self):
+        return f'SearchIndex({self.path}, pages={len(self.pages)})'
@@ -0,0 +1,377 @@
+import argparse
+import email.utils
+import json
+import os
+import select
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+
+from fingerprint import FINGERPRINT_REGEX
+
+STATS_PATH = '/_stats'
+
+# fingerprinted files never change under their name
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS = (1, 5, 10, 50, 100, 500, 1000, float('inf'))
+
+class Stats:
+    # Request counters shared by the worker threads
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes = 0
+        self.statuses = {}
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def record(self, status, sent, elapsed_ms):
+        with self.lock:
+            self.requests += 1
+            self.bytes += sent
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if elapsed_ms <= bound:
+                    self.buckets[i] += 1
+                    break
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'bytes': self.bytes,
+                'statuses': {str(k): v for k, v in sorted(self.statuses.items())},
+                'latency_ms': {
+                    'mean': self.total_ms / self.requests if self.requests else 0.0,
+                    'max': self.max_ms,
+                    'buckets': {('+Inf' if bound == float('inf') else str(bound)): count
+                                for bound, count in zip(LATENCY_BUCKETS, self.buckets)}
+                }
+            }
+
+def parse_range(header, size):
+    # Returns (start, end) inclusive for a single 'bytes=' range, None when
+    # the header should be ignored and the whole file sent, or False when
+    # the range can't be satisfied
+    unit, _, spec = header.partition('=')
+    if unit.strip() != 'bytes' or ',' in spec:
+        return None
+    first, sep, last = spec.strip().partition('-')
+    if not sep:
+        return None
+    try:
+        if first == '':
+            length = int(last)
+            if length <= 0:
+                return False
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return False
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+def accepts_gzip(header):
+    for coding in header.split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() not in ('gzip', '*'):
+            continue
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+class StaticHandler(SimpleHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # how long a request may take to arrive once it has started
+    timeout = 15
+    # how long an idle keep-alive connection keeps its worker, and how
+    # often it checks whether other connections are waiting for one
+    idle_timeout = 5
+    idle_poll = 0.05
+
+    def handle(self):
+        # Every connection holds a worker while it is open, so an idle one
+        # gives it up as soon as other connections wait in the pool's queue
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and self.wait_for_request():
+            self.handle_one_request()
+
+    def wait_for_request(self):
+        # a pipelined request may already be buffered
+        self.connection.setblocking(False)
+        try:
+            if self.rfile.peek(1):
+                return True
+        finally:
+            self.connection.settimeout(self.timeout)
+        deadline = time.monotonic() + self.idle_timeout
+        while not self.server.saturated():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            readable, _, _ = select.select([self.connection], [], [],
+                                           min(remaining, self.idle_poll))
+            if readable:
+                return True
+        return False
+
+    def end_headers(self):
+        # a busy server tells the client the connection goes after this
+        # response
+        if not self.close_connection and self.server.saturated():
+            self.send_header('Connection', 'close')
+        super().end_headers()
+
+    def do_GET(self):
+        self.serve(head=False)
+
+    def do_HEAD(self):
+        self.serve(head=True)
+
+    def serve(self, head):
+        start = time.perf_counter()
+        self.sent = 0
+        self.status = None
+        try:
+            if self.path.split('?', 1)[0] == STATS_PATH:
+                self.send_bytes(json.dumps(self.server.stats.snapshot()).encode(),
+                                'application/json', head)
+            else:
+                self.send_file(head)
+        finally:
+            if self.status is not None:
+                elapsed = (time.perf_counter() - start) * 1000
+                self.server.stats.record(self.status, self.sent, elapsed)
+
+    def send_response(self, code, message=None):
+        self.status = int(code)
+        super().send_response(code, message)
+
+    def send_bytes(self, body, content_type, head):
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+            self.sent = len(body)
+
+    def resolve(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split('?', 1)[0].endswith('/'):
+                return path, 'redirect'
+            path = os.path.join(path, 'index.html')
+        return path, None
+
+    def send_file(self, head):
+        path, action = self.resolve()
+        if action == 'redirect':
+            parts = self.path.split('?', 1)
+            parts[0] += '/'
+            self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+            self.send_header('Location', '?'.join(parts))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        content_type = self.guess_type(path)
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, 'File not found')
+            return
+        encoding = None
+        if accepts_gzip(self.headers.get('Accept-Encoding', '')):
+            f, encoding = self.precompressed(f, path, '.gz', 'gzip')
+
+        with f:
+            st = os.fstat(f.fileno())
+            etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}{"-gz" if encoding else ""}"'
+            last_modified = self.date_time_string(int(st.st_mtime))
+            if self.not_modified(etag, st.st_mtime):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', last_modified)
+                self.send_header('Vary', 'Accept-Encoding')
+                self.end_headers()
+                return
+
+            size = st.st_size
+            offset, count = 0, size
+            byte_range = None
+            if 'Range' in self.headers and self.range_applies(etag, st.st_mtime):
+                byte_range = parse_range(self.headers['Range'], size)
+            if byte_range is False:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if byte_range:
+                offset, end = byte_range
+                count = end - offset + 1
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_header('Content-Range', f'bytes {offset}-{end}/{size}')
+            else:
+                self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', content_type)
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Content-Length', str(count))
+            self.send_header('Accept-Ranges', 'bytes')
+            if FINGERPRINT_REGEX.search(path):
+                self.send_header('Cache-Control', IMMUTABLE)
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            self.end_headers()
+            if not head:
+                self.copy_body(f, offset, count)
+
+    def precompressed(self, f, path, suffix, encoding):
+        # Swaps f for the compressed sibling of path when there is one with
+        # the file's mtime, which the build stamps on every sibling it
+        # writes or checks
+        try:
+            compressed = open(path + suffix, 'rb')
+        except OSError:
+            return f, None
+        if os.fstat(compressed.fileno()).st_mtime_ns != os.fstat(f.fileno()).st_mtime_ns:
+            compressed.close()
+            return f, None
+        f.close()
+        return compressed, encoding
+
+    def not_modified(self, etag, mtime):
+        # If-None-Match wins over If-Modified-Since when both are sent
+        if 'If-None-Match' in self.headers:
+            tags = [t.strip() for t in self.headers['If-None-Match'].split(',')]
+            return '*' in tags or etag in tags or f'W/{etag}' in tags
+        if 'If-Modified-Since' in self.headers:
+            try:
+                since = email.utils.parsedate_to_datetime(self.headers['If-Modified-Since'])
+            except (TypeError, ValueError):
+                return False
+            return since is not None and int(mtime) <= since.timestamp()
+        return False
+
+    def range_applies(self, etag, mtime):
+        # a stale If-Range means the client wants the whole new file
+        if_range = self.headers.get('If-Range')
+        if if_range is None:
+            return True
+        if if_range.startswith('"'):
+            return if_range == etag
+        try:
+            date = email.utils.parsedate_to_datetime(if_range)
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= date.timestamp()
+
+    def copy_body(self, f, offset, count):
+        # socket.sendfile() uses os.sendfile where it can, so the kernel
+        # copies straight from the page cache, and honours the socket timeout
+        self.wfile.flush()
+        self.sent += self.connection.sendfile(f, offset, count)
+
+    def list_directory(self, path):
+        self.send_error(HTTPStatus.NOT_FOUND, 'File not found')
+        return None
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+class StaticServer(HTTPServer):
+    # Connections are handled by a fixed pool of worker threads; the rest
+    # wait in the pool's queue
+    def __init__(self, address, directory, workers=16, quiet=False):
+        self.directory = directory
+        self.quiet = quiet
+        self.stats = Stats()
+        self.workers = workers
+        self.lock = threading.Lock()
+        # accepted connections that are not closed yet, queued or handled
+        self.connections = 0
+        self.pool = ThreadPoolExecutor(max_workers=workers,
+                                       thread_name_prefix='serve')
+        super().__init__(address, StaticHandler)
+
+    def finish_request(self, request, client_address):
+        self.RequestHandlerClass(request, client_address, self,
+                                 directory=self.directory)
+
+    def saturated(self):
+        return self.connections > self.workers
+
+    def process_request(self, request, client_address):
+        with self.lock:
+            self.connections += 1
+        self.pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self.lock:
+                self.connections -= 1
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the built site.')
+    parser.add_argument('-d', '--directory', default='public')
+    parser.add_argument('-b', '--bind', default='',
+                        help='address to listen on (default: all interfaces)')
+    parser.add_argument('-p', '--port', type=int, default=8888)
+    parser.add_argument('-w', '--workers', type=int, default=16,
+                        help='number of worker threads (default: %(default)s)')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='do not log every request')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.isdir(args.directory):
+        raise Exception(f'{args.directory} does not exist')
+    server = StaticServer((args.bind, args.port), args.directory, args.workers,
+                          args.quiet)
+    host, port = server.server_address[:2]
+    print(f'Serving {args.directory} on http://{host or "localhost"}:{port}/ '
+          f'with {args.workers} workers, counters at {STATS_PATH}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        json.dump(server.stats.snapshot(), sys.stdout, indent=2)
+        print()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+import datetime
+import heapq
+import os
+import re
+from xml.sax.saxutils import escape, quoteattr
+
+# URLs per sitemap file, the limit of the sitemap protocol. Above it the
+# URLs are split over sitemap-1.xml, sitemap-2.xml, ... and sitemap.xml
+# becomes their index.
+SITEMAP_LIMIT = 50000
+SITEMAP_NAME = 'sitemap.xml'
+FEED_NAME = 'feed.xml'
+FEED_ENTRIES = 20
+# every file written here, the static sync keeps them
+OUTPUT_REGEX = re.compile(r'^(sitemap(-\d+)?\.xml|feed\.xml)$')
+PART_REGEX = re.compile(r'^sitemap-(\d+)\.xml$')
+
+def w3c_time(mtime):
+    # mtime in nanoseconds
+    moment = datetime.datetime.fromtimestamp(mtime / 1e9, datetime.timezone.utc)
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def page_time(page):
+    # when a page was published for the feed: the date of its front matter
+    # (UTC unless it has an offset), else its mtime. In nanoseconds.
+    if not page.get('date'):
+        return page['mtime']
+    moment = datetime.datetime.fromisoformat(page['date'])
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return int(moment.timestamp()) * 1000000000
+
+def absolute_url(site_url, url):
+    return site_url.rstrip('/') + url
+
+def _write_urlset(path, site_url, pages):
+    # one line per URL, written as it goes
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for page in pages:
+            f.write(f'<url><loc>{escape(absolute_url(site_url, page["url"]))}</loc>'
+                    f'<lastmod>{w3c_time(page["mtime"])}</lastmod></url>\n')
+        f.write('</urlset>\n')
+
+def write_sitemap(dst_dir, site_url, pages, limit=SITEMAP_LIMIT):
+    # pages are {'url', 'mtime'} in the order they are listed. Returns the
+    # written paths, parts left from a larger site are removed.
+    path = os.path.join(dst_dir, SITEMAP_NAME)
+    parts = [pages[i:i+limit] for i in range(0, len(pages), limit)]
+    written = []
+    if len(parts) <= 1:
+        _write_urlset(path, site_url, pages)
+        parts = []
+    else:
+        for i, part in enumerate(parts, 1):
+            part_path = os.path.join(dst_dir, f'sitemap-{i}.xml')
+            _write_urlset(part_path, site_url, part)
+            written.append(part_path)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+            for i, part in enumerate(parts, 1):
+                loc = absolute_url(site_url, f'/sitemap-{i}.xml')
+                mtime = max(page['mtime'] for page in part)
+                f.write(f'<sitemap><loc>{escape(loc)}</loc>'
+                        f'<lastmod>{w3c_time(mtime)}</lastmod></sitemap>\n')
+            f.write('</sitemapindex>\n')
+    written.append(path)
+    for name in os.listdir(dst_dir):
+        match = PART_REGEX.match(name)
+        if match and int(match.group(1)) > len(parts):
+            os.remove(os.path.join(dst_dir, name))
+    return written
+
+def write_feed(path, site_url, title, pages, entries=FEED_ENTRIES):
+    # An Atom feed of the most recent pages, by date or else mtime
+    recent = heapq.nlargest(entries, pages,
+                            key=lambda page: (page_time(page), page['url']))
+    home = absolute_url(site_url, '/')
+    updated = w3c_time(page_time(recent[0]) if recent else 0)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+                f'<title>{escape(title)}</title>\n'
+                f'<link href={quoteattr(home)}/>\n'
+                f'<link rel="self" href={quoteattr(absolute_url(site_url, "/" + FEED_NAME))}/>\n'
+                f'<id>{escape(home)}</id>\n'
+                f'<updated>{updated}</updated>\n'
+                f'<author><name>{escape(title)}</name></author>\n')
+        for page in recent:
+            url = absolute_url(site_url, page['url'])
+            f.write(f'<entry><title>{escape(page["title"])}</title>'
+                    f'<link href={quoteattr(url)}/><id>{escape(url)}</id>'
+                    f'<updated>{w3c_time(page_time(page))}</updated></entry>\n')
+        f.write('</feed>\n')
+    return path
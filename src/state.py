@@ -0,0 +1,35 @@
+import json
+import os
+
+# The JSON files a build keeps between runs (the manifest, the asset and
+# image tables, the indexes), each carrying the version of its format
+
+def read_json(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_json(path, data):
+    # written next to path and renamed over it, a reader never sees half
+    # a file
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'),
+                  sort_keys=True)
+    os.replace(tmp, path)
+
+def load_state(path, version):
+    # The saved data, or None when the file is missing, unreadable or of
+    # another version
+    data = read_json(path)
+    if not isinstance(data, dict) or data.get('version') != version:
+        return None
+    return data
+
+def save_state(path, version, data):
+    write_json(path, dict(data, version=version))
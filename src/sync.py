@@ -0,0 +1,163 @@
+import errno
+import os
+import shutil
+
+import buildlog
+from manifest import hash_file
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl number of FICLONE from linux/fs.h, a copy-on-write clone on
+# filesystems that support it (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+# errors meaning "this copy method is not available here, try the next one"
+UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+    errno.ENOTTY, errno.EBADF, errno.EPERM, errno.ETXTBSY
+}
+
+def _reflink(fsrc, fdst):
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    except OSError as e:
+        if e.errno in UNSUPPORTED_ERRNOS:
+            return False
+        raise
+    return True
+
+def _copy_range(fsrc, fdst, size, copy):
+    # copy is os.copy_file_range or os.sendfile; both copy inside the kernel
+    infd, outfd = fsrc.fileno(), fdst.fileno()
+    offset = 0
+    while offset < size:
+        try:
+            if copy is os.sendfile:
+                sent = os.sendfile(outfd, infd, offset, size - offset)
+            else:
+                sent = os.copy_file_range(infd, outfd, size - offset, offset)
+        except OSError as e:
+            if offset == 0 and e.errno in UNSUPPORTED_ERRNOS:
+                return False
+            raise
+        if sent == 0:
+            break
+        offset += sent
+    return True
+
+def copy_file(src, dst, size):
+    # Returns the method that was used
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        if size and _reflink(fsrc, fdst):
+            return 'reflink'
+        for name in ('copy_file_range', 'sendfile'):
+            copy = getattr(os, name, None)
+            if copy and size and _copy_range(fsrc, fdst, size, copy):
+                return name
+        shutil.copyfileobj(fsrc, fdst)
+        return 'read/write'
+
+def _is_current(src, src_stat, dst, dst_stat, use_hash):
+    if os.path.samestat(src_stat, dst_stat):
+        return True
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+        return True
+    if use_hash and hash_file(src) == hash_file(dst):
+        # same bytes, only bring the mtime in line for the next build
+        os.utime(dst, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+        return True
+    return False
+
+def _place_file(src, src_stat, dst, link):
+    if os.path.lexists(dst):
+        # never write through an existing file, it may be a hardlink
+        # to the source
+        os.remove(dst)
+    if link:
+        try:
+            os.link(src, dst)
+            return 'link'
+        except OSError:
+            pass
+    method = copy_file(src, dst, src_stat.st_size)
+    os.chmod(dst, src_stat.st_mode & 0o7777)
+    os.utime(dst, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    return method
+
+def sync_file(src, dst, use_hash=False, link=False, src_stat=None):
+    # Brings one file up to date. Returns None when it already was, or how
+    # it was placed: 'link', 'reflink' or the copy method.
+    if src_stat is None:
+        src_stat = os.stat(src)
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        dst_stat = None
+    if dst_stat and _is_current(src, src_stat, dst, dst_stat, use_hash):
+        return None
+    buildlog.event('sync', f'--> syncing {src} to {dst}...',
+                   bytes=src_stat.st_size)
+    return _place_file(src, src_stat, dst, link)
+
+def sync_tree(src, dst, keep=(), use_hash=False, link=False,
+              sibling_suffixes=(), rename=None):
+    # Makes dst mirror src. Files are compared by size and mtime (and by
+    # content when use_hash is set), so an unchanged tree costs only stat
+    # calls. Files in dst that are neither in src nor in keep (relative
+    # paths), nor a sibling (e.g. 'index.html.gz' for the suffix '.gz') of
+    # one of those, are removed. rename(relpath, path) may pick another
+    # relative path in dst for a file. Returns {relpath: {'mtime', 'size'}}
+    # of src and a dict of counters.
+    records = {}
+    outputs = set()
+    stats = {'copied': 0, 'linked': 0, 'unchanged': 0, 'removed': 0, 'bytes': 0}
+    os.makedirs(dst, exist_ok=True)
+
+    for root, dirs, names in os.walk(src):
+        dirs.sort()
+        rel_root = os.path.relpath(root, src)
+        dst_root = os.path.normpath(os.path.join(dst, rel_root))
+        os.makedirs(dst_root, exist_ok=True)
+        for name in sorted(names):
+            src_path = os.path.join(root, name)
+            rel = os.path.normpath(os.path.join(rel_root, name))
+            output = rename(rel, src_path) if rename else rel
+            outputs.add(output)
+            dst_path = os.path.join(dst, output)
+            src_stat = os.stat(src_path)
+            records[rel] = {
+                'mtime': src_stat.st_mtime_ns,
+                'size': src_stat.st_size
+            }
+            method = sync_file(src_path, dst_path, use_hash, link, src_stat)
+            if method is None:
+                stats['unchanged'] += 1
+            elif method == 'link':
+                stats['linked'] += 1
+            else:
+                stats['copied'] += 1
+                stats['bytes'] += src_stat.st_size
+
+    for root, dirs, names in os.walk(dst, topdown=False):
+        rel_root = os.path.relpath(root, dst)
+        for name in names:
+            rel = os.path.normpath(os.path.join(rel_root, name))
+            base, suffix = os.path.splitext(rel)
+            if suffix in sibling_suffixes and (base in outputs or base in keep):
+                continue
+            if rel not in outputs and rel not in keep:
+                buildlog.event('delete', f'Deleting {os.path.join(root, name)}...')
+                os.remove(os.path.join(root, name))
+                stats['removed'] += 1
+        if (root != dst and not os.listdir(root) and
+            not os.path.isdir(os.path.join(src, rel_root))):
+            os.rmdir(root)
+
+    return records, stats
@@ -0,0 +1,89 @@
+import io
+import os
+import re
+
+from fingerprint import asset_urls
+from htmlnode import HTMLNode
+from render import iter_html
+
+PLACEHOLDER_REGEX = re.compile(r'\{\{ (Title|Content) \}\}')
+# root-relative URLs in the template, rewritten through asset_urls
+URL_ATTRIBUTE_REGEX = re.compile(r'\b(?:href|src)="(/[^"]*)"')
+URL_SLOT = 'url'
+
+class Template:
+    # A template is a list of literal strings and slot names. Rendering
+    # writes them in order, so the page is never built as one string.
+    def __init__(self, segments):
+        self.segments = segments
+
+    def write(self, out, **values):
+        # slot values are strings, HTML nodes or iterables of chunks, the
+        # latter two are streamed
+        last = ''
+        for literal, slot in self.segments:
+            if slot is None:
+                value = literal
+            elif slot is URL_SLOT:
+                value = asset_urls.get(literal, literal)
+            else:
+                value = values[slot]
+            if isinstance(value, str):
+                chunks = (value,)
+            elif isinstance(value, HTMLNode):
+                chunks = iter_html(value)
+            else:
+                chunks = value
+            for chunk in chunks:
+                if chunk:
+                    out.write(chunk)
+                    last = chunk
+        # pages always end with a newline
+        if last[-1:] != '\n':
+            out.write('\n')
+
+    def render(self, **values):
+        out = io.StringIO()
+        self.write(out, **values)
+        return out.getvalue()
+
+    def __repr__(self):
+        slots = [slot for _, slot in self.segments if slot and slot is not URL_SLOT]
+        return f'Template(segments={len(self.segments)}, slots={slots})'
+
+def _literal_segments(text):
+    # splits the URLs of href and src attributes out of a literal, so they
+    # are looked up when the page is written rather than fixed here
+    segments = []
+    pos = 0
+    for match in URL_ATTRIBUTE_REGEX.finditer(text):
+        segments.append((text[pos:match.start(1)], None))
+        segments.append((match.group(1), URL_SLOT))
+        pos = match.end(1)
+    if pos < len(text):
+        segments.append((text[pos:], None))
+    return segments
+
+def compile_template(text):
+    segments = []
+    pos = 0
+    for match in PLACEHOLDER_REGEX.finditer(text):
+        if match.start() > pos:
+            segments.extend(_literal_segments(text[pos:match.start()]))
+        segments.append((None, match.group(1).lower()))
+        pos = match.end()
+    if pos < len(text):
+        segments.extend(_literal_segments(text[pos:]))
+    return Template(segments)
+
+_cache = {}
+
+def load_template(path):
+    mtime = os.stat(path).st_mtime_ns
+    cached = _cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path) as f:
+        template = compile_template(f.read())
+    _cache[path] = (mtime, template)
+    return template
@@ -0,0 +1,118 @@
+import io
+import json
+import os
+import unittest
+from unittest import mock
+
+import buildlog
+from buildlog import BuildLog, format_bytes
+from main import build
+from testcase import TempDirTestCase
+
+class TestBuildLog(unittest.TestCase):
+    def test_levels(self):
+        for mode, expect in (('quiet', []), ('summary', ['changed']),
+                             ('verbose', ['copied', 'changed'])):
+            out = io.StringIO()
+            log = BuildLog(mode, out)
+            log.event('copy', 'copied', bytes=10)
+            log.event('info', 'changed', buildlog.SUMMARY)
+            log.flush()
+            self.assertEqual(out.getvalue().splitlines(), expect, mode)
+            self.assertEqual(log.counts, {'copy': 1, 'info': 1})
+            self.assertEqual(log.bytes, 10)
+
+    def test_invalid_mode(self):
+        self.assertRaises(ValueError, BuildLog, 'loud')
+
+    def test_buffered(self):
+        out = io.StringIO()
+        log = BuildLog('verbose', out)
+        for i in range(buildlog.BUFFER_LINES - 1):
+            log.event('page', f'page {i}')
+        self.assertEqual(out.getvalue(), '')
+        log.event('page', 'last')
+        self.assertEqual(len(out.getvalue().splitlines()), buildlog.BUFFER_LINES)
+        self.assertEqual(log.lines, [])
+
+    def test_json(self):
+        out = io.StringIO()
+        log = BuildLog('json', out)
+        log.event('page', 'Generated a', bytes=100)
+        log.event('sync', 'synced b', bytes=20)
+        log.summary()
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(lines[0], {'event': 'page', 'message': 'Generated a', 'bytes': 100})
+        self.assertEqual(lines[-1]['event'], 'summary')
+        self.assertEqual((lines[-1]['pages'], lines[-1]['assets'], lines[-1]['bytes']),
+                         (1, 1, 120))
+
+    def test_summary(self):
+        out = io.StringIO()
+        log = BuildLog('summary', out)
+        log.event('page', 'a', bytes=2048)
+        log.event('copy', 'b', bytes=1024)
+        log.event('delete', 'c')
+        log.summary()
+        self.assertRegex(out.getvalue(),
+                         r'^Built 1 page\(s\) and 1 asset\(s\), 3\.0 KiB in \d+\.\d\ds\n$')
+        out = io.StringIO()
+        BuildLog('quiet', out).summary()
+        self.assertEqual(out.getvalue(), '')
+
+    def test_collect_and_record(self):
+        worker = BuildLog('verbose')
+        worker.collected = []
+        worker.event('page', 'a', bytes=5)
+        out = io.StringIO()
+        parent = BuildLog('verbose', out)
+        with mock.patch('buildlog.log', worker):
+            events = buildlog.drain()
+        with mock.patch('buildlog.log', parent):
+            buildlog.record(events)
+            self.assertEqual(buildlog.drain(), [])
+        parent.flush()
+        self.assertEqual(out.getvalue(), 'a\n')
+        self.assertEqual((parent.counts, parent.bytes), ({'page': 1}, 5))
+
+    def test_format_bytes(self):
+        self.assertEqual(format_bytes(512), '512 B')
+        self.assertEqual(format_bytes(1536), '1.5 KiB')
+        self.assertEqual(format_bytes(3 * 1024 ** 3), '3.0 GiB')
+
+class TestBuildSummary(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.write('template.html', '{{ Title }}\n{{ Content }}\n')
+        self.write('content/index.md', '# Home\n')
+        self.write('content/a/b.md', '# B\n')
+        self.write('static/index.css', 'body {}\n')
+
+    def tearDown(self):
+        buildlog.configure()
+
+    def build(self, mode, jobs=1):
+        out = io.StringIO()
+        buildlog.configure(mode, out)
+        build(self.template, os.path.join(self.root, 'static'),
+              os.path.join(self.root, 'content'), os.path.join(self.root, 'public'),
+              jobs)
+        buildlog.summary()
+        return out.getvalue().splitlines()
+
+    def test_summary_only(self):
+        lines = self.build('summary')
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].startswith('Built 2 page(s) and 1 asset(s), '))
+
+    def test_parallel_counts(self):
+        lines = self.build('json', jobs=2)
+        summary = json.loads(lines[-1])
+        self.assertEqual((summary['pages'], summary['assets']), (2, 1))
+        public = os.path.join(self.root, 'public')
+        size = sum(os.path.getsize(os.path.join(root, name))
+                   for root, dirs, names in os.walk(public) for name in names)
+        self.assertEqual(summary['bytes'], size)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import unittest
+from unittest import mock
+
+import doccache
+from doccache import DocumentCache
+from testcase import TempDirTestCase
+
+class TestDocumentCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = DocumentCache(os.path.join(self.root, 'cache'))
+
+    def test_miss_then_hit(self):
+        key = self.cache.key('# Title\n')
+        self.assertIs(self.cache.get(key), None)
+        self.cache.put(key, 'Title', '<div><h1>Title</h1></div>')
+        self.assertEqual(self.cache.get(key), ('Title', '<div><h1>Title</h1></div>'))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_key_depends_on_content_and_parser_version(self):
+        key = self.cache.key('# Title\n')
+        self.assertEqual(key, self.cache.key('# Title\n'))
+        self.assertNotEqual(key, self.cache.key('# Title!\n'))
+        with mock.patch.object(doccache, 'PARSER_VERSION', doccache.PARSER_VERSION + 1):
+            self.assertNotEqual(key, self.cache.key('# Title\n'))
+
+    def test_corrupt_entry_is_a_miss(self):
+        key = self.cache.key('# Title\n')
+        self.cache.put(key, 'Title', '<div></div>')
+        for garbage in ['{"title": "Ti', '[1, 2]', '{"title": 1, "body": ""}']:
+            with open(self.cache.path(key), 'w') as f:
+                f.write(garbage)
+            self.assertIs(self.cache.get(key), None)
+            self.assertFalse(os.path.exists(self.cache.path(key)))
+
+    def test_prune_evicts_least_recently_used(self):
+        keys = [self.cache.key(f'# Page {i}\n') for i in range(4)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, f'Page {i}', 'x' * 1000)
+            os.utime(self.cache.path(key), ns=(i * 10**9, i * 10**9))
+        # reading the oldest entry makes it the most recently used
+        self.cache.get(keys[0])
+        size = os.path.getsize(self.cache.path(keys[0]))
+        self.cache.max_bytes = size * 2
+        self.assertEqual(self.cache.prune(), 2)
+        self.assertIsNot(self.cache.get(keys[0]), None)
+        self.assertIsNot(self.cache.get(keys[3]), None)
+        self.assertIs(self.cache.get(keys[1]), None)
+        self.assertIs(self.cache.get(keys[2]), None)
+
+    def test_prune_empty(self):
+        self.assertEqual(self.cache.prune(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import fingerprint
+from doccache import DocumentCache
+from fingerprint import (asset_tables, asset_url, fingerprinted_name,
+                         record_assets, set_asset_urls)
+from main import build, build_incremental
+from template import compile_template
+from testcase import TempDirTestCase
+from textnode import TextNode, TextType
+from transformers import textnode_to_htmlnode
+
+class AssetURLsTestCase(unittest.TestCase):
+    def setUp(self):
+        set_asset_urls({'/index.css': '/index.0123456789.css',
+                        '/images/a.png': '/images/a.abcdef0123.png'})
+
+    def tearDown(self):
+        set_asset_urls({})
+
+class TestAssetURLs(AssetURLsTestCase):
+    def test_fingerprinted_name(self):
+        self.assertEqual(fingerprinted_name(os.path.join('images', 'a.png'), 'f' * 64),
+                         os.path.join('images', 'a.ffffffffff.png'))
+        self.assertEqual(fingerprinted_name('LICENSE', 'f' * 64), 'LICENSE.ffffffffff')
+
+    def test_asset_url(self):
+        self.assertEqual(asset_url('/index.css'), '/index.0123456789.css')
+        self.assertEqual(asset_url('/majesty'), '/majesty')
+
+    def test_record_assets(self):
+        with record_assets() as used:
+            asset_url('/index.css')
+            asset_url('/majesty')
+        asset_url('/images/a.png')
+        self.assertEqual(used['urls'], {'/index.css': '/index.0123456789.css',
+                                        '/majesty': None})
+
+    def test_textnode_urls(self):
+        image = textnode_to_htmlnode(TextNode('a', TextType.IMAGE, '/images/a.png'))
+        self.assertEqual(image.to_html(), '<img src="/images/a.abcdef0123.png" alt="a">')
+        link = textnode_to_htmlnode(TextNode('css', TextType.LINK, '/index.css'))
+        self.assertEqual(link.props['href'], '/index.0123456789.css')
+        link = textnode_to_htmlnode(TextNode('home', TextType.LINK, '/'))
+        self.assertEqual(link.props['href'], '/')
+
+    def test_template_urls(self):
+        template = compile_template(
+            '<link href="/index.css" rel="stylesheet">'
+            '<a href="https://example.com/index.css">{{ Title }}</a>')
+        self.assertEqual(template.render(title='T'),
+                         '<link href="/index.0123456789.css" rel="stylesheet">'
+                         '<a href="https://example.com/index.css">T</a>\n')
+        # the table is read when the page is written, not when compiled
+        set_asset_urls({})
+        self.assertTrue(template.render(title='T').startswith('<link href="/index.css"'))
+
+    def test_cached_body_needs_the_same_rewrites(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = DocumentCache(tmp)
+            key = cache.key('![a](/images/a.png)')
+            cache.put(key, 'T', '<img src="/images/a.abcdef0123.png">',
+                      {'urls': {'/images/a.png': '/images/a.abcdef0123.png', '/': None}})
+            self.assertIsNotNone(cache.get(key, asset_tables()))
+            # another asset changing doesn't matter
+            urls = dict(fingerprint.asset_urls, **{'/index.css': '/index.9.css'})
+            self.assertIsNotNone(cache.get(key, {'urls': urls}))
+            urls['/images/a.png'] = '/images/a.9.png'
+            self.assertIsNone(cache.get(key, {'urls': urls}))
+            # a URL that turned into an asset
+            urls = dict(fingerprint.asset_urls, **{'/': '/index.9.html'})
+            self.assertIsNone(cache.get(key, {'urls': urls}))
+
+class TestFingerprintBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.write('template.html',
+                                   '<link href="/index.css">{{ Title }}\n{{ Content }}\n')
+        self.write('content/index.md', '# Home\n\n![logo](/images/logo.png)\n')
+        self.write('static/index.css', 'body {}\n')
+        self.write('static/images/logo.png', 'png')
+        self.write('static/robots.txt', 'User-agent: *\n')
+        self.args = (self.template, os.path.join(self.root, 'static'),
+                     os.path.join(self.root, 'content'), os.path.join(self.root, 'public'))
+        self.assets = os.path.join(self.root, 'assets.json')
+
+    def tearDown(self):
+        set_asset_urls({})
+
+    def build(self, function=build, **options):
+        with contextlib.redirect_stdout(io.StringIO()):
+            function(*self.args, fingerprint=self.assets,
+                     image_cache=os.path.join(self.root, 'images.json'), **options)
+        public = os.path.join(self.root, 'public')
+        files = []
+        for root, dirs, names in os.walk(public):
+            files.extend(os.path.relpath(os.path.join(root, name), public) for name in names)
+        with open(os.path.join(public, 'index.html')) as f:
+            return sorted(files), f.read()
+
+    def test_build(self):
+        files, html = self.build()
+        css = [f for f in files if f.endswith('.css')]
+        logo = [f for f in files if f.endswith('.png')]
+        self.assertEqual(len(css), 1)
+        self.assertRegex(css[0], r'^index\.[0-9a-f]{10}\.css$')
+        self.assertIn('robots.txt', files)
+        self.assertIn(f'href="/{css[0]}"', html)
+        self.assertIn(f'src="/{logo[0]}"', html)
+
+    def test_unchanged_assets_are_not_hashed_again(self):
+        self.build()
+        with mock.patch('fingerprint.file_record', wraps=fingerprint.file_record) as record, \
+             mock.patch('manifest.hash_file') as hash_file:
+            self.build()
+        self.assertEqual(record.call_count, 2)
+        hash_file.assert_not_called()
+
+    def test_incremental_rebuilds_pages_when_urls_change(self):
+        manifest = os.path.join(self.root, 'manifest.json')
+        files, _ = self.build(build_incremental, manifest_path=manifest)
+        self.write('static/index.css', 'body { margin: 0 }\n')
+        new_files, html = self.build(build_incremental, manifest_path=manifest)
+        css = [f for f in new_files if f.endswith('.css')]
+        self.assertEqual(len(css), 1)
+        self.assertNotIn(css[0], files)
+        self.assertIn(f'href="/{css[0]}"', html)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import contextlib
+import io
+import os
+import unittest
+
+from doccache import DocumentCache
+from frontmatter import Metadata, read_front_matter, split_front_matter
+from main import (build, build_incremental, clean_build, generate_page,
+                  list_pages, rebuild_changes)
+from testcase import TempDirTestCase
+
+class FrontMatterTestCase(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, 'content')
+        self.public = os.path.join(self.root, 'public')
+
+class TestFrontMatter(FrontMatterTestCase):
+    def test_split(self):
+        meta, body = split_front_matter('---\ntitle: "The Shire"\n'
+                                        'date: 2024-05-01\n'
+                                        'tags: [places, hobbits]\n'
+                                        'draft: yes\n---\n# Home\n')
+        self.assertEqual(meta, {'title': 'The Shire', 'date': '2024-05-01',
+                                'tags': ['places', 'hobbits'], 'draft': True})
+        self.assertEqual(body, '# Home\n')
+
+    def test_without_front_matter(self):
+        self.assertEqual(split_front_matter('# Home\n\n---\n'), ({}, '# Home\n\n---\n'))
+        f = io.StringIO('# Home\n')
+        self.assertEqual(read_front_matter(f), {})
+        self.assertEqual(f.tell(), 0)
+
+    def test_invalid(self):
+        for markdown in ('---\ntitle: A\n', '---\ntitel: A\n---\n',
+                         '---\ndate: May\n---\n', '---\ndraft: maybe\n---\n',
+                         '---\njust text\n---\n'):
+            with self.assertRaises(ValueError):
+                split_front_matter(markdown, 'page.md')
+
+    def test_metadata_reads_headers_once(self):
+        self.write('content/a.md', '---\ndate: 2024-01-01\ntags: shire\n---\n# A\n')
+        self.write('content/b.md', '---\ntitle: B\ndate: 2024-02-01\ndraft: true\n---\n')
+        self.write('content/c/index.md', 'No title\n')
+        state = os.path.join(self.root, 'metadata.json')
+        metadata = Metadata(state)
+        self.assertEqual(metadata.scan(self.content)['a.md']['title'], 'A')
+        self.assertEqual(metadata.reads, 3)
+        self.assertEqual(metadata.drafts(), {'b.md'})
+        self.assertEqual([rel for rel, _ in metadata.listing()], ['a.md', 'c/index.md'])
+        self.assertEqual([rel for rel, _ in metadata.listing(drafts=True)],
+                         ['b.md', 'a.md', 'c/index.md'])
+        self.assertEqual([rel for rel, _ in metadata.listing(tag='shire')], ['a.md'])
+        metadata.save()
+
+        self.write('content/a.md', '---\ntitle: Changed\n---\n# A\n')
+        metadata = Metadata(state)
+        pages = metadata.scan(self.content)
+        self.assertEqual(metadata.reads, 1)
+        self.assertEqual(pages['a.md'], {'title': 'Changed'})
+
+    def test_list_pages(self):
+        self.write('content/index.md', '---\ndate: 2024-01-01\ntags: [a, b]\n---\n# Home\n')
+        self.write('content/draft.md', '---\ndraft: true\n---\n# Draft\n')
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            list_pages(self.content, metadata=None)
+        self.assertEqual(out.getvalue(), '2024-01-01  Home  /  [a, b]\n')
+
+class TestFrontMatterBuild(FrontMatterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.write('template.html', '{{ Title }}\n{{ Content }}\n')
+        self.write('content/index.md', '---\ntitle: The Shire\n---\n# Home\n\nHobbits\n')
+        self.draft = self.write('content/draft.md', '---\ndraft: true\n---\n# Draft\n')
+        self.write('static/index.css', 'body {}\n')
+        self.args = (self.template, os.path.join(self.root, 'static'),
+                     self.content, self.public)
+
+    def build(self, function=build, **options):
+        with contextlib.redirect_stdout(io.StringIO()):
+            function(*self.args, **options)
+
+    def read(self, rel):
+        with open(os.path.join(self.public, rel)) as f:
+            return f.read()
+
+    def exists(self, rel):
+        return os.path.exists(os.path.join(self.public, rel))
+
+    def test_page(self):
+        dst = os.path.join(self.root, 'page.html')
+        cache = DocumentCache(os.path.join(self.root, 'cache'))
+        for options in ({}, {'stream_above': 0}, {'cache': cache}, {'cache': cache}):
+            with contextlib.redirect_stdout(io.StringIO()):
+                info = generate_page(self.template, os.path.join(self.content, 'index.md'),
+                                     dst, **options)
+            self.assertEqual(info['title'], 'The Shire')
+            with open(dst) as f:
+                html = f.read()
+            self.assertTrue(html.startswith('The Shire\n<div><h1>Home</h1>'))
+            self.assertNotIn('title:', html)
+        self.assertEqual(cache.hits, 1)
+
+    def test_drafts(self):
+        for function in (build, clean_build):
+            for jobs in (1, 2):
+                self.build(function, jobs=jobs)
+                self.assertTrue(self.exists('index.html'))
+                self.assertFalse(self.exists('draft.html'))
+                self.build(function, jobs=jobs, content_options={'drafts': True})
+                self.assertTrue(self.exists('draft.html'))
+        # the output of a page that became a draft is removed
+        self.build()
+        self.assertFalse(self.exists('draft.html'))
+
+    def test_incremental(self):
+        manifest = os.path.join(self.root, 'manifest.json')
+        options = {'metadata': os.path.join(self.root, 'metadata.json')}
+        self.build(build_incremental, manifest_path=manifest,
+                   content_options=options)
+        self.assertFalse(self.exists('draft.html'))
+        self.write('content/draft.md', '# Published\n')
+        self.build(build_incremental, manifest_path=manifest,
+                   content_options=options)
+        self.assertIn('Published', self.read('draft.html'))
+        self.write('content/draft.md', '---\ndraft: true\n---\n# Draft\n')
+        self.build(build_incremental, manifest_path=manifest,
+                   content_options=options)
+        self.assertFalse(self.exists('draft.html'))
+
+    def test_rebuild_changes(self):
+        self.write('content/draft.md', '# Published\n')
+        self.build()
+        self.write('content/draft.md', '---\ndraft: true\n---\n# Draft\n')
+        with contextlib.redirect_stdout(io.StringIO()):
+            rebuild_changes(*self.args, [self.draft], [])
+        self.assertFalse(self.exists('draft.html'))
+        self.assertTrue(self.exists('index.html'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,7 +7,8 @@ from helpers import (
     extract_markdown_links, extract_markdown_images,
     split_nodes_image, split_nodes_link,
     block_to_block_type,
-    extract_title
+    extract_title,
+    extract_title_from_lines
 )
 
 class TestSplitNodesDelimiter(unittest.TestCase):
@@ -459,6 +460,18 @@ print('Hello, world')
         ]
         for block in blocks:
             self.assertEqual(block_to_block_type(block), 'ordered_list')
+# }}}
+    def test_block_type_mixed_markers(self):# {{{
+        blocks = [
+            '- dash item\n* star item',
+            '> quote\nnot a quote',
+            '1. one\n3. three',
+            '2. two\n3. three',
+            '```\ncode without end'
+        ]
+        for block in blocks:
+            self.assertEqual(block_to_block_type(block), 'paragraph')
+        self.assertEqual(block_to_block_type('01. one\n2. two'), 'ordered_list')
 # }}}
 class TestExtractTitle(unittest.TestCase):
     def test_extract_title_single(self):# {{{
@@ -510,6 +523,11 @@ Should be a short text describing what the product is about.
 hello@example.com
 -Infinity Street.'''
         self.assertRaises(Exception, extract_title, markdown)
+# }}}
+    def test_extract_title_from_file_lines(self):# {{{
+        lines = iter(['intro\n', '# The title\n', '# Another\n'])
+        self.assertEqual(extract_title_from_lines(lines), 'The title')
+        self.assertEqual(next(lines), '# Another\n')
 # }}}
 if __name__ == '__main__':
     unittest.main()
@@ -33,6 +33,10 @@ class TestHTMLNode(unittest.TestCase):
     def test_raise_notimplementederror(self):
         node = HTMLNode('p', 'A wild paragraph', props={'style': 'color:red'})
         self.assertRaises(NotImplementedError, node.to_html)
+    def test_slots(self):
+        node = HTMLNode('p', 'A wild paragraph')
+        self.assertFalse(hasattr(node, '__dict__'))
+        self.assertIs(node.props, None)
 
 if __name__ == '__main__':
     unittest.main()
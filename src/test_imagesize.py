@@ -0,0 +1,131 @@
+import os
+import struct
+import unittest
+
+from fingerprint import set_asset_sizes
+from imagesize import ImageSizes, read_image_size
+from testcase import TempDirTestCase
+from transformers import iter_markdown_html, markdown_to_htmlnode
+
+def png(width, height):
+    return (b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' +
+            struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0) + b'\0' * 16)
+
+def gif(width, height):
+    return b'GIF89a' + struct.pack('<HH', width, height) + b'\0' * 24
+
+def webp(chunk, payload):
+    body = chunk + struct.pack('<I', len(payload)) + payload
+    return b'RIFF' + struct.pack('<I', len(body) + 4) + b'WEBP' + body
+
+def jpeg(width, height):
+    app0 = b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\0' + b'\0' * 9
+    sof = b'\xff\xc2' + struct.pack('>HBHHB', 11, 8, height, width, 1) + b'\0' * 3
+    return b'\xff\xd8' + app0 + sof + b'\xff\xd9'
+
+class TestReadImageSize(TempDirTestCase):
+    def size(self, data):
+        return read_image_size(self.write('image', data))
+
+    def test_png(self):
+        self.assertEqual(self.size(png(1344, 896)), (1344, 896))
+
+    def test_gif(self):
+        self.assertEqual(self.size(gif(16, 9)), (16, 9))
+
+    def test_jpeg(self):
+        self.assertEqual(self.size(jpeg(640, 480)), (640, 480))
+
+    def test_webp(self):
+        lossy = b'\0\0\0\x9d\x01\x2a' + struct.pack('<HH', 300, 200) + b'\0' * 8
+        self.assertEqual(self.size(webp(b'VP8 ', lossy)), (300, 200))
+        bits = (300 - 1) | ((200 - 1) << 14)
+        lossless = b'\x2f' + bits.to_bytes(4, 'little') + b'\0' * 8
+        self.assertEqual(self.size(webp(b'VP8L', lossless)), (300, 200))
+        extended = b'\0' * 4 + (299).to_bytes(3, 'little') + (199).to_bytes(3, 'little') + b'\0' * 4
+        self.assertEqual(self.size(webp(b'VP8X', extended)), (300, 200))
+
+    def test_unknown(self):
+        self.assertIsNone(self.size(b'<svg xmlns="http://www.w3.org/2000/svg"></svg>'))
+        self.assertIsNone(self.size(b'\xff\xd8\xff\xd9' + b'\0' * 40))
+        self.assertIsNone(self.size(b''))
+
+    def test_repository_image(self):
+        path = os.path.join(os.path.dirname(__file__), '..', 'static', 'images', 'rivendell.png')
+        if not os.path.isfile(path):
+            self.skipTest('no repository image')
+        width, height = read_image_size(path)
+        self.assertGreater(width, 0)
+        self.assertGreater(height, 0)
+
+class TestImageSizes(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, 'static')
+        self.cache = os.path.join(self.root, 'images.json')
+        self.write('images/a.png', png(10, 20))
+        self.write('b.gif', gif(3, 4))
+        self.write('index.css', b'body {}')
+
+    def write(self, rel, data):
+        return super().write(rel, data, self.static)
+
+    def scan(self):
+        sizes = ImageSizes(self.cache)
+        table = sizes.scan(self.static)
+        sizes.save()
+        return table, sizes.reads
+
+    def test_scan(self):
+        table, reads = self.scan()
+        self.assertEqual(table, {'/images/a.png': [10, 20], '/b.gif': [3, 4]})
+        self.assertEqual(reads, 2)
+
+    def test_unchanged_images_are_not_read(self):
+        self.scan()
+        table, reads = self.scan()
+        self.assertEqual(reads, 0)
+        self.assertEqual(table['/images/a.png'], [10, 20])
+
+    def test_same_content_is_not_read(self):
+        self.scan()
+        path = os.path.join(self.static, 'b.gif')
+        os.utime(path, ns=(0, 10**9))
+        table, reads = self.scan()
+        self.assertEqual(reads, 0)
+        self.assertEqual(table['/b.gif'], [3, 4])
+
+    def test_changed_image_is_read(self):
+        self.scan()
+        path = self.write('b.gif', gif(30, 40))
+        os.utime(path, ns=(0, 10**9))
+        table, reads = self.scan()
+        self.assertEqual(reads, 1)
+        self.assertEqual(table['/b.gif'], [30, 40])
+
+class TestImageAttributes(unittest.TestCase):
+    markdown = '# Title\n\n![one](/a.png)\n\n![two](/b.png) and ![three](/c.png)\n'
+
+    def setUp(self):
+        set_asset_sizes({'/a.png': [10, 20], '/b.png': [30, 40]})
+
+    def tearDown(self):
+        set_asset_sizes({})
+
+    def test_attributes(self):
+        html = markdown_to_htmlnode(self.markdown).to_html()
+        self.assertIn('<img src="/a.png" alt="one" width="10" height="20">', html)
+        self.assertIn('<img src="/b.png" alt="two" width="30" height="40" '
+                      'loading="lazy" decoding="async">', html)
+        self.assertIn('<img src="/c.png" alt="three" loading="lazy" decoding="async">', html)
+
+    def test_every_page_starts_eager(self):
+        first = markdown_to_htmlnode(self.markdown).to_html()
+        self.assertEqual(markdown_to_htmlnode(self.markdown).to_html(), first)
+
+    def test_streaming_matches(self):
+        streamed = ''.join(iter_markdown_html(self.markdown.splitlines(True)))
+        self.assertEqual(streamed, markdown_to_htmlnode(self.markdown).to_html())
+
+if __name__ == '__main__':
+    unittest.main()
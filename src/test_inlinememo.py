@@ -0,0 +1,96 @@
+import unittest
+
+import transformers
+from fingerprint import record_assets, set_asset_sizes, set_asset_urls
+from inlinememo import ENTRY_OVERHEAD, InlineMemo
+from transformers import markdown_to_htmlnode, set_inline_memo_size
+
+def no_rewrites(url):
+    return url
+
+class TestInlineMemo(unittest.TestCase):
+    def test_hits_and_misses(self):
+        memo = InlineMemo()
+        self.assertIsNone(memo.get('a *b*', no_rewrites))
+        memo.put('a *b*', 'a <i>b</i>')
+        self.assertEqual(memo.get('a *b*', no_rewrites), ('a <i>b</i>', None))
+        self.assertEqual((memo.hits, memo.misses), (1, 1))
+        self.assertEqual(memo.hit_rate(), 0.5)
+
+    def test_lru_eviction(self):
+        memo = InlineMemo(3 * (2 + ENTRY_OVERHEAD))
+        for text in 'abc':
+            memo.put(text, text)
+        memo.get('a', no_rewrites)
+        memo.put('d', 'd')
+        self.assertEqual(list(memo.entries), ['c', 'a', 'd'])
+        self.assertEqual(memo.evictions, 1)
+        self.assertEqual(memo.size, 3 * (2 + ENTRY_OVERHEAD))
+
+    def test_too_large(self):
+        memo = InlineMemo(ENTRY_OVERHEAD)
+        memo.put('text', 'text')
+        self.assertEqual(memo.entries, {})
+        memo = InlineMemo(0)
+        memo.put('', '')
+        self.assertEqual(memo.entries, {})
+
+    def test_rewrites_must_hold(self):
+        memo = InlineMemo()
+        memo.put('[a](/a.css)', '<a href="/a.1.css">a</a>', [('/a.css', '/a.1.css')])
+        self.assertIsNotNone(memo.get('[a](/a.css)', {'/a.css': '/a.1.css'}.get))
+        self.assertIsNone(memo.get('[a](/a.css)', {'/a.css': '/a.2.css'}.get))
+
+    def test_drain_and_add(self):
+        memo = InlineMemo()
+        memo.get('a', no_rewrites)
+        counts = memo.drain()
+        self.assertEqual(counts, (0, 1, 0))
+        self.assertEqual(memo.misses, 0)
+        parent = InlineMemo()
+        parent.add(counts)
+        parent.add((2, 0, 1))
+        self.assertEqual((parent.hits, parent.misses, parent.evictions), (2, 1, 1))
+
+class TestMemoizedRendering(unittest.TestCase):
+    markdown = ('# Home\n\nSee [the styles](/index.css) and **more**\n\n'
+                '* a *nav* line\n* [Home](/)\n\n![logo](/logo.png)\n')
+
+    def setUp(self):
+        self.memo = transformers.inline_memo
+        set_inline_memo_size(1024 * 1024)
+
+    def tearDown(self):
+        transformers.inline_memo = self.memo
+        set_asset_urls({})
+        set_asset_sizes({})
+
+    def render(self):
+        return markdown_to_htmlnode(self.markdown).to_html()
+
+    def test_same_html(self):
+        set_inline_memo_size(0)
+        expect = self.render()
+        set_inline_memo_size(1024 * 1024)
+        self.assertEqual(self.render(), expect)
+        self.assertEqual(self.render(), expect)
+        memo = transformers.inline_memo
+        # the image line is never memoized
+        self.assertEqual((memo.hits, memo.misses), (4, 4))
+        self.assertNotIn('![logo](/logo.png)', memo.entries)
+
+    def test_changed_rewrites(self):
+        self.render()
+        set_asset_urls({'/index.css': '/index.0123456789.css'})
+        self.assertIn('href="/index.0123456789.css"', self.render())
+
+    def test_lookups_are_recorded_on_hits(self):
+        set_asset_sizes({'/logo.png': [1, 2]})
+        self.render()
+        with record_assets() as used:
+            self.render()
+        self.assertEqual(set(used['urls']), {'/index.css', '/', '/logo.png'})
+        self.assertEqual(used['sizes'], {'/logo.png': [1, 2]})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -44,5 +44,11 @@ class TestLeafNode(unittest.TestCase):
         expected = 'GitHub'
         self.assertEqual(node.to_html(), expected)
 
+    def test_write_html(self):
+        node = LeafNode('a', 'GitHub', props={'href': 'https://github.com'})
+        chunks = []
+        node.write_html(chunks)
+        self.assertEqual(chunks, ['<a href="https://github.com">GitHub</a>'])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,151 @@
+import contextlib
+import io
+import os
+import unittest
+
+import buildlog
+from doccache import DocumentCache
+from main import build_incremental, collect_pages, generate_page, generate_pages
+from testcase import TempDirTestCase
+
+TEMPLATE = '<title>{{ Title }}</title>\n{{ Content }}\n'
+
+class TestGeneratePages(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.write('template.html', TEMPLATE)
+        for i in range(6):
+            self.write(os.path.join('content', f'dir{i % 2}', f'page{i}.md'),
+                       f'# Page {i}\n\nSome *text*\n')
+        self.dst = os.path.join(self.root, 'public')
+
+    def tearDown(self):
+        buildlog.configure()
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def build(self, jobs):
+        pages = collect_pages(os.path.join(self.root, 'content'), self.dst)
+        log = io.StringIO()
+        buildlog.configure('verbose', log)
+        generate_pages(self.template, pages, jobs, batch_size=2)
+        buildlog.flush()
+        return pages, log.getvalue()
+
+    def test_collect_pages_is_sorted(self):
+        pages = collect_pages(os.path.join(self.root, 'content'), self.dst)
+        self.assertEqual(pages, sorted(pages))
+        self.assertEqual(len(pages), 6)
+        self.assertTrue(all(dst.endswith('.html') for _, dst in pages))
+
+    def test_parallel_matches_serial(self):
+        pages, serial_log = self.build(1)
+        serial = [self.read(dst) for _, dst in pages]
+        _, parallel_log = self.build(2)
+        parallel = [self.read(dst) for _, dst in pages]
+        self.assertEqual(parallel, serial)
+        self.assertEqual(parallel_log.count('Generated '), 6)
+        # every worker has its own inline memo, hits depend on the batches
+        pages_log = lambda log: [line for line in log.splitlines()
+                                 if not line.startswith('Inline memo')]
+        self.assertEqual(pages_log(parallel_log), pages_log(serial_log))
+
+    def test_parallel_errors_are_collected(self):
+        with open(os.path.join(self.root, 'content', 'dir0', 'page0.md'), 'w') as f:
+            f.write('no title here\n')
+        self.assertRaisesRegex(Exception, r'1 page\(s\) failed:\n.*page0.md: No title found',
+                               self.build, 2)
+
+class TestGeneratePageStreaming(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.write('template.html', TEMPLATE)
+        self.src = os.path.join(self.root, 'page.md')
+
+    def generate(self, markdown, **options):
+        self.write('page.md', markdown)
+        dst = os.path.join(self.root, 'page.html')
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_page(self.template, self.src, dst, **options)
+        with open(dst) as f:
+            return f.read()
+
+    def test_streaming_matches_in_memory(self):
+        markdown = ('Intro *text*\n\n# The title\n\n* a\n* b\n\n'
+                    '```\ncode\n```\n\n> quote\n')
+        self.assertEqual(self.generate(markdown, stream_above=0),
+                         self.generate(markdown))
+
+    def test_cached_matches_uncached(self):
+        markdown = '# The title\n\nSome **bold** text\n'
+        cache = DocumentCache(os.path.join(self.root, 'cache'))
+        expect = self.generate(markdown)
+        self.assertEqual(self.generate(markdown, cache=cache), expect)
+        self.assertEqual(self.generate(markdown, cache=cache), expect)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_small_pages_are_not_streamed(self):
+        self.write('page.md', '# Title\n')
+        log = io.StringIO()
+        buildlog.configure('verbose', log)
+        try:
+            generate_page(self.template, self.src,
+                          os.path.join(self.root, 'page.html'),
+                          stream_above=1000)
+            buildlog.flush()
+        finally:
+            buildlog.configure()
+        self.assertTrue(log.getvalue().startswith('Generated '))
+
+    def test_streaming_error_leaves_no_output(self):
+        self.assertRaisesRegex(Exception, 'No title found',
+                               self.generate, 'no title\n', stream_above=0)
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'page.html')))
+
+class TestBuildIncremental(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.write('template.html', TEMPLATE)
+        self.write('content/index.md', '# Home\n')
+        self.write('content/blog/post.md', '# Post\n')
+        self.write('static/index.css', 'body {}\n')
+        self.dst = os.path.join(self.root, 'public')
+        self.build()
+
+    def tearDown(self):
+        buildlog.configure()
+
+    def build(self):
+        # Returns the sources of the pages that were generated
+        log = io.StringIO()
+        buildlog.configure('verbose', log)
+        build_incremental(self.template, os.path.join(self.root, 'static'),
+                          os.path.join(self.root, 'content'), self.dst,
+                          os.path.join(self.root, 'manifest.json'))
+        return sorted(os.path.relpath(line.split()[3], self.root)
+                      for line in log.getvalue().splitlines()
+                      if line.startswith('Generated '))
+
+    def test_only_the_edited_page_is_generated(self):
+        self.assertEqual(self.build(), [])
+        self.write('content/blog/post.md', '# Edited\n')
+        self.assertEqual(self.build(), [os.path.join('content', 'blog', 'post.md')])
+        with open(os.path.join(self.dst, 'blog', 'post.html')) as f:
+            self.assertIn('Edited', f.read())
+
+    def test_output_of_removed_source_is_deleted(self):
+        os.remove(os.path.join(self.root, 'content', 'blog', 'post.md'))
+        self.assertEqual(self.build(), [])
+        self.assertFalse(os.path.exists(os.path.join(self.dst, 'blog', 'post.html')))
+        self.assertTrue(os.path.isfile(os.path.join(self.dst, 'index.html')))
+
+    def test_template_change_generates_every_page(self):
+        self.write('template.html', '<h1>{{ Title }}</h1>\n{{ Content }}\n')
+        self.assertEqual(self.build(), [os.path.join('content', 'blog', 'post.md'),
+                                        os.path.join('content', 'index.md')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import unittest
+
+from manifest import Manifest, file_record, hash_file
+from testcase import TempDirTestCase
+
+class TestFileRecord(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = self.write('page.md', '# Title\n')
+
+    def test_new_file_is_changed(self):
+        record, changed = file_record(self.path)
+        self.assertTrue(changed)
+        self.assertEqual(record['size'], 8)
+        self.assertEqual(record['hash'], hash_file(self.path))
+
+    def test_same_stat_is_unchanged(self):
+        record, _ = file_record(self.path)
+        again, changed = file_record(self.path, record)
+        self.assertFalse(changed)
+        self.assertIs(again, record)
+
+    def test_touched_but_same_content_is_unchanged(self):
+        record, _ = file_record(self.path)
+        st = os.stat(self.path)
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        again, changed = file_record(self.path, record)
+        self.assertFalse(changed)
+        self.assertNotEqual(again['mtime'], record['mtime'])
+
+    def test_modified_content_is_changed(self):
+        record, _ = file_record(self.path)
+        with open(self.path, 'w') as f:
+            f.write('# Other title\n')
+        _, changed = file_record(self.path, record)
+        self.assertTrue(changed)
+
+class TestManifest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.root, 'cache', 'manifest.json')
+
+    def test_missing_manifest_is_empty(self):
+        manifest = Manifest.load(self.path)
+        self.assertIs(manifest.template, None)
+        self.assertEqual(manifest.pages, {})
+
+    def test_round_trip(self):
+        record = {'mtime': 1, 'size': 2, 'hash': 'abc', 'output': 'index.html'}
+        Manifest('tpl', {'index.md': record}).save(self.path)
+        manifest = Manifest.load(self.path)
+        self.assertEqual(manifest.template, 'tpl')
+        self.assertEqual(manifest.pages, {'index.md': record})
+
+    def test_corrupt_manifest_is_empty(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w') as f:
+            f.write('{not json')
+        self.assertIs(Manifest.load(self.path).template, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from parentnode import ParentNode
@@ -48,6 +49,34 @@ class TestParentNode(unittest.TestCase):
         ])
         self.assertEqual(node.to_html(), expected_html)
 
+    def test_iter_html(self):
+        node = ParentNode('ul', [
+            LeafNode('li', 'Apple salad'),
+            ParentNode('li', [LeafNode('b', 'Orange'), LeafNode(None, ' juice')])
+        ])
+        self.assertEqual(list(node.iter_html()), [
+            '<ul>',
+            '<li>Apple salad</li>',
+            '<li>', '<b>Orange</b>', ' juice', '</li>',
+            '</ul>'
+        ])
+
+    def test_write_html(self):
+        node = ParentNode('p', [
+            LeafNode(None, 'Check out '),
+            LeafNode('a', 'this site', props={'href': 'https://github.com'})
+        ])
+        out = io.StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), node.to_html())
+        chunks = []
+        node.write_html(chunks)
+        self.assertEqual(''.join(chunks), node.to_html())
+
+    def test_iter_html_error_no_children(self):
+        node = ParentNode('p', [])
+        self.assertRaisesRegex(ValueError, 'ParentNode must have children', node.iter_html)
+
     def test_is_parentnode(self):
         node = ParentNode('head', [LeafNode('title', 'Awesome title')])
         self.assertIs(type(node), ParentNode)
@@ -0,0 +1,125 @@
+import contextlib
+import gzip
+import io
+import os
+import unittest
+from unittest import mock
+
+import precompress
+from main import build
+from precompress import precompress_file, precompress_tree
+from testcase import TempDirTestCase
+
+TEXT = '<p>The road goes ever on and on</p>\n' * 100
+
+class TestPrecompress(TempDirTestCase):
+    def test_writes_siblings(self):
+        path = self.write('index.html', TEXT)
+        stats = precompress_file(path)
+        self.assertEqual(stats['written'], len(precompress.ENCODINGS))
+        with open(path + '.gz', 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()).decode(), TEXT)
+        self.assertEqual(os.stat(path + '.gz').st_mtime_ns, os.stat(path).st_mtime_ns)
+
+    def test_unchanged_output_is_skipped(self):
+        path = self.write('index.html', TEXT)
+        precompress_file(path)
+        self.assertEqual(precompress_file(path)['written'], 0)
+        # rewritten with the same bytes, only the mtime moves
+        self.write('index.html', TEXT)
+        os.utime(path, ns=(0, os.stat(path + '.gz').st_mtime_ns + 10**9))
+        stats = precompress_file(path)
+        self.assertEqual(stats['written'], 0)
+        self.assertEqual(stats['unchanged'], len(precompress.ENCODINGS))
+        self.assertEqual(os.stat(path + '.gz').st_mtime_ns, os.stat(path).st_mtime_ns)
+
+    def test_current_output_is_not_read(self):
+        path = self.write('index.html', TEXT)
+        precompress_file(path)
+        with mock.patch('builtins.open', side_effect=AssertionError('read')):
+            stats = precompress_file(path)
+        self.assertEqual(stats['unchanged'], len(precompress.ENCODINGS))
+
+    def test_changed_output_is_recompressed(self):
+        path = self.write('index.html', TEXT)
+        precompress_file(path)
+        self.write('index.html', TEXT + '<p>edited</p>\n')
+        os.utime(path, ns=(0, os.stat(path + '.gz').st_mtime_ns + 10**9))
+        self.assertEqual(precompress_file(path)['written'], len(precompress.ENCODINGS))
+        with open(path + '.gz', 'rb') as f:
+            self.assertIn(b'edited', gzip.decompress(f.read()))
+
+    def test_backdated_output_is_recompressed(self):
+        # replaced by an older file, e.g. with cp -p, the sibling is newer
+        path = self.write('index.html', TEXT)
+        precompress_file(path)
+        self.write('index.html', TEXT + '<p>edited</p>\n')
+        os.utime(path, ns=(0, os.stat(path + '.gz').st_mtime_ns - 10**9))
+        self.assertEqual(precompress_file(path)['written'], len(precompress.ENCODINGS))
+        with open(path + '.gz', 'rb') as f:
+            self.assertIn(b'edited', gzip.decompress(f.read()))
+
+    def test_small_and_incompressible_files_are_skipped(self):
+        small = self.write('small.html', '<p>hi</p>\n')
+        noise = self.write('noise.txt', os.urandom(4096))
+        self.assertEqual(precompress_file(small)['written'], 0)
+        self.assertEqual(precompress_file(noise)['written'], 0)
+        self.assertFalse(os.path.exists(small + '.gz'))
+        self.assertFalse(os.path.exists(noise + '.gz'))
+
+    def test_shrunk_output_loses_its_sibling(self):
+        path = self.write('index.html', TEXT)
+        precompress_file(path)
+        self.write('index.html', '<p>short</p>\n')
+        self.assertEqual(precompress_file(path)['removed'], len(precompress.ENCODINGS))
+        self.assertFalse(os.path.exists(path + '.gz'))
+
+    def test_tree(self):
+        self.write('index.html', TEXT)
+        self.write('blog/post.html', TEXT)
+        self.write('index.css', 'body { margin: 0 }\n' * 100)
+        self.write('images/a.png', os.urandom(4096))
+        self.write('gone.html.gz', gzip.compress(b'gone'))
+        stats = precompress_tree(self.root, jobs=2)
+        self.assertEqual(stats['written'], 3 * len(precompress.ENCODINGS))
+        self.assertEqual(stats['removed'], 1)
+        for rel in ('index.html.gz', 'blog/post.html.gz', 'index.css.gz'):
+            self.assertTrue(os.path.isfile(os.path.join(self.root, rel)))
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'images', 'a.png.gz')))
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'gone.html.gz')))
+
+    def test_build_keeps_siblings(self):
+        template = self.write('template.html', '<title>{{ Title }}</title>\n{{ Content }}\n')
+        self.write('content/index.md', '# Home\n\n' + 'Some *text* here.\n' * 200)
+        self.write('static/index.css', 'body { margin: 0 }\n' * 100)
+        dst = os.path.join(self.root, 'public')
+        args = (template, os.path.join(self.root, 'static'),
+                os.path.join(self.root, 'content'), dst)
+        with contextlib.redirect_stdout(io.StringIO()):
+            build(*args, precompress_options={})
+            build(*args, precompress_options={})
+        self.assertTrue(os.path.isfile(os.path.join(dst, 'index.html.gz')))
+        self.assertTrue(os.path.isfile(os.path.join(dst, 'index.css.gz')))
+        with contextlib.redirect_stdout(io.StringIO()):
+            build(*args)
+        self.assertFalse(os.path.exists(os.path.join(dst, 'index.html.gz')))
+
+    def test_build_with_backdated_source(self):
+        # cp -p, rsync -a and tar x keep the old mtime of the new content
+        template = self.write('template.html', '{{ Title }}\n{{ Content }}\n')
+        self.write('content/index.md', '# Home\n')
+        css = self.write('static/app.css', 'body { margin: 0 }\n' * 100)
+        dst = os.path.join(self.root, 'public')
+        args = (template, os.path.join(self.root, 'static'),
+                os.path.join(self.root, 'content'), dst)
+        with contextlib.redirect_stdout(io.StringIO()):
+            build(*args, precompress_options={})
+        self.write('static/app.css', 'body { padding: 0 }\n' * 100)
+        os.utime(css, ns=(0, 1672531200 * 10**9))
+        with contextlib.redirect_stdout(io.StringIO()):
+            build(*args, precompress_options={})
+        with open(os.path.join(dst, 'app.css.gz'), 'rb') as f:
+            self.assertIn(b'padding', gzip.decompress(f.read()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import io
+import sys
+import unittest
+
+from htmlnode import HTMLNode
+from leafnode import LeafNode
+from parentnode import ParentNode
+from render import iter_html, write_html, render_html
+from transformers import markdown_to_htmlnode
+
+MARKDOWN = '''# Heading with *italic*
+
+A paragraph with **bold**, `code`, a [link](https://example.com) and an
+image ![alt](/images/a.png).
+
+> quoted **text**
+
+* one
+* two
+
+1. first
+2. second
+
+```
+code block
+```
+'''
+
+class TestRenderHTML(unittest.TestCase):
+    def test_same_as_to_html(self):
+        node = markdown_to_htmlnode(MARKDOWN)
+        self.assertEqual(render_html(node), node.to_html())
+
+    def test_same_chunks_as_iter_html(self):
+        node = markdown_to_htmlnode(MARKDOWN)
+        self.assertEqual(list(iter_html(node)), list(node.iter_html()))
+
+    def test_leaf(self):
+        node = LeafNode('a', 'GitHub', props={'href': 'https://github.com'})
+        self.assertEqual(render_html(node), node.to_html())
+
+    def test_deep_tree(self):
+        depth = sys.getrecursionlimit() * 10
+        node = LeafNode(None, 'deep')
+        for _ in range(depth):
+            node = ParentNode('div', [node])
+        html = render_html(node)
+        self.assertEqual(html, '<div>' * depth + 'deep' + '</div>' * depth)
+
+    def test_write_html(self):
+        node = markdown_to_htmlnode(MARKDOWN)
+        out = io.StringIO()
+        write_html(node, out)
+        self.assertEqual(out.getvalue(), node.to_html())
+
+    def test_errors(self):
+        node = ParentNode('div', [ParentNode('p', [])])
+        self.assertRaisesRegex(ValueError, 'ParentNode must have children',
+                               render_html, node)
+        node = ParentNode('div', [ParentNode(None, [LeafNode(None, 'x')])])
+        self.assertRaisesRegex(ValueError, 'ParentNode must have a tag',
+                               render_html, node)
+        node = ParentNode('div', [HTMLNode('p', 'x')])
+        self.assertRaises(NotImplementedError, render_html, node)
+
+
+if __name__ == '__main__':
+    unittest.main()
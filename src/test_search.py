@@ -0,0 +1,190 @@
+import contextlib
+import io
+import json
+import os
+import unittest
+from unittest import mock
+
+import state
+import transformers
+from doccache import DocumentCache
+from main import build, build_incremental, clean_build, generate_page
+from search import SearchIndex, decode_postings, encode_postings, text_words
+from testcase import TempDirTestCase
+
+class SearchTestCase(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.state = os.path.join(self.root, 'search.json')
+        self.public = os.path.join(self.root, 'public')
+
+    def shard(self, prefix):
+        path = os.path.join(self.public, 'search', prefix + '.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return {word: decode_postings(deltas) for word, deltas in json.load(f).items()}
+
+    def table(self):
+        with open(os.path.join(self.public, 'search', 'index.json')) as f:
+            return json.load(f)['pages']
+
+class TestSearchIndex(SearchTestCase):
+    def test_postings(self):
+        self.assertEqual(encode_postings([3, 4, 10]), [3, 1, 6])
+        self.assertEqual(decode_postings([3, 1, 6]), [3, 4, 10])
+
+    def test_text_words(self):
+        self.assertEqual(text_words('The Hobbit, or There and Back Again! A 2nd'),
+                         ['the', 'hobbit', 'or', 'there', 'and', 'back', 'again', '2nd'])
+
+    def test_write(self):
+        index = SearchIndex(self.state)
+        index.update('a.md', '/a', 'A', ['shire', 'hobbit', 'shire'])
+        index.update('b.md', '/b', 'B', ['shire', 'ring'])
+        index.write(self.public)
+        self.assertEqual(self.shard('sh'), {'shire': [0, 1]})
+        self.assertEqual(self.shard('ho'), {'hobbit': [0]})
+        self.assertEqual(self.table(), [['/a', 'A'], ['/b', 'B']])
+
+    def test_only_changed_shards_are_written(self):
+        index = SearchIndex(self.state)
+        index.update('a.md', '/a', 'A', ['shire', 'hobbit'])
+        index.update('b.md', '/b', 'B', ['ring'])
+        index.write(self.public)
+
+        index = SearchIndex(self.state)
+        index.update('a.md', '/a', 'A', ['shire', 'wizard'])
+        index.update('b.md', '/b', 'B', ['ring'])
+        written = index.write(self.public)
+        # the emptied shard is removed
+        self.assertEqual(sorted(os.path.basename(path) for path in written),
+                         ['index.json', 'wi.json'])
+        self.assertIsNone(self.shard('ho'))
+        self.assertEqual(self.shard('wi'), {'wizard': [0]})
+        self.assertEqual(self.shard('ri'), {'ring': [1]})
+        self.assertEqual(SearchIndex(self.state).write(self.public), [])
+
+    def test_removed_ids_are_reused(self):
+        index = SearchIndex(self.state)
+        for name in 'abc':
+            index.update(f'{name}.md', f'/{name}', name, ['elf'])
+        index.write(self.public)
+        index.remove('b.md')
+        index.write(self.public)
+        self.assertEqual(self.shard('el'), {'elf': [0, 2]})
+        self.assertEqual(self.table(), [['/a', 'a'], None, ['/c', 'c']])
+        index = SearchIndex(self.state)
+        index.update('d.md', '/d', 'd', ['elf'])
+        index.write(self.public)
+        self.assertEqual(self.shard('el'), {'elf': [0, 1, 2]})
+        self.assertEqual(self.table()[1], ['/d', 'd'])
+        index.update('e.md', '/e', 'e', ['elf'])
+        self.assertEqual(index.pages['e.md']['id'], 3)
+
+    def test_lost_output_is_written_again(self):
+        index = SearchIndex(self.state)
+        index.update('a.md', '/a', 'A', ['shire', 'hobbit'])
+        index.write(self.public)
+        os.remove(os.path.join(self.public, 'search', 'index.json'))
+        written = SearchIndex(self.state).write(self.public)
+        self.assertEqual(len(written), 3)
+        self.assertEqual(self.shard('sh'), {'shire': [0]})
+
+class TestPageWords(SearchTestCase):
+    markdown = ('# The Shire\n\nHome of [the hobbits](/hobbits) and `pipes`\n\n'
+                '* ![a map](/map.png)\n\n```\nnot indexed\n```\n')
+    # sorted, without one letter words, code blocks and URLs
+    words = ['and', 'hobbits', 'home', 'map', 'of', 'pipes', 'shire', 'the']
+
+    def setUp(self):
+        super().setUp()
+        self.template = self.write('template.html', '{{ Title }}\n{{ Content }}\n')
+        self.src = self.write('page.md', self.markdown)
+        self.memo = transformers.inline_memo
+
+    def tearDown(self):
+        transformers.inline_memo = self.memo
+
+    def generate(self, **options):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return generate_page(self.template, self.src,
+                                 os.path.join(self.root, 'page.html'),
+                                 words=True, **options)
+
+    def test_words(self):
+        expect = self.words
+        for memo_size in (0, 1024 * 1024):
+            transformers.set_inline_memo_size(memo_size)
+            info = self.generate()
+            self.assertEqual((info['title'], info['words']), ('The Shire', expect))
+            self.assertEqual(self.generate()['words'], expect)
+        self.assertEqual(self.generate(stream_above=0)['words'], expect)
+
+    def test_words_memoized_without_them(self):
+        transformers.set_inline_memo_size(1024 * 1024)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_page(self.template, self.src, os.path.join(self.root, 'page.html'))
+        self.assertIn('hobbits', self.generate()['words'])
+
+    def test_cached(self):
+        cache = DocumentCache(os.path.join(self.root, 'cache'))
+        cache.put(cache.key(self.markdown), 'The Shire', '<div></div>')
+        expect = self.generate()['words']
+        self.assertEqual(self.generate(cache=cache)['words'], expect)
+        self.assertEqual(self.generate(cache=cache)['words'], expect)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+class TestSearchBuild(SearchTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.write('template.html', '{{ Title }}\n{{ Content }}\n')
+        self.write('content/index.md', '# Home\n\nThe shire\n')
+        self.write('content/ring/index.md', '# The Ring\n\nOne ring to rule them all\n')
+        self.write('static/index.css', 'body {}\n')
+        self.args = (self.template, os.path.join(self.root, 'static'),
+                     os.path.join(self.root, 'content'), self.public)
+
+    def build(self, function=build, **options):
+        with contextlib.redirect_stdout(io.StringIO()):
+            function(*self.args, search=self.state, **options)
+
+    def test_build(self):
+        self.build()
+        self.assertEqual(self.table(), [['/', 'Home'], ['/ring/', 'The Ring']])
+        self.assertEqual(self.shard('th'), {'the': [0, 1], 'them': [1]})
+        self.build(jobs=2)
+        self.assertEqual(self.shard('th'), {'the': [0, 1], 'them': [1]})
+        self.build(clean_build)
+        self.assertEqual(self.shard('th'), {'the': [0, 1], 'them': [1]})
+
+    def test_incremental(self):
+        manifest = os.path.join(self.root, 'manifest.json')
+        self.build(build_incremental, manifest_path=manifest)
+        self.write('content/index.md', '# Home\n\nThe wizard\n')
+        os.remove(os.path.join(self.root, 'content', 'ring', 'index.md'))
+        with mock.patch('state.write_json', wraps=state.write_json) as write:
+            self.build(build_incremental, manifest_path=manifest)
+        names = sorted(os.path.basename(call.args[0]) for call in write.call_args_list
+                       if call.args[0] != manifest)
+        self.assertEqual(names, ['index.json', 'search.json', 'th.json', 'wi.json'])
+        self.assertEqual(self.shard('th'), {'the': [0]})
+        self.assertEqual(self.shard('wi'), {'wizard': [0]})
+        for prefix in ('on', 'ri', 'ru', 'sh', 'to'):
+            self.assertIsNone(self.shard(prefix))
+        self.assertEqual(self.table(), [['/', 'Home']])
+
+    def test_index_survives_static_sync(self):
+        self.build()
+        self.write('static/robots.txt', 'User-agent: *\n')
+        self.build()
+        self.assertTrue(os.path.isfile(os.path.join(self.public, 'search', 'index.json')))
+        # without search the index goes with the other orphans
+        with contextlib.redirect_stdout(io.StringIO()):
+            build(*self.args)
+        self.assertFalse(os.path.exists(os.path.join(self.public, 'search', 'index.json')))
+        self.build()
+        self.assertEqual(self.shard('sh'), {'shire': [0]})
+
+if __name__ == '__main__':
+    unittest.main()
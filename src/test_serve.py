@@ -0,0 +1,206 @@
+import gzip
+import http.client
+import json
+import os
+import threading
+import time
+import unittest
+
+from serve import StaticServer, accepts_gzip, parse_range
+from testcase import TempDirTestCase
+
+class TestParseRange(unittest.TestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range('bytes=0-9', 100), (0, 9))
+        self.assertEqual(parse_range('bytes=90-', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=50-500', 100), (50, 99))
+        self.assertEqual(parse_range('bytes=-500', 100), (0, 99))
+
+    def test_unsatisfiable(self):
+        self.assertIs(parse_range('bytes=100-', 100), False)
+        self.assertIs(parse_range('bytes=-0', 100), False)
+
+    def test_ignored(self):
+        self.assertIsNone(parse_range('items=0-9', 100))
+        self.assertIsNone(parse_range('bytes=0-9,20-29', 100))
+        self.assertIsNone(parse_range('bytes=9-0', 100))
+        self.assertIsNone(parse_range('bytes=a-b', 100))
+
+class TestAcceptsGzip(unittest.TestCase):
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip('gzip, deflate, br'))
+        self.assertTrue(accepts_gzip('br;q=1.0, gzip;q=0.8'))
+        self.assertTrue(accepts_gzip('*'))
+        self.assertFalse(accepts_gzip('gzip;q=0'))
+        self.assertFalse(accepts_gzip('br'))
+        self.assertFalse(accepts_gzip(''))
+
+class TestStaticServer(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.body = b'<h1>Hello</h1>\n' * 100
+        self.write('index.html', self.body)
+        self.write('blog/post.html', b'<p>post</p>\n')
+        self.server = StaticServer(('127.0.0.1', 0), self.root, workers=2,
+                                   quiet=True)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def request(self, path, method='GET', **headers):
+        connection = http.client.HTTPConnection(*self.server.server_address[:2])
+        try:
+            connection.request(method, path, headers=headers)
+            response = connection.getresponse()
+            return response, response.read()
+        finally:
+            connection.close()
+
+    def test_idle_connections_do_not_hold_the_workers(self):
+        # both workers have an idle keep-alive connection
+        address = self.server.server_address[:2]
+        idle = [http.client.HTTPConnection(*address) for _ in range(2)]
+        try:
+            for connection in idle:
+                connection.request('GET', '/')
+                connection.getresponse().read()
+            start = time.perf_counter()
+            response, body = self.request('/')
+            self.assertLess(time.perf_counter() - start, 2)
+            self.assertEqual(body, self.body)
+            # the idle connections were closed to make room, a new one works
+            connection = idle[0]
+            connection.close()
+            connection.request('GET', '/')
+            self.assertEqual(connection.getresponse().status, 200)
+        finally:
+            for connection in idle:
+                connection.close()
+
+    def test_get(self):
+        response, body = self.request('/')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, self.body)
+        self.assertEqual(response.getheader('Content-Type'), 'text/html')
+        self.assertEqual(response.getheader('Content-Length'), str(len(self.body)))
+        self.assertIsNotNone(response.getheader('ETag'))
+        self.assertIsNotNone(response.getheader('Last-Modified'))
+
+    def test_head(self):
+        response, body = self.request('/index.html', 'HEAD')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, b'')
+        self.assertEqual(response.getheader('Content-Length'), str(len(self.body)))
+
+    def test_keep_alive(self):
+        connection = http.client.HTTPConnection(*self.server.server_address[:2])
+        try:
+            for path in ('/', '/blog/post.html', '/'):
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                self.assertEqual(response.status, 200)
+        finally:
+            connection.close()
+
+    def test_not_found(self):
+        response, _ = self.request('/missing.html')
+        self.assertEqual(response.status, 404)
+        # no directory listings
+        os.remove(os.path.join(self.root, 'blog', 'post.html'))
+        response, _ = self.request('/blog/')
+        self.assertEqual(response.status, 404)
+
+    def test_directory_redirect(self):
+        response, _ = self.request('/blog?x=1')
+        self.assertEqual(response.status, 301)
+        self.assertEqual(response.getheader('Location'), '/blog/?x=1')
+
+    def test_if_none_match(self):
+        response, _ = self.request('/')
+        etag = response.getheader('ETag')
+        response, body = self.request('/', **{'If-None-Match': etag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(body, b'')
+        response, _ = self.request('/', **{'If-None-Match': '"other"'})
+        self.assertEqual(response.status, 200)
+
+    def test_if_modified_since(self):
+        response, _ = self.request('/')
+        last_modified = response.getheader('Last-Modified')
+        response, _ = self.request('/', **{'If-Modified-Since': last_modified})
+        self.assertEqual(response.status, 304)
+        response, _ = self.request('/', **{'If-Modified-Since': 'Thu, 01 Jan 1970 00:00:00 GMT'})
+        self.assertEqual(response.status, 200)
+
+    def test_range(self):
+        response, body = self.request('/', Range='bytes=15-29')
+        self.assertEqual(response.status, 206)
+        self.assertEqual(body, self.body[15:30])
+        self.assertEqual(response.getheader('Content-Range'),
+                         f'bytes 15-29/{len(self.body)}')
+        response, body = self.request('/', Range='bytes=-5')
+        self.assertEqual(body, self.body[-5:])
+
+    def test_range_not_satisfiable(self):
+        response, _ = self.request('/', Range=f'bytes={len(self.body)}-')
+        self.assertEqual(response.status, 416)
+        self.assertEqual(response.getheader('Content-Range'), f'bytes */{len(self.body)}')
+
+    def test_stale_if_range(self):
+        response, body = self.request('/', Range='bytes=0-4', **{'If-Range': '"old"'})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, self.body)
+
+    def test_gzip_sibling(self):
+        gz = self.write('index.html.gz', gzip.compress(self.body))
+        st = os.stat(os.path.join(self.root, 'index.html'))
+        os.utime(gz, ns=(st.st_atime_ns, st.st_mtime_ns))
+        response, body = self.request('/', **{'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader('Content-Encoding'), 'gzip')
+        self.assertEqual(response.getheader('Content-Type'), 'text/html')
+        self.assertEqual(response.getheader('Vary'), 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(body), self.body)
+        gzip_etag = response.getheader('ETag')
+        response, body = self.request('/')
+        self.assertIsNone(response.getheader('Content-Encoding'))
+        self.assertEqual(body, self.body)
+        self.assertNotEqual(response.getheader('ETag'), gzip_etag)
+
+    def test_stale_gzip_sibling_is_ignored(self):
+        gz = self.write('index.html.gz', gzip.compress(b'old'))
+        st = os.stat(os.path.join(self.root, 'index.html'))
+        for offset in (-10**9, 10**9):
+            # a newer sibling is stale too, the file may have been replaced
+            # by an older one
+            os.utime(gz, ns=(st.st_atime_ns, st.st_mtime_ns + offset))
+            response, body = self.request('/', **{'Accept-Encoding': 'gzip'})
+            self.assertIsNone(response.getheader('Content-Encoding'))
+            self.assertEqual(body, self.body)
+
+    def test_fingerprinted_files_are_immutable(self):
+        self.write('index.0123456789.css', b'body {}\n')
+        response, _ = self.request('/index.0123456789.css')
+        self.assertIn('immutable', response.getheader('Cache-Control'))
+        response, _ = self.request('/')
+        self.assertIsNone(response.getheader('Cache-Control'))
+
+    def test_stats(self):
+        self.request('/')
+        self.request('/missing.html')
+        response, body = self.request('/_stats')
+        self.assertEqual(response.getheader('Content-Type'), 'application/json')
+        stats = json.loads(body)
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['statuses'], {'200': 1, '404': 1})
+        self.assertEqual(stats['bytes'], len(self.body))
+        self.assertEqual(sum(stats['latency_ms']['buckets'].values()), 2)
+
+if __name__ == '__main__':
+    unittest.main()
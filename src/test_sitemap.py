@@ -0,0 +1,134 @@
+import contextlib
+import io
+import os
+import unittest
+import xml.etree.ElementTree as ET
+
+from main import build, build_incremental, rebuild_changes
+from sitemap import w3c_time, write_feed, write_sitemap
+from testcase import TempDirTestCase
+
+SITEMAP = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+class SitemapTestCase(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.public = os.path.join(self.root, 'public')
+        os.makedirs(self.public)
+
+    def parse(self, name):
+        return ET.parse(os.path.join(self.public, name)).getroot()
+
+    def locs(self, name):
+        return [loc.text for loc in self.parse(name).iter(SITEMAP + 'loc')]
+
+class TestSitemap(SitemapTestCase):
+    pages = [{'url': f'/page{i}/', 'title': f'Page {i}', 'mtime': i * 10**9}
+             for i in range(5)]
+
+    def test_w3c_time(self):
+        self.assertEqual(w3c_time(86400 * 10**9 + 1), '1970-01-02T00:00:00Z')
+
+    def test_single_file(self):
+        written = write_sitemap(self.public, 'https://example.com/', self.pages)
+        self.assertEqual(written, [os.path.join(self.public, 'sitemap.xml')])
+        self.assertEqual(self.locs('sitemap.xml'),
+                         [f'https://example.com/page{i}/' for i in range(5)])
+        lastmod = self.parse('sitemap.xml').find(f'{SITEMAP}url/{SITEMAP}lastmod')
+        self.assertEqual(lastmod.text, '1970-01-01T00:00:00Z')
+
+    def test_split(self):
+        written = write_sitemap(self.public, 'https://example.com', self.pages, limit=2)
+        self.assertEqual([os.path.basename(path) for path in written],
+                         ['sitemap-1.xml', 'sitemap-2.xml', 'sitemap-3.xml', 'sitemap.xml'])
+        self.assertEqual(self.parse('sitemap.xml').tag, SITEMAP + 'sitemapindex')
+        self.assertEqual(self.locs('sitemap.xml'),
+                         [f'https://example.com/sitemap-{i}.xml' for i in (1, 2, 3)])
+        self.assertEqual(self.locs('sitemap-3.xml'), ['https://example.com/page4/'])
+        # parts of a larger site don't stay behind
+        write_sitemap(self.public, 'https://example.com', self.pages[:3], limit=2)
+        self.assertFalse(os.path.exists(os.path.join(self.public, 'sitemap-3.xml')))
+        write_sitemap(self.public, 'https://example.com', self.pages[:2], limit=2)
+        self.assertEqual(sorted(os.listdir(self.public)), ['sitemap.xml'])
+
+    def test_feed(self):
+        pages = self.pages + [{'url': '/a&b/', 'title': 'Fish & <Chips>', 'mtime': 10**10}]
+        path = write_feed(os.path.join(self.public, 'feed.xml'), 'https://example.com',
+                          'Site', pages, entries=3)
+        feed = ET.parse(path).getroot()
+        self.assertEqual(feed.find(ATOM + 'title').text, 'Site')
+        self.assertEqual(feed.find(ATOM + 'updated').text, '1970-01-01T00:00:10Z')
+        entries = feed.findall(ATOM + 'entry')
+        self.assertEqual([entry.find(ATOM + 'title').text for entry in entries],
+                         ['Fish & <Chips>', 'Page 4', 'Page 3'])
+        self.assertEqual(entries[0].find(ATOM + 'link').get('href'),
+                         'https://example.com/a&b/')
+
+    def test_feed_by_date(self):
+        # a dated page is placed by its date, not by when it was last edited
+        pages = [dict(self.pages[4], date='1970-01-01T00:00:01'),
+                 dict(self.pages[1], date='1970-01-02')] + self.pages[2:4]
+        path = write_feed(os.path.join(self.public, 'feed.xml'), 'https://example.com',
+                          'Site', pages)
+        entries = ET.parse(path).getroot().findall(ATOM + 'entry')
+        self.assertEqual([entry.find(ATOM + 'title').text for entry in entries],
+                         ['Page 1', 'Page 3', 'Page 2', 'Page 4'])
+        self.assertEqual(entries[0].find(ATOM + 'updated').text, '1970-01-02T00:00:00Z')
+
+class TestSiteFilesBuild(SitemapTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.write('template.html', '{{ Title }}\n{{ Content }}\n')
+        self.write('content/index.md', '# Home\n')
+        self.write('content/a.md', '# A\n')
+        self.write('static/index.css', 'body {}\n')
+        self.content = os.path.join(self.root, 'content')
+        self.args = (self.template, os.path.join(self.root, 'static'),
+                     self.content, self.public)
+        self.site = {'url': 'https://example.com',
+                     'pages_path': os.path.join(self.root, 'pages.json')}
+
+    def build(self, function=build, **options):
+        with contextlib.redirect_stdout(io.StringIO()):
+            function(*self.args, site_options=self.site, **options)
+
+    def feed_titles(self):
+        return [entry.find(ATOM + 'title').text
+                for entry in self.parse('feed.xml').iter(ATOM + 'entry')]
+
+    def test_build(self):
+        self.build(jobs=2)
+        self.assertEqual(self.locs('sitemap.xml'),
+                         ['https://example.com/', 'https://example.com/a.html'])
+        self.assertEqual(self.parse('feed.xml').find(ATOM + 'title').text, 'Home')
+        self.assertEqual(sorted(self.feed_titles()), ['A', 'Home'])
+
+    def test_incremental(self):
+        manifest = os.path.join(self.root, 'manifest.json')
+        self.build(build_incremental, manifest_path=manifest)
+        self.write('content/b.md', '# B\n')
+        os.remove(os.path.join(self.content, 'a.md'))
+        self.build(build_incremental, manifest_path=manifest)
+        self.assertEqual(self.locs('sitemap.xml'),
+                         ['https://example.com/', 'https://example.com/b.html'])
+        # nothing changed, nothing is written
+        mtime = os.stat(os.path.join(self.public, 'sitemap.xml')).st_mtime_ns
+        os.utime(os.path.join(self.public, 'sitemap.xml'), ns=(0, 0))
+        self.build(build_incremental, manifest_path=manifest)
+        self.assertEqual(os.stat(os.path.join(self.public, 'sitemap.xml')).st_mtime_ns, 0)
+        self.assertNotEqual(mtime, 0)
+
+    def test_rebuild_changes(self):
+        self.build()
+        path = self.write('content/a.md', '# A again\n')
+        with contextlib.redirect_stdout(io.StringIO()):
+            rebuild_changes(*self.args, [path], [os.path.join(self.content, 'index.md')],
+                            site_options=self.site)
+        self.assertEqual(self.feed_titles(), ['A again'])
+        # the feed has no home page to take its title from
+        self.assertEqual(self.parse('feed.xml').find(ATOM + 'title').text,
+                         'https://example.com')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import os
+import unittest
+
+from state import load_state, save_state
+from testcase import TempDirTestCase
+
+class TestState(TempDirTestCase):
+    def test_round_trip(self):
+        path = os.path.join(self.root, '.ssg', 'state.json')
+        save_state(path, 2, {'pages': {'é.md': 1}})
+        self.assertEqual(load_state(path, 2), {'version': 2, 'pages': {'é.md': 1}})
+        self.assertFalse(os.path.exists(path + '.tmp'))
+
+    def test_other_version_is_ignored(self):
+        path = os.path.join(self.root, 'state.json')
+        save_state(path, 1, {'pages': {}})
+        self.assertIsNone(load_state(path, 2))
+
+    def test_missing_or_unreadable(self):
+        self.assertIsNone(load_state(os.path.join(self.root, 'missing.json'), 1))
+        self.assertIsNone(load_state(self.write('bad.json', '{"version": 1'), 1))
+        self.assertIsNone(load_state(self.write('list.json', '[1]'), 1))
+
+if __name__ == '__main__':
+    unittest.main()
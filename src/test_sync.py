@@ -0,0 +1,110 @@
+import contextlib
+import io
+import os
+import unittest
+
+from main import copy_files
+from sync import copy_file, sync_tree
+from testcase import TempDirTestCase
+
+class TestSyncTree(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = os.path.join(self.tmp.name, 'static')
+        self.dst = os.path.join(self.tmp.name, 'public')
+        self.write('index.css', 'body {}\n')
+        self.write('images/a.png', 'png bytes')
+
+    def write(self, rel, text, root=None):
+        return super().write(rel, text, root or self.src)
+
+    def sync(self, **options):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return sync_tree(self.src, self.dst, **options)
+
+    def test_first_sync_copies_everything(self):
+        records, stats = self.sync()
+        self.assertEqual(sorted(records), ['images/a.png', 'index.css'])
+        self.assertEqual(stats['copied'], 2)
+        with open(os.path.join(self.dst, 'images', 'a.png')) as f:
+            self.assertEqual(f.read(), 'png bytes')
+
+    def test_repeat_sync_does_nothing(self):
+        self.sync()
+        _, stats = self.sync()
+        self.assertEqual(stats['copied'], 0)
+        self.assertEqual(stats['unchanged'], 2)
+        self.assertEqual(stats['bytes'], 0)
+
+    def test_sync_after_clean_copy_does_nothing(self):
+        os.makedirs(self.dst)
+        with contextlib.redirect_stdout(io.StringIO()):
+            copy_files(self.src, self.dst)
+        _, stats = self.sync()
+        self.assertEqual(stats['copied'], 0)
+        self.assertEqual(stats['bytes'], 0)
+
+    def test_changed_file_is_copied(self):
+        self.sync()
+        path = self.write('index.css', 'body { margin: 0 }\n')
+        _, stats = self.sync()
+        self.assertEqual(stats['copied'], 1)
+        with open(os.path.join(self.dst, 'index.css')) as f:
+            self.assertEqual(f.read(), 'body { margin: 0 }\n')
+
+    def test_hash_skips_touched_file(self):
+        self.sync()
+        path = os.path.join(self.src, 'index.css')
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        _, stats = self.sync(use_hash=True)
+        self.assertEqual(stats['copied'], 0)
+        self.assertEqual(os.stat(os.path.join(self.dst, 'index.css')).st_mtime_ns,
+                         st.st_mtime_ns + 10**9)
+
+    def test_orphans_are_removed_unless_kept(self):
+        self.write('old.css', 'x', root=self.dst)
+        self.write('stale/page.html', 'x', root=self.dst)
+        self.write('index.html', 'x', root=self.dst)
+        _, stats = self.sync(keep={'index.html'})
+        self.assertEqual(stats['removed'], 2)
+        self.assertFalse(os.path.exists(os.path.join(self.dst, 'old.css')))
+        self.assertFalse(os.path.exists(os.path.join(self.dst, 'stale')))
+        self.assertTrue(os.path.exists(os.path.join(self.dst, 'index.html')))
+
+    def test_siblings_are_kept(self):
+        self.write('index.css.gz', 'x', root=self.dst)
+        self.write('index.html.gz', 'x', root=self.dst)
+        self.write('old.css.gz', 'x', root=self.dst)
+        _, stats = self.sync(keep={'index.html'}, sibling_suffixes=('.gz',))
+        self.assertEqual(stats['removed'], 1)
+        self.assertTrue(os.path.exists(os.path.join(self.dst, 'index.css.gz')))
+        self.assertTrue(os.path.exists(os.path.join(self.dst, 'index.html.gz')))
+        self.assertFalse(os.path.exists(os.path.join(self.dst, 'old.css.gz')))
+
+    def test_link(self):
+        _, stats = self.sync(link=True)
+        self.assertEqual(stats['linked'], 2)
+        self.assertTrue(os.path.samefile(os.path.join(self.src, 'index.css'),
+                                         os.path.join(self.dst, 'index.css')))
+        _, stats = self.sync(link=True)
+        self.assertEqual(stats['unchanged'], 2)
+
+class TestCopyFile(TempDirTestCase):
+    def test_copy_file(self):
+        data = os.urandom(1 << 20)
+        src = self.write('src', data)
+        dst = os.path.join(self.root, 'dst')
+        copy_file(src, dst, len(data))
+        with open(dst, 'rb') as f:
+            self.assertEqual(f.read(), data)
+
+    def test_copy_empty_file(self):
+        src = self.write('src', b'')
+        dst = os.path.join(self.root, 'dst')
+        self.assertEqual(copy_file(src, dst, 0), 'read/write')
+        self.assertEqual(os.path.getsize(dst), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
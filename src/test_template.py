@@ -0,0 +1,64 @@
+import os
+import unittest
+
+from leafnode import LeafNode
+from parentnode import ParentNode
+from template import compile_template, load_template
+from testcase import TempDirTestCase
+
+class TestCompileTemplate(unittest.TestCase):
+    def test_segments(self):
+        template = compile_template('<title>{{ Title }}</title>{{ Content }}</html>\n')
+        self.assertEqual(template.segments, [
+            ('<title>', None),
+            (None, 'title'),
+            ('</title>', None),
+            (None, 'content'),
+            ('</html>\n', None)
+        ])
+
+    def test_render_matches_replace(self):
+        text = '<h1>{{ Title }}</h1>\n<p>{{ Content }}</p>\n{{ Title }}'
+        template = compile_template(text)
+        expect = text.replace('{{ Title }}', 'T').replace('{{ Content }}', 'C') + '\n'
+        self.assertEqual(template.render(title='T', content='C'), expect)
+
+    def test_render_keeps_single_trailing_newline(self):
+        template = compile_template('{{ Content }}\n')
+        self.assertEqual(template.render(title='', content='body'), 'body\n')
+
+    def test_render_slot_at_end(self):
+        template = compile_template('<p>{{ Content }}')
+        self.assertEqual(template.render(title='', content='body\n'), '<p>body\n')
+        self.assertEqual(template.render(title='', content=''), '<p>\n')
+
+    def test_render_node(self):
+        template = compile_template('<title>{{ Title }}</title>{{ Content }}')
+        node = ParentNode('div', [LeafNode('b', 'bold'), LeafNode(None, ' text')])
+        self.assertEqual(template.render(title='T', content=node),
+                         '<title>T</title><div><b>bold</b> text</div>\n')
+
+    def test_no_placeholders(self):
+        template = compile_template('static page')
+        self.assertEqual(template.render(title='T', content='C'), 'static page\n')
+
+class TestLoadTemplate(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = self.write('template.html', '<title>{{ Title }}</title>\n')
+
+    def test_cached_by_mtime(self):
+        first = load_template(self.path)
+        self.assertIs(load_template(self.path), first)
+
+        with open(self.path, 'w') as f:
+            f.write('<h1>{{ Title }}</h1>\n')
+        st = os.stat(self.path)
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        second = load_template(self.path)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.render(title='T', content=''), '<h1>T</h1>\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
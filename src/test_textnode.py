@@ -33,6 +33,17 @@ class TestTextNode(unittest.TestCase):
         second = TextNode('four five siX', TextType.LINK, 'https://something')
         self.assertNotEqual(first, second)
 
+    def test_text_type_is_member(self):
+        node = TextNode('bold text', TextType.BOLD)
+        self.assertIs(node.text_type, TextType.BOLD)
+        self.assertEqual(node.text_type, 'bold')
+        self.assertEqual(TextNode('bold text', 'bold'), node)
+
+    def test_slots(self):
+        node = TextNode('One two three', TextType.BOLD)
+        self.assertFalse(hasattr(node, '__dict__'))
+        self.assertEqual(repr(node), 'TextNode("One two three", bold)')
+
 
 if __name__ == '__main__':
     unittest.main()
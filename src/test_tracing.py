@@ -0,0 +1,81 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import tracing
+from main import build, build_incremental, clean_build
+from testcase import TempDirTestCase
+
+class TestTracing(unittest.TestCase):
+    def tearDown(self):
+        tracing.disable()
+
+    def test_disabled_span_is_shared_noop(self):
+        self.assertIs(tracing.span('page', src='a.md'), tracing.NULL_SPAN)
+        with tracing.span('page'):
+            pass
+        self.assertEqual(tracing.drain(), [])
+
+    def test_enabled_span_records_event(self):
+        tracing.enable()
+        with tracing.span('page', src='a.md'):
+            with tracing.span('read'):
+                pass
+        events = tracing.drain()
+        self.assertEqual([e['name'] for e in events], ['read', 'page'])
+        read, page = events
+        self.assertEqual(page['ph'], 'X')
+        self.assertEqual(page['args'], {'src': 'a.md'})
+        self.assertEqual(page['pid'], os.getpid())
+        self.assertGreaterEqual(read['ts'], page['ts'])
+        self.assertLessEqual(read['dur'], page['dur'])
+        self.assertEqual(tracing.drain(), [])
+
+    def test_span_records_on_error(self):
+        tracing.enable()
+        with self.assertRaises(ValueError):
+            with tracing.span('parse'):
+                raise ValueError('bad markdown')
+        self.assertEqual([e['name'] for e in tracing.drain()], ['parse'])
+
+    def test_export(self):
+        tracing.enable()
+        with tracing.span('build'):
+            pass
+        tracing.record([{'name': 'page', 'ph': 'X', 'ts': 0, 'dur': 1,
+                         'pid': -1, 'tid': 0, 'args': {}}])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'trace.json')
+            tracing.export(path)
+            with open(path) as f:
+                data = json.load(f)
+        names = [(e['ph'], e['name']) for e in data['traceEvents']]
+        self.assertEqual(names, [('M', 'process_name'), ('M', 'process_name'),
+                                 ('X', 'build'), ('X', 'page')])
+
+class TestBuildSpans(TempDirTestCase):
+    def tearDown(self):
+        tracing.disable()
+
+    def test_every_build_walks_in_a_span(self):
+        template = self.write('template.html', '{{ Title }}\n{{ Content }}\n')
+        self.write('content/index.md', '# Home\n')
+        self.write('static/index.css', 'body {}\n')
+        args = (template, os.path.join(self.root, 'static'),
+                os.path.join(self.root, 'content'), os.path.join(self.root, 'public'))
+        manifest = os.path.join(self.root, 'manifest.json')
+        for function, options in ((build, {}), (clean_build, {}),
+                                  (build_incremental, {'manifest_path': manifest})):
+            tracing.enable()
+            with contextlib.redirect_stdout(io.StringIO()):
+                function(*args, **options)
+            names = [event['name'] for event in tracing.drain()]
+            self.assertIn('walk', names, function.__name__)
+            tracing.disable()
+
+
+if __name__ == '__main__':
+    unittest.main()
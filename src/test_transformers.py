@@ -1,12 +1,19 @@
+import re
+import tempfile
 import unittest
 
 from textnode import TextNode, TextType
 from leafnode import LeafNode
 from parentnode import ParentNode
+import transformers
 from transformers import (
     textnode_to_htmlnode,
     text_to_textnodes,
+    scan_inline,
+    split_text_to_textnodes,
     markdown_to_blocks,
+    iter_blocks,
+    iter_markdown_html,
     markdown_to_htmlnode
 )
 
@@ -124,6 +131,42 @@ class TestTextToTextNodes(unittest.TestCase):
         ]
         self.assertEqual(text_to_textnodes(text), expect)
 # }}}
+class TestScanInline(unittest.TestCase):
+    texts = [
+        'Run `bash` and *tell* me **what you see**',
+        'See [the docs](https://example.com) or ![a cat](/cat.png)',
+        '**Bold** then *italic* then `code` then [link](/l) ![img](/i)',
+        '*italic `code` **bold**',
+        '`code *x` and *y',
+        '*** odd ****stars*** here',
+        'trailing delimiter**',
+        'a![not [a](link)',
+        '',
+        'plain text'
+    ]
+
+    def test_same_as_split(self):# {{{
+        for text in self.texts:
+            with self.subTest(text=text):
+                self.assertEqual(scan_inline(text), split_text_to_textnodes(text))
+# }}}
+    def test_same_errors_as_split(self):# {{{
+        for text in ['unclosed **bold', '`x **a** y **b', 'a `b']:
+            with self.subTest(text=text):
+                with self.assertRaises(Exception) as split_error:
+                    split_text_to_textnodes(text)
+                self.assertRaisesRegex(Exception, re.escape(str(split_error.exception)),
+                                       scan_inline, text)
+# }}}
+    def test_select_tokenizer(self):# {{{
+        self.addCleanup(transformers.set_inline_tokenizer,
+                        transformers.inline_tokenizer)
+        transformers.set_inline_tokenizer('scan')
+        self.assertEqual(text_to_textnodes(self.texts[2]),
+                         split_text_to_textnodes(self.texts[2]))
+        self.assertRaisesRegex(ValueError, 'invalid inline tokenizer',
+                               transformers.set_inline_tokenizer, 'regex')
+# }}}
 class TestMarkdownToBlocks(unittest.TestCase):
     def test_markdown_to_block_empty(self):# {{{
         markdown = ''
@@ -211,6 +254,35 @@ This is a paragraph of text. It has some **bold** and *italic* words inside of i
         ]
         self.assertEqual(markdown_to_blocks(markdown), expect)
 # }}}
+class TestIterBlocks(unittest.TestCase):
+    def test_iter_blocks_file(self):# {{{
+        markdown = '# Heading\n\n  para one\nline two  \n\n\n* a\n* b\n'
+        with tempfile.TemporaryFile('w+') as f:
+            f.write(markdown)
+            f.seek(0)
+            self.assertEqual(list(iter_blocks(f)), markdown_to_blocks(markdown))
+# }}}
+    def test_iter_blocks_lazy(self):# {{{
+        lines = iter(['first', '', 'second', 'line', ''])
+        blocks = iter_blocks(lines)
+        self.assertEqual(next(blocks), 'first')
+        self.assertEqual(next(lines), 'second')
+# }}}
+    def test_iter_blocks_long_block(self):# {{{
+        lines = ['```'] + [f'line {i}' for i in range(10000)] + ['```']
+        blocks = list(iter_blocks(lines))
+        self.assertEqual(blocks, ['\n'.join(lines)])
+# }}}
+class TestIterMarkdownHTML(unittest.TestCase):
+    def test_iter_markdown_html(self):# {{{
+        markdown = '# Title\n\nSome **bold** text\n\n1. one\n2. two\n'
+        chunks = list(iter_markdown_html(markdown.split('\n')))
+        self.assertEqual(chunks, list(markdown_to_htmlnode(markdown).iter_html()))
+# }}}
+    def test_iter_markdown_html_empty(self):# {{{
+        self.assertRaisesRegex(ValueError, 'ParentNode must have children',
+                               list, iter_markdown_html(['', '  ']))
+# }}}
 class TestMarkdownToHTMLNode(unittest.TestCase):
     def test_markdown_to_htmlnode_simple(self):# {{{
         markdown = '''# This is a heading
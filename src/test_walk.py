@@ -0,0 +1,73 @@
+import contextlib
+import io
+import os
+import unittest
+from unittest import mock
+
+from main import copy_files, delete_files_recursive, generate_pages_recursive
+from testcase import TempDirTestCase
+from walk import walk
+
+class TestWalk(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = os.path.join(self.tmp.name, 'root')
+        for rel in ('index.md', 'a.md', 'a/b.md', 'a-b.md', 'a/c/d.md', 'z/e.md'):
+            self.write(rel, f'# {rel}\n')
+        os.makedirs(os.path.join(self.root, 'empty'))
+
+    def test_sorted(self):
+        tree = walk(self.root)
+        self.assertEqual(tree.files, ['a-b.md', 'a.md', 'a/b.md', 'a/c/d.md',
+                                      'index.md', 'z/e.md'])
+        self.assertEqual(tree.dirs, ['a', 'a/c', 'empty', 'z'])
+
+    def test_no_stat_calls(self):
+        with mock.patch('os.stat', side_effect=AssertionError('stat called')):
+            walk(self.root)
+
+    def test_make_dirs(self):
+        dst = os.path.join(self.tmp.name, 'dst')
+        walk(self.root).make_dirs(dst)
+        self.assertEqual(walk(dst).dirs, ['a', 'a/c', 'empty', 'z'])
+        self.assertEqual(walk(dst).files, [])
+
+    def test_symlinks(self):
+        outside = os.path.join(self.tmp.name, 'outside')
+        self.write('keep.md', 'keep', outside)
+        os.symlink(outside, os.path.join(self.root, 'link'))
+        self.assertIn('link/keep.md', walk(self.root).files)
+        tree = walk(self.root, follow_symlinks=False)
+        self.assertIn('link', tree.files)
+        self.assertNotIn('link', tree.dirs)
+
+    def test_delete_does_not_follow_links(self):
+        outside = os.path.join(self.tmp.name, 'outside')
+        self.write('keep.md', 'keep', outside)
+        os.symlink(outside, os.path.join(self.root, 'link'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            delete_files_recursive(self.root)
+        self.assertEqual(os.listdir(self.root), [])
+        self.assertTrue(os.path.isfile(os.path.join(outside, 'keep.md')))
+
+    def test_copy_files(self):
+        dst = os.path.join(self.tmp.name, 'dst')
+        os.mkdir(dst)
+        with contextlib.redirect_stdout(io.StringIO()):
+            copy_files(self.root, dst)
+        self.assertEqual(walk(dst).files, walk(self.root).files)
+        self.assertEqual(walk(dst).dirs, walk(self.root).dirs)
+
+    def test_generate_pages_recursive(self):
+        template = self.write('template.html', '{{ Title }}\n{{ Content }}\n',
+                              self.tmp.name)
+        dst = os.path.join(self.tmp.name, 'dst')
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(template, self.root, dst)
+        self.assertEqual(walk(dst).files, ['a-b.html', 'a.html', 'a/b.html',
+                                           'a/c/d.html', 'index.html', 'z/e.html'])
+        with open(os.path.join(dst, 'a', 'c', 'd.html')) as f:
+            self.assertEqual(f.read(), 'a/c/d.md\n<div><h1>a/c/d.md</h1></div>\n')
+
+if __name__ == '__main__':
+    unittest.main()
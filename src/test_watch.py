@@ -0,0 +1,134 @@
+import contextlib
+import io
+import os
+import unittest
+
+from main import build, rebuild_changes
+from testcase import TempDirTestCase
+from watch import Tree, Watcher
+
+TEMPLATE = '<title>{{ Title }}</title>\n{{ Content }}\n'
+
+class WatchTestCase(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.write('template.html', TEMPLATE)
+        self.content = os.path.join(self.root, 'content')
+        self.static = os.path.join(self.root, 'static')
+        self.dst = os.path.join(self.root, 'public')
+        self.write('content/index.md', '# Home\n\nHello\n')
+        self.write('content/blog/post.md', '# Post\n\nA *post*\n')
+        self.write('static/index.css', 'body {}\n')
+
+    def read(self, rel):
+        with open(os.path.join(self.root, rel)) as f:
+            return f.read()
+
+class TestTree(WatchTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tree = Tree([self.template, self.static, self.content])
+
+    def test_snapshot(self):
+        self.assertEqual(sorted(self.tree.files), sorted([
+            self.template,
+            os.path.join(self.content, 'blog', 'post.md'),
+            os.path.join(self.content, 'index.md'),
+            os.path.join(self.static, 'index.css')
+        ]))
+        self.assertEqual(self.tree.refresh(), ([], []))
+
+    def test_full_refresh(self):
+        post = self.write('content/blog/post.md', '# Post\n\nEdited\n')
+        os.remove(os.path.join(self.static, 'index.css'))
+        new = self.write('content/new/page.md', '# New\n')
+        self.assertEqual(self.tree.refresh(),
+                         (sorted([post, new]), [os.path.join(self.static, 'index.css')]))
+
+    def test_directory_refresh(self):
+        post = self.write('content/blog/post.md', '# Post\n\nEdited\n')
+        new = self.write('content/blog/2024/old.md', '# Old\n')
+        blog = os.path.join(self.content, 'blog')
+        self.assertEqual(self.tree.refresh({blog}), (sorted([new, post]), []))
+        # the new subdirectory is part of the snapshot now
+        self.assertIn(os.path.join(blog, '2024'), self.tree.listing)
+
+    def test_removed_directory(self):
+        os.remove(os.path.join(self.content, 'blog', 'post.md'))
+        os.rmdir(os.path.join(self.content, 'blog'))
+        self.assertEqual(self.tree.refresh({self.content}),
+                         ([], [os.path.join(self.content, 'blog', 'post.md')]))
+        self.assertNotIn(os.path.join(self.content, 'blog'), self.tree.listing)
+
+    def test_file_root(self):
+        self.write('template.html', TEMPLATE + '<footer></footer>\n')
+        self.assertEqual(self.tree.refresh({self.root}), ([self.template], []))
+
+class TestWatcher(WatchTestCase):
+    def check_watcher(self, use_inotify):
+        watcher = Watcher([self.template, self.static, self.content], 0.01,
+                          use_inotify)
+        try:
+            self.assertEqual(watcher.wait(0.05), ([], []))
+            post = self.write('content/blog/post.md', '# Post\n\nEdited\n')
+            self.assertEqual(watcher.wait(1), ([post], []))
+            new = self.write('content/blog/drafts/draft.md', '# Draft\n')
+            self.assertEqual(watcher.wait(1), ([new], []))
+            # files in directories created while watching are seen too
+            newer = self.write('content/blog/drafts/draft2.md', '# Draft 2\n')
+            self.assertEqual(watcher.wait(1), ([newer], []))
+        finally:
+            watcher.close()
+
+    def test_polling(self):
+        self.check_watcher(False)
+
+    def test_inotify(self):
+        watcher = Watcher([self.content], use_inotify=True)
+        watcher.close()
+        if watcher.method != 'inotify':
+            self.skipTest('inotify is not available')
+        self.check_watcher(True)
+
+class TestRebuildChanges(WatchTestCase):
+    def setUp(self):
+        super().setUp()
+        self.run_quietly(build, self.template, self.static, self.content, self.dst)
+
+    def run_quietly(self, function, *args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return function(*args, **kwargs)
+
+    def rebuild(self, changed=(), removed=()):
+        return self.run_quietly(rebuild_changes, self.template, self.static,
+                                self.content, self.dst, list(changed),
+                                list(removed))
+
+    def test_changed_page(self):
+        post = self.write('content/blog/post.md', '# Post\n\nEdited\n')
+        before = os.stat(os.path.join(self.dst, 'index.html')).st_mtime_ns
+        self.assertEqual(self.rebuild([post]), 1)
+        self.assertIn('Edited', self.read('public/blog/post.html'))
+        self.assertEqual(os.stat(os.path.join(self.dst, 'index.html')).st_mtime_ns,
+                         before)
+
+    def test_changed_template(self):
+        self.write('template.html', '<h1>{{ Title }}</h1>\n{{ Content }}\n')
+        self.assertEqual(self.rebuild([self.template]), 2)
+        self.assertTrue(self.read('public/index.html').startswith('<h1>Home</h1>'))
+        self.assertTrue(self.read('public/blog/post.html').startswith('<h1>Post</h1>'))
+
+    def test_changed_static(self):
+        css = self.write('static/index.css', 'body { margin: 0 }\n')
+        self.assertEqual(self.rebuild([css]), 1)
+        self.assertEqual(self.read('public/index.css'), 'body { margin: 0 }\n')
+
+    def test_removed_page(self):
+        post = os.path.join(self.content, 'blog', 'post.md')
+        os.remove(post)
+        self.assertEqual(self.rebuild(removed=[post]), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dst, 'blog')))
+        self.assertTrue(os.path.isfile(os.path.join(self.dst, 'index.html')))
+
+if __name__ == '__main__':
+    unittest.main()
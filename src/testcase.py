@@ -0,0 +1,18 @@
+import os
+import tempfile
+import unittest
+
+class TempDirTestCase(unittest.TestCase):
+    # A temporary directory at self.root, removed after tearDown
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+
+    def write(self, rel, data, root=None):
+        # text or bytes, under self.root unless root is given
+        path = os.path.join(root or self.root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb' if isinstance(data, bytes) else 'w') as f:
+            f.write(data)
+        return path
@@ -1,6 +1,6 @@
 from enum import Enum
 
-class TextType(Enum):
+class TextType(str, Enum):
     NORMAL = 'normal'
     BOLD   = 'bold'
     ITALIC = 'italic'
@@ -9,9 +9,14 @@ class TextType(Enum):
     IMAGE  = 'image'
 
 class TextNode:
+    # Parsed documents hold a lot of these, so no per-instance __dict__.
+    # text_type is the TextType member itself, which still compares equal
+    # to its string value.
+    __slots__ = ('text', 'text_type', 'url')
+
     def __init__(self, text, text_type, url=None):
         self.text = text
-        self.text_type = text_type.value
+        self.text_type = TextType(text_type)
         self.url = url
 
     def __eq__(self, other):
@@ -23,5 +28,5 @@ class TextNode:
 
     def __repr__(self):
         if self.url:
-            return f'TextNode("{self.text}", {self.text_type}, {self.url})'
-        return f'TextNode("{self.text}", {self.text_type})'
+            return f'TextNode("{self.text}", {self.text_type.value}, {self.url})'
+        return f'TextNode("{self.text}", {self.text_type.value})'
@@ -0,0 +1,94 @@
+import json
+import os
+import threading
+import time
+
+# Spans are recorded only after enable(). Until then span() hands out one
+# shared no-op context manager, so instrumented code pays a function call
+# and a None check.
+
+class Span:
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.tracer.events.append({
+            'name': self.name,
+            'ph': 'X',
+            'ts': self.start / 1000,
+            'dur': (end - self.start) / 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': self.args
+        })
+        return False
+
+class NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SPAN = NullSpan()
+
+class Tracer:
+    def __init__(self):
+        self.events = []
+
+    def drain(self):
+        events, self.events = self.events, []
+        return events
+
+    def export(self, path, extra_events=()):
+        # Chrome trace-event format, open it in chrome://tracing or Perfetto
+        events = self.events + list(extra_events)
+        names = {os.getpid(): 'ssg'}
+        for event in events:
+            names.setdefault(event['pid'], f'worker {event["pid"]}')
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': pid,
+                     'args': {'name': name}} for pid, name in names.items()]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': metadata + events,
+                       'displayTimeUnit': 'ms'}, f)
+
+tracer = None
+
+def enable():
+    global tracer
+    if tracer is None:
+        tracer = Tracer()
+
+def disable():
+    global tracer
+    tracer = None
+
+def is_enabled():
+    return tracer is not None
+
+def span(name, **args):
+    if tracer is None:
+        return NULL_SPAN
+    return Span(tracer, name, args)
+
+def drain():
+    return tracer.drain() if tracer is not None else []
+
+def record(events):
+    # merges spans recorded in another process
+    if tracer is not None:
+        tracer.events.extend(events)
+
+def export(path):
+    tracer.export(path)
@@ -1,33 +1,68 @@
+import contextlib
+import itertools
+
 from leafnode import LeafNode
 from textnode import TextNode, TextType
 from parentnode import ParentNode
+from render import iter_html
+from fingerprint import asset_size, asset_url
+from inlinememo import InlineMemo
+from search import text_words
 from helpers import (
     split_nodes_delimiter,
     split_nodes_image,
     split_nodes_link,
-    block_to_block_type
+    block_to_block_type,
+    LINK_REGEX,
+    IMAGE_REGEX
+)
+
+INLINE_DELIMITERS = (
+    ('**', TextType.BOLD),
+    ('*', TextType.ITALIC),
+    ('`', TextType.CODE)
 )
 
 def textnode_to_htmlnode(text_node):
     typ = text_node.text_type
-    if typ == 'normal':
+    if typ is TextType.NORMAL:
         return LeafNode(None, text_node.text)
-    elif typ == 'bold':
+    elif typ is TextType.BOLD:
         return LeafNode('b', text_node.text)
-    elif typ == 'italic':
+    elif typ is TextType.ITALIC:
         return LeafNode('i', text_node.text)
-    elif typ == 'code':
+    elif typ is TextType.CODE:
         return LeafNode('code', text_node.text)
-    elif typ == 'link':
+    elif typ is TextType.LINK:
         return LeafNode('a', text_node.text,
-                        props={'href': text_node.url})
-    elif typ == 'image':
-        return LeafNode('img', None,
-                        props={'src': text_node.url,
-                               'alt': text_node.text})
+                        props={'href': asset_url(text_node.url)})
+    elif typ is TextType.IMAGE:
+        return image_to_htmlnode(text_node)
     raise ValueError(f'invalid text type {typ}')
 
+# images rendered so far on the current page, None outside of a page
+_page_images = None
+
+def image_to_htmlnode(text_node):
+    global _page_images
+    props = {'src': asset_url(text_node.url), 'alt': text_node.text}
+    size = asset_size(text_node.url)
+    if size:
+        # reserve the space, the page doesn't shift once it loads
+        props['width'] = str(size[0])
+        props['height'] = str(size[1])
+    if _page_images is not None:
+        # the first image is likely above the fold, the rest can wait
+        if _page_images:
+            props['loading'] = 'lazy'
+            props['decoding'] = 'async'
+        _page_images += 1
+    return LeafNode('img', None, props=props)
+
 def text_to_textnodes(text):
+    return INLINE_TOKENIZERS[inline_tokenizer](text)
+
+def split_text_to_textnodes(text):
     return split_nodes_image(
         split_nodes_link(
             split_nodes_delimiter(
@@ -37,58 +72,199 @@ def text_to_textnodes(text):
                     '*', TextType.ITALIC),
                 '`', TextType.CODE)))
 
-def markdown_to_blocks(markdown):
-    blocks = []
-    lines = markdown.split('\n')
-    # strip leading and trailing spaces of lines
-    lines = list(map(str.strip, lines))
-    is_new_block = False
-    current_block = ''
+def scan_inline(text):
+    # Produces the same nodes as running split_nodes_delimiter for **, *
+    # and `, then split_nodes_link and split_nodes_image, in one left to
+    # right walk over text. Each stage only ever looked at the normal
+    # spans the previous stage left, so a normal span is handed straight
+    # to the next stage as a (start, end) range instead of through an
+    # intermediate list of nodes. Every delimiter is found once.
+    nodes = []
+    append = nodes.append
+    normal = TextType.NORMAL
+
+    def images(start, end):
+        for match in IMAGE_REGEX.finditer(text, start, end):
+            if match.start() > start:
+                append(TextNode(text[start:match.start()], normal))
+            append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+            start = match.end()
+        if start < end:
+            append(TextNode(text[start:end], normal))
+
+    def links(start, end):
+        for match in LINK_REGEX.finditer(text, start, end):
+            images(start, match.start())
+            append(TextNode(match.group(1), TextType.LINK, match.group(2)))
+            start = match.end()
+        images(start, end)
+
+    def delimited(level, start, end):
+        if level == len(INLINE_DELIMITERS):
+            links(start, end)
+            return
+        delimiter, text_type = INLINE_DELIMITERS[level]
+        size = len(delimiter)
+        opened = False
+        pos = start
+        found = text.find(delimiter, pos, end)
+        while found >= 0:
+            after = found + size
+            following = text.find(delimiter, after, end)
+            if found > pos:
+                if after == end:
+                    append(TextNode(text[pos:found], text_type))
+                elif not opened and following < 0:
+                    raise Exception(f'invalid: unclosed {delimiter} detected')
+                elif opened:
+                    opened = False
+                    append(TextNode(text[pos:found], text_type))
+                else:
+                    opened = True
+                    delimited(level + 1, pos, found)
+            else:
+                opened = True
+            pos = after
+            found = following
+        if pos < end:
+            delimited(level + 1, pos, end)
+
+    try:
+        delimited(0, 0, len(text))
+    except Exception:
+        # The staged splitters check a whole stage before the next one, so
+        # on invalid markup they may complain about another delimiter.
+        # Let them raise to report the same error.
+        split_text_to_textnodes(text)
+        raise
+    return nodes
+
+INLINE_TOKENIZERS = {
+    'split': split_text_to_textnodes,
+    'scan': scan_inline
+}
+inline_tokenizer = 'split'
+
+def set_inline_tokenizer(name):
+    global inline_tokenizer
+    if name not in INLINE_TOKENIZERS:
+        raise ValueError(f'invalid inline tokenizer {name}')
+    inline_tokenizer = name
+
+def iter_blocks(lines):
+    # lines is any iterable of lines, e.g. an open file. Lines are stripped
+    # and collected until a blank line, then joined once, so a block costs
+    # linear time in its length.
+    block = []
     for line in lines:
+        line = line.strip()
         if line:
-            if is_new_block:
-                if current_block:
-                    blocks.append(current_block)
-                is_new_block = False
-                current_block = ''
-            if current_block:
-                current_block = '\n'.join([current_block, line])
-            else:
-                current_block = line
-        else:
-            is_new_block = True
-    else:
-        if current_block:
-            blocks.append(current_block)
-    return blocks
+            block.append(line)
+        elif block:
+            yield '\n'.join(block)
+            block = []
+    if block:
+        yield '\n'.join(block)
+
+def markdown_to_blocks(markdown):
+    return list(iter_blocks(markdown.split('\n')))
 
 def markdown_to_htmlnode(markdown):
-    block_type_transformers = {
-        'paragraph':      block_to_paragraph,
-        'heading':        block_to_heading,
-        'quote':          block_to_quote,
-        'unordered_list': block_to_unordered_list,
-        'ordered_list':   block_to_ordered_list,
-        'code':           block_to_code
-    }
+    global _page_images
     children = []
     blocks = markdown_to_blocks(markdown)
-    for block in blocks:
-        typ = block_to_block_type(block)
-        transformer = block_type_transformers[typ]
-        children.append(transformer(block))
+    _page_images = 0
+    try:
+        for block in blocks:
+            children.append(block_to_htmlnode(block))
+    finally:
+        _page_images = None
     return ParentNode('div', children)
 
+def block_to_htmlnode(block):
+    return BLOCK_TYPE_TRANSFORMERS[block_to_block_type(block)](block)
+
+def iter_markdown_html(lines):
+    # Yields the same chunks as markdown_to_htmlnode(markdown).iter_html()
+    # but only one block is read, parsed and rendered at a time
+    global _page_images
+    blocks = iter_blocks(lines)
+    first = next(blocks, None)
+    if first is None:
+        raise ValueError('ParentNode must have children')
+    yield '<div>'
+    # other code may run between chunks, the count is only set while a
+    # block is converted
+    images = 0
+    for block in itertools.chain((first,), blocks):
+        _page_images = images
+        try:
+            node = block_to_htmlnode(block)
+            images = _page_images
+        finally:
+            _page_images = None
+        yield from iter_html(node)
+    yield '</div>'
+
+# rendered inline text shared by every page of a build. Off unless the
+# build sets a size, memoized text comes back as one raw leaf instead of
+# the parser's nodes.
+inline_memo = InlineMemo(0)
+
+def set_inline_memo_size(max_bytes):
+    global inline_memo
+    inline_memo = InlineMemo(max_bytes)
+
+# words of the current page for the search index, None when they are
+# not collected
+_page_words = None
+
+@contextlib.contextmanager
+def collect_words():
+    # Collects the words of the inline text converted inside the block,
+    # streamed pages included
+    global _page_words
+    previous, _page_words = _page_words, set()
+    try:
+        yield _page_words
+    finally:
+        _page_words = previous
+
+def textnode_words(textnodes):
+    # the text of links and the alt text of images, not their URLs
+    return text_words(' '.join(n.text for n in textnodes if n.text))
+
 def text_to_children(text):
-    textnodes = text_to_textnodes(text.lstrip())
-    children = list(map(lambda n: textnode_to_htmlnode(n), textnodes))
-    return children
+    text = text.lstrip()
+    # images depend on the position in the page, text with one is always
+    # rendered again
+    if not inline_memo.max_bytes or '![' in text:
+        textnodes = text_to_textnodes(text)
+        if _page_words is not None:
+            _page_words.update(textnode_words(textnodes))
+        return [textnode_to_htmlnode(n) for n in textnodes]
+    memoized = inline_memo.get(text, asset_url)
+    if memoized is None:
+        textnodes = text_to_textnodes(text)
+        children = [textnode_to_htmlnode(n) for n in textnodes]
+        html = ''.join(child.to_html() for child in children)
+        urls = [(n.url, child.props['href'])
+                for n, child in zip(textnodes, children)
+                if n.text_type is TextType.LINK]
+        words = None
+        if _page_words is not None:
+            words = textnode_words(textnodes)
+        inline_memo.put(text, html, urls, words)
+    else:
+        html, words = memoized
+        if words is None and _page_words is not None:
+            # memoized while words were not collected
+            words = textnode_words(text_to_textnodes(text))
+    if _page_words is not None:
+        _page_words.update(words)
+    return [LeafNode(None, html)]
 
 def block_to_paragraph(block):
-    lines = block.split('\n')
-    children = []
-    for line in lines:
-        children.extend(text_to_children(line))
     return ParentNode('p', text_to_children(block))
 
 def block_to_heading(block):
@@ -126,3 +302,12 @@ def block_to_code(block):
         ParentNode('code', [LeafNode(None, code_block)])
     ])
     return node
+
+BLOCK_TYPE_TRANSFORMERS = {
+    'paragraph':      block_to_paragraph,
+    'heading':        block_to_heading,
+    'quote':          block_to_quote,
+    'unordered_list': block_to_unordered_list,
+    'ordered_list':   block_to_ordered_list,
+    'code':           block_to_code
+}
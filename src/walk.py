@@ -0,0 +1,41 @@
+import os
+
+class Tree:
+    # Everything under root as sorted relative paths, a directory always
+    # comes before what is inside it
+    def __init__(self, root, files, dirs):
+        self.root = root
+        self.files = files
+        self.dirs = dirs
+
+    def make_dirs(self, dst):
+        # creates the mirror of every directory in the tree under dst
+        os.makedirs(dst, exist_ok=True)
+        for rel in self.dirs:
+            os.makedirs(os.path.join(dst, rel), exist_ok=True)
+
+    def __repr__(self):
+        return f'Tree({self.root}, files={len(self.files)}, dirs={len(self.dirs)})'
+
+def walk(root, follow_symlinks=True):
+    # One scandir per directory. The type of each entry comes from the
+    # directory listing, so no file is stat'ed. Without follow_symlinks,
+    # links (and anything else that is not a directory) are listed as
+    # files and never descended into.
+    files, dirs = [], []
+    stack = ['']
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(os.path.join(root, rel_dir)) as entries:
+            for entry in entries:
+                rel = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=follow_symlinks):
+                    dirs.append(rel)
+                    stack.append(rel)
+                elif not follow_symlinks or entry.is_file():
+                    files.append(rel)
+    # sorting the whole paths keeps parents before children and the order
+    # independent of the filesystem
+    files.sort()
+    dirs.sort()
+    return Tree(root, files, dirs)
@@ -0,0 +1,260 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+# from linux/inotify.h
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+              IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF |
+              IN_MOVE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
+# editors save in several steps, events closer than this are one change
+DEBOUNCE = 0.005
+
+class Inotify:
+    # Minimal ctypes binding, only available on Linux
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.watches = {}
+
+    def add(self, directory):
+        wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), directory)
+        self.watches[wd] = directory
+
+    def watched(self):
+        return set(self.watches.values())
+
+    def read(self, timeout=None):
+        # Returns the directories that had events, an empty set on timeout,
+        # or None when the kernel queue overflowed and events were lost
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        directories = set()
+        overflow = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size + length
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                directory = self.watches.get(wd)
+                if mask & IN_IGNORED:
+                    self.watches.pop(wd, None)
+                if directory is not None:
+                    directories.add(directory)
+        return None if overflow else directories
+
+    def close(self):
+        os.close(self.fd)
+
+class Tree:
+    # Stat snapshot, (mtime, size) of every file under the roots. Roots
+    # may be directories or single files.
+    def __init__(self, roots):
+        self.roots = roots
+        self.files = {}
+        # directory -> (file paths, subdirectory paths) directly inside it
+        self.listing = {}
+        for root in roots:
+            self._add(root, [])
+
+    def _stat(self, path):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def _add(self, path, changed):
+        if not os.path.isdir(path):
+            try:
+                self.files[path] = self._stat(path)
+            except FileNotFoundError:
+                return
+            changed.append(path)
+            return
+        stack = [path]
+        while stack:
+            directory = stack.pop()
+            files, dirs = set(), set()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            dirs.add(entry.path)
+                        elif entry.is_file():
+                            st = entry.stat()
+                            self.files[entry.path] = (st.st_mtime_ns, st.st_size)
+                            files.add(entry.path)
+                            changed.append(entry.path)
+            except FileNotFoundError:
+                continue
+            self.listing[directory] = (files, dirs)
+            stack.extend(dirs)
+
+    def _forget(self, directory, removed):
+        files, dirs = self.listing.pop(directory, ((), ()))
+        for path in files:
+            del self.files[path]
+            removed.append(path)
+        for sub in dirs:
+            self._forget(sub, removed)
+
+    def _refresh_dir(self, directory, changed, removed):
+        old_files, old_dirs = self.listing.pop(directory, (set(), set()))
+        files, dirs = set(), set()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        dirs.add(entry.path)
+                    elif entry.is_file():
+                        st = entry.stat()
+                        stat = (st.st_mtime_ns, st.st_size)
+                        if self.files.get(entry.path) != stat:
+                            self.files[entry.path] = stat
+                            changed.append(entry.path)
+                        files.add(entry.path)
+        except FileNotFoundError:
+            pass
+        else:
+            self.listing[directory] = (files, dirs)
+        for path in old_files - files:
+            del self.files[path]
+            removed.append(path)
+        for sub in old_dirs - dirs:
+            self._forget(sub, removed)
+        for sub in dirs - old_dirs:
+            self._add(sub, changed)
+
+    def _refresh_file(self, path, changed, removed):
+        try:
+            stat = self._stat(path)
+        except FileNotFoundError:
+            if self.files.pop(path, None) is not None:
+                removed.append(path)
+            return
+        if self.files.get(path) != stat:
+            self.files[path] = stat
+            changed.append(path)
+
+    def refresh(self, directories=None):
+        # Rescans the given directories, or everything when None, and
+        # returns the (changed, removed) file paths
+        changed, removed = [], []
+        if directories is None:
+            old = self.files
+            self.files, self.listing = {}, {}
+            for root in self.roots:
+                self._add(root, [])
+            changed = [path for path, stat in self.files.items()
+                       if old.get(path) != stat]
+            removed = [path for path in old if path not in self.files]
+            return sorted(changed), sorted(removed)
+        for directory in directories:
+            if directory in self.listing:
+                self._refresh_dir(directory, changed, removed)
+        for root in self.roots:
+            if (root not in self.listing and
+                (os.path.dirname(root) or '.') in directories):
+                self._refresh_file(root, changed, removed)
+        return sorted(changed), sorted(removed)
+
+class Watcher:
+    # Waits for changes under roots, with inotify where available and by
+    # polling stat snapshots every interval seconds otherwise
+    def __init__(self, roots, interval=0.1, use_inotify=True):
+        self.tree = Tree(roots)
+        self.interval = interval
+        self.inotify = None
+        if use_inotify:
+            try:
+                self.inotify = Inotify()
+            except (OSError, AttributeError):
+                self.inotify = None
+            else:
+                self._watch_new_dirs()
+        self.method = 'inotify' if self.inotify else 'polling'
+
+    def _watch_directories(self):
+        directories = set(self.tree.listing)
+        for root in self.tree.roots:
+            if root not in self.tree.listing:
+                directories.add(os.path.dirname(root) or '.')
+        return directories
+
+    def _watch_new_dirs(self):
+        for directory in self._watch_directories() - self.inotify.watched():
+            try:
+                self.inotify.add(directory)
+            except OSError:
+                pass
+
+    def _read_events(self, timeout):
+        directories = self.inotify.read(timeout)
+        if not directories:
+            return directories
+        while True:
+            more = self.inotify.read(DEBOUNCE)
+            if more is None:
+                return None
+            if not more:
+                return directories
+            directories |= more
+
+    def wait(self, timeout=None):
+        # Returns (changed, removed) file paths, both empty on timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None
+            if deadline is not None:
+                remaining = max(0, deadline - time.monotonic())
+            if self.inotify:
+                directories = self._read_events(remaining)
+                if directories is None:
+                    changed, removed = self.tree.refresh()
+                elif directories:
+                    changed, removed = self.tree.refresh(directories)
+                else:
+                    changed, removed = [], []
+                self._watch_new_dirs()
+            else:
+                time.sleep(self.interval if remaining is None
+                           else min(self.interval, remaining))
+                changed, removed = self.tree.refresh()
+            if changed or removed:
+                return changed, removed
+            if deadline is not None and time.monotonic() >= deadline:
+                return [], []
+
+    def close(self):
+        if self.inotify:
+            self.inotify.close()
+            self.inotify = None